@@ -15,15 +15,18 @@ from pydantic import BaseModel, EmailStr, validator
 from sqlalchemy.exc import SQLAlchemyError
 
 from db import db
+from settings import settings
 from models.users import AuthHistory, User
 from services.helpers import (
     add_auth_history,
     check_passwords_match,
     create_tokens,
+    get_revoked_tokens,
     get_user_from_db,
     hash_password,
     rate_limit,
     revoke_token,
+    service_required,
     set_user_refresh_token,
 )
 
@@ -66,6 +69,19 @@ def authenticate():
     return jsonify(user_roles=user_roles)
 
 
+@auth.route("/public-key", methods=["GET"])
+def public_key():
+    if not settings.JWT_PUBLIC_KEY:
+        abort(HTTPStatus.NOT_FOUND, description="Tokens are not signed with a public key algorithm")
+    return jsonify(algorithm="RS256", public_key=settings.JWT_PUBLIC_KEY)
+
+
+@auth.route("/revoked", methods=["GET"])
+@service_required()
+def revoked():
+    return jsonify(jti=get_revoked_tokens())
+
+
 @auth.route("/register", methods=["POST"])
 @rate_limit()
 @validate()
@@ -32,6 +32,10 @@ app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=settings.REFRESH_TOKEN_
 app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
 app.config["JWT_COOKIE_SECURE"] = settings.JWT_COOKIE_SECURE
 app.config["JWT_SECRET_KEY"] = settings.JWT_SECRET_KEY
+if settings.JWT_PRIVATE_KEY and settings.JWT_PUBLIC_KEY:
+    app.config["JWT_ALGORITHM"] = "RS256"
+    app.config["JWT_PRIVATE_KEY"] = settings.JWT_PRIVATE_KEY
+    app.config["JWT_PUBLIC_KEY"] = settings.JWT_PUBLIC_KEY
 app.config['SQLALCHEMY_DATABASE_URI'] = settings.POSTGRES_URL
 app.config["SECRET_KEY"] = settings.SECRET_KEY
 
@@ -85,6 +89,12 @@ def check_if_token_is_revoked(jwt_header, jwt_payload: dict):
     return token_in_redis is not None
 
 
+@jwt.additional_claims_loader
+def add_roles_claim(identity: str) -> dict:
+    user = db.session.execute(select(User).where(User.email == identity)).scalars().one_or_none()
+    return {"roles": [role.name for role in user.roles] if user is not None else []}
+
+
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
     identity = jwt_data["sub"]
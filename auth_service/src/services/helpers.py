@@ -1,10 +1,11 @@
 import hashlib
+import hmac
 import os
 import random
 from datetime import datetime, timedelta
 from functools import wraps
 from http import HTTPStatus
-from typing import Tuple
+from typing import List, Tuple
 
 from flask import jsonify, request
 from flask_jwt_extended import (create_access_token,
@@ -49,6 +50,21 @@ def admin_required():
     return wrapper
 
 
+def service_required():
+    """Пропускает только запросы внутренних сервисов с ключом SERVICE_API_KEY в заголовке X-Service-Key"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            key = request.headers.get("X-Service-Key", "")
+            if settings.SERVICE_API_KEY and hmac.compare_digest(key, settings.SERVICE_API_KEY):
+                return fn(*args, **kwargs)
+            return jsonify(
+                message="Only internal services can view this page."
+            ), HTTPStatus.FORBIDDEN
+        return decorator
+    return wrapper
+
+
 def add_auth_history(user, request):
     user_agent = request.headers.get("user-agent", "")
     user_host = request.headers.get("host", "")
@@ -104,7 +120,19 @@ def get_user_from_db(email: str) -> User:
 def revoke_token(token):
     jti = token["jti"]
     ttype = token["type"]
-    redis.set(jti, "", ex=get_token_expire_time(ttype))
+    pipeline = redis.pipeline()
+    pipeline.set(jti, "", ex=get_token_expire_time(ttype))
+    # по времени истечения токена, чтобы отдавать только ещё действующие отозванные токены
+    pipeline.zadd(settings.REVOKED_TOKENS_KEY, {jti: token["exp"]})
+    pipeline.execute()
+
+
+def get_revoked_tokens() -> List[str]:
+    now = datetime.now().timestamp()
+    pipeline = redis.pipeline()
+    pipeline.zremrangebyscore(settings.REVOKED_TOKENS_KEY, "-inf", now)
+    pipeline.zrangebyscore(settings.REVOKED_TOKENS_KEY, now, "+inf")
+    return pipeline.execute()[1]
 
 
 def set_user_refresh_token(user: User, refresh_token: str):
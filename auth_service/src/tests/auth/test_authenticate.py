@@ -1,5 +1,9 @@
 from http import HTTPStatus
 
+from flask_jwt_extended import decode_token
+
+from settings import settings
+
 
 def test_authenticate_user(client, session, test_user, test_user_access_token):
     headers = {
@@ -11,3 +15,44 @@ def test_authenticate_user(client, session, test_user, test_user_access_token):
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json['user_roles'] == ['guest']
+
+
+def test_access_token_contains_roles(client, session, test_user):
+    response = client.post(
+        "auth/api/v1/auth/login",
+        data={
+            'email': 'test@mail.ru',
+            'password': 'test_password',
+        }
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert decode_token(response.json['access_token'])['roles'] == ['guest']
+
+
+def test_revoked_tokens(client, session, test_user, test_user_access_token, mocker):
+    mocker.patch.object(settings, 'SERVICE_API_KEY', 'service key')
+    headers = {
+        'Authorization': 'Bearer {}'.format(test_user_access_token)
+    }
+    response = client.delete(
+        "auth/api/v1/auth/logout",
+        headers=headers
+    )
+    assert response.status_code == HTTPStatus.OK
+    response = client.get("auth/api/v1/auth/revoked", headers={'X-Service-Key': 'service key'})
+    assert response.status_code == HTTPStatus.OK
+    assert decode_token(test_user_access_token)['jti'] in response.json['jti']
+
+
+def test_revoked_tokens_require_service_key(client, session, mocker):
+    mocker.patch.object(settings, 'SERVICE_API_KEY', 'service key')
+    response = client.get("auth/api/v1/auth/revoked")
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    response = client.get("auth/api/v1/auth/revoked", headers={'X-Service-Key': 'wrong key'})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_revoked_tokens_unavailable_without_configured_key(client, session, mocker):
+    mocker.patch.object(settings, 'SERVICE_API_KEY', None)
+    response = client.get("auth/api/v1/auth/revoked", headers={'X-Service-Key': ''})
+    assert response.status_code == HTTPStatus.FORBIDDEN
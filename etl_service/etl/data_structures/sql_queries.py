@@ -50,11 +50,17 @@ movies_sql_query = """
         fw.title as title,
         fw.description as description,
         fw.modified as modified,
+        EXTRACT(YEAR FROM fw.creation_date)::int as year,
         COALESCE(
             array_agg(DISTINCT g.name)
             FILTER (WHERE g.id is not null),
             '{{}}'
             ) as genre,
+        COALESCE(
+            array_agg(DISTINCT g.id)
+            FILTER (WHERE g.id is not null),
+            '{{}}'
+            )::text[] as genre_ids,
         COALESCE (
            json_agg(
                DISTINCT jsonb_build_object(
@@ -1,5 +1,8 @@
 from elasticsearch import AsyncElasticsearch
 
+from etl.existence_filter import build_existence_filter, existence_filter_exists, publish_existence_filter
+from etl.notifier import CacheInvalidationNotifier
+from etl.postgres_extractor import DEFAULT_LAST_MODIFIED
 from etl.transformators import Transformator
 from etl.storage import State, RedisStorage
 from etl.data_structures.entities_meta import entities_meta
@@ -12,19 +15,46 @@ from etl.helpers import redis
 class ESLoader:
     def __init__(self, data_size: int = 1000):
         self.state = State(storage=RedisStorage(db=redis))
+        self.notifier = CacheInvalidationNotifier(db=redis)
         self.data_size = data_size
 
     async def load_data(self, last_modified: str = None) -> None:
         """Устанавливает соединение с postgres и es и переносит данные из postgres в es"""
         es_connection: AsyncElasticsearch = await get_es_connection()
+        changed_indexes = []
         for entity_meta in entities_meta:
+            index_name = entity_meta.index_data['index']
             await self.create_index_if_not_exists(es=es_connection, index=entity_meta.index_data)
-            if last_modified is not None:
-                self.state.set_state(key=f"{entity_meta.index_data['index']}_last_modified", value=last_modified)
+            index_last_modified = last_modified
+            if await self.add_missing_fields(es=es_connection, index=entity_meta.index_data):
+                # новые поля заполняются только при переиндексации, поэтому индекс загружается заново
+                index_last_modified = DEFAULT_LAST_MODIFIED
+            reindex = index_last_modified is not None
+            if reindex:
+                self.state.set_state(key=f"{index_name}_last_modified", value=index_last_modified)
+            created = False
             async for actions, modified in Transformator().transform_data(entity_meta=entity_meta):
-                await es_connection.bulk(actions, index=entity_meta.index_data['index'])
-                self.state.set_state(key=f"{entity_meta.index_data['index']}_last_modified", value=str(modified))
+                response = await es_connection.bulk(actions, index=index_name)
+                if index_name not in changed_indexes:
+                    changed_indexes.append(index_name)
+                if not reindex:
+                    self.notifier.publish(index=index_name, ids=self.notifier.get_indexed_ids(response))
+                    created = created or self.notifier.has_created(response)
+                self.state.set_state(key=f"{index_name}_last_modified", value=str(modified))
+            if reindex or created:
+                # после полной перезагрузки индекса или появления в нём новых документов
+                # его кэш сбрасывается целиком одним сообщением
+                self.notifier.bump_version(index=index_name)
+            # фильтр строится полным обходом индекса, поэтому перестраивается, только если в этом переносе
+            # в индекс записывались документы или фильтр ещё не опубликован
+            if index_name in changed_indexes or not existence_filter_exists(db=redis, index=index_name):
+                publish_existence_filter(
+                    db=redis,
+                    index=index_name,
+                    existence_filter=await build_existence_filter(es=es_connection, index=index_name),
+                )
         await es_connection.close()
+        self.notifier.etl_finished(indexes=changed_indexes)
 
     @staticmethod
     async def create_index_if_not_exists(es: AsyncElasticsearch, index: dict) -> None:
@@ -32,3 +62,22 @@ class ESLoader:
         if not await es.indices.exists(index=index_name):
             index_body = index['body']
             await es.indices.create(index=index_name, body=index_body)
+
+    @staticmethod
+    async def add_missing_fields(es: AsyncElasticsearch, index: dict) -> bool:
+        """
+        Добавляет в маппинг существующего индекса новые поля и подполя (fields), True если маппинг изменился
+        """
+        index_name = index['index']
+        mapping = await es.indices.get_mapping(index=index_name)
+        existing = mapping[index_name]['mappings'].get('properties', {})
+        missing = {
+            field: properties
+            for field, properties in index['body']['mappings']['properties'].items()
+            if field not in existing
+            or not set(properties.get('fields', {})) <= set(existing[field].get('fields', {}))
+        }
+        if not missing:
+            return False
+        await es.indices.put_mapping(index=index_name, body={'properties': missing})
+        return True
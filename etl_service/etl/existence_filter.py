@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import logging
+import math
+import struct
+from typing import Iterable, Optional
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_scan
+from redis import Redis, RedisError
+
+from etl.settings import settings
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+logger.setLevel(logging.INFO)
+
+HEADER = struct.Struct('>IB')
+
+
+class BloomFilter:
+    """
+    Фильтр Блума по идентификаторам документов индекса.
+    Формат хеширования и сериализации должен совпадать с fastapi_solution/src/app/existence_filter.py,
+    т.к. фильтр строится здесь, а проверяется в API.
+    """
+
+    def __init__(self, size: int, hash_count: int, bits: Optional[bytearray] = None):
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> 'BloomFilter':
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hash_count = max(round(size / capacity * math.log(2)), 1)
+        return cls(size=size, hash_count=hash_count)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack('>QQ', digest)
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def to_string(self) -> str:
+        return base64.b64encode(HEADER.pack(self.size, self.hash_count) + bytes(self.bits)).decode()
+
+    @classmethod
+    def from_string(cls, data: str) -> 'BloomFilter':
+        raw = base64.b64decode(data)
+        size, hash_count = HEADER.unpack_from(raw)
+        return cls(size=size, hash_count=hash_count, bits=bytearray(raw[HEADER.size:]))
+
+
+def get_existence_filter_key(index: str) -> str:
+    return f'existence_filter:{index}'
+
+
+async def build_existence_filter(es: AsyncElasticsearch, index: str) -> BloomFilter:
+    """Строит фильтр по идентификаторам всех документов индекса"""
+    count = (await es.count(index=index))['count']
+    existence_filter = BloomFilter.for_capacity(
+        capacity=int(count * settings.EXISTENCE_FILTER_CAPACITY_FACTOR),
+        error_rate=settings.EXISTENCE_FILTER_ERROR_RATE,
+    )
+    async for hit in async_scan(es, index=index, query={'_source': False}):
+        existence_filter.add(hit['_id'])
+    return existence_filter
+
+
+def existence_filter_exists(db: Redis, index: str) -> bool:
+    """Опубликован ли фильтр индекса. При ошибке Redis считается, что нет, и фильтр перестраивается"""
+    try:
+        return bool(db.exists(get_existence_filter_key(index)))
+    except RedisError:
+        return False
+
+
+def publish_existence_filter(db: Redis, index: str, existence_filter: BloomFilter) -> None:
+    try:
+        db.set(get_existence_filter_key(index), existence_filter.to_string())
+    except RedisError:
+        # без фильтра API просто опрашивает ES по любым ключам
+        logger.exception('Cannot publish existence filter for %s', index)
@@ -0,0 +1,74 @@
+import json
+import logging
+from typing import List
+
+from redis import Redis, RedisError
+
+from etl.settings import settings
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+logger.setLevel(logging.INFO)
+
+
+class CacheInvalidationNotifier:
+    """
+    Публикует в Redis идентификаторы документов, успешно записанных в индекс,
+    чтобы API сбросил закэшированные данные по ним
+    """
+
+    def __init__(self, db: Redis, channel: str = settings.CACHE_INVALIDATION_CHANNEL):
+        self.db = db
+        self.channel = channel
+
+    @staticmethod
+    def get_indexed_ids(bulk_response: dict) -> List[str]:
+        """Идентификаторы документов, успешно записанных bulk запросом"""
+        ids = []
+        for item in bulk_response['items']:
+            result = next(iter(item.values()))
+            if 'error' not in result:
+                ids.append(result['_id'])
+        return ids
+
+    @staticmethod
+    def has_created(bulk_response: dict) -> bool:
+        """
+        True, если bulk запрос создал новые документы. Новые документы не входят ни в одно множество ссылок
+        закэшированных списков, поэтому списки, поиск и главная страница сбрасываются только сменой версии
+        """
+        return any(next(iter(item.values())).get('result') == 'created' for item in bulk_response['items'])
+
+    def publish(self, index: str, ids: List[str]) -> None:
+        if not ids:
+            return
+        try:
+            self.db.publish(self.channel, json.dumps({'index': index, 'ids': ids}))
+        except RedisError:
+            # кэш API всё равно истечёт по TTL, поэтому ошибка не должна останавливать перенос данных
+            logger.exception('Cannot publish cache invalidation for %s', index)
+
+    def bump_version(self, index: str) -> None:
+        """
+        Сбрасывает весь кэш индекса в API сменой версии его ключей: после полной переиндексации
+        это дешевле, чем публиковать идентификаторы всех документов, а после создания новых документов
+        иначе не сбросить списки, в которые они должны попасть
+        """
+        version_key = f'cache_version:{index}'
+        try:
+            pipeline = self.db.pipeline(transaction=True)
+            pipeline.set(version_key, 1, nx=True)
+            pipeline.incr(version_key)
+            _, version = pipeline.execute()
+            self.db.publish(self.channel, json.dumps({'index': index, 'version': version}))
+        except RedisError:
+            logger.exception('Cannot bump cache version for %s', index)
+
+    def etl_finished(self, indexes: List[str]) -> None:
+        """Сообщает API о завершении переноса данных, чтобы он прогрел кэш изменившихся индексов"""
+        if not indexes:
+            return
+        try:
+            self.db.publish(self.channel, json.dumps({'event': 'etl_finished', 'indexes': indexes}))
+        except RedisError:
+            logger.exception('Cannot publish ETL completion')
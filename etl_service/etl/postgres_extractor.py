@@ -2,6 +2,8 @@ from psycopg2.extras import NamedTupleCursor
 
 from etl.helpers import get_postgres_connection
 
+DEFAULT_LAST_MODIFIED = '2000-01-01 00:00:01.271835 +00:00'
+
 
 class PostgresExtractor:
     """
@@ -16,7 +18,7 @@ class PostgresExtractor:
 
     async def get_data(
             self,
-            last_modified: str = '2000-01-01 00:00:01.271835 +00:00',
+            last_modified: str = DEFAULT_LAST_MODIFIED,
     ):
         """
             Генератор (дабы не выгружать весь результат запроса в БД в память)
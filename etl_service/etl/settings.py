@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     REDIS_HOST: str = 'localhost'
     REDIS_PORT: int = 6379
+    CACHE_INVALIDATION_CHANNEL: str = 'cache_invalidation'
+    EXISTENCE_FILTER_ERROR_RATE: float = 0.01
+    # запас ёмкости фильтра под документы, которые API добавит в него до следующей перестройки
+    EXISTENCE_FILTER_CAPACITY_FACTOR: float = 1.2
 
 
 settings = Settings()
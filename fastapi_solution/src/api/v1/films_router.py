@@ -1,4 +1,6 @@
+import asyncio
 from http import HTTPStatus
+from typing import Union
 
 from aioredis import Redis
 from elasticsearch import AsyncElasticsearch
@@ -6,14 +8,24 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.connections.elastic import get_es_connection
 from app.connections.redis import get_redis
+from app.core.config import settings
 from app.dependencies import AllowedUser
-from app.serializers.query_params_classes import PaginationDataParams
-from models.film import Film, FilmDetailed
+from app.enums import FilmFacet
+from app.responses import NO_STORE_HEADERS, RawJSONResponse
+from app.serializers.query_params_classes import FilmFilterParams, PaginationDataParams
+from models.film import FacetBucket, Film, FilmDetailed, FilmSearchWithFacets
 from services.films_toolkit import FilmsToolkit
 
 router = APIRouter()
 
 
+def with_facets(films: Union[str, bytes], facets: Union[str, bytes]) -> bytes:
+    """Тело ответа поиска вместе с фасетами: {"items": [...], "facets": {...}}"""
+    films = films.encode() if isinstance(films, str) else films
+    facets = facets.encode() if isinstance(facets, str) else facets
+    return b'{"items":' + films + b',"facets":' + facets + b'}'
+
+
 async def get_films_toolkit(
         redis: Redis = Depends(get_redis),
         elastic: AsyncElasticsearch = Depends(get_es_connection),
@@ -30,38 +42,106 @@ async def get_films_toolkit(
 async def get_all_filmworks(
     film_service: FilmsToolkit = Depends(get_films_toolkit),
     pagination_data: PaginationDataParams = Depends(PaginationDataParams),
-    genre: str = Query(None, description='Filter by genre uuid', alias='filter[genre]'),
+    filters: FilmFilterParams = Depends(FilmFilterParams),
     allowed: bool = Depends(AllowedUser('GUEST'))
-) -> list[Film]:
+) -> RawJSONResponse:
     """Returns all filmworks."""
-    films = await film_service.list(
+    if pagination_data.cursor is not None:
+        films, next_cursor = await film_service.list_by_cursor(pagination_data=pagination_data, filters=filters)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return RawJSONResponse(film_service.serialize_instances(films, Film), headers=headers)
+    films = await film_service.list_serialized(
+        response_model=Film,
         pagination_data=pagination_data,
-        genre=genre
+        filters=filters,
     )
     if not films:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Films not found')
-    return films
+    return RawJSONResponse(films)
 
 
 @router.get(
     '/search',
-    response_model=list[Film],
+    response_model=Union[list[Film], FilmSearchWithFacets],
     summary='Full-text search',
-    description='Returns filmworks according to the search'
+    description='Returns filmworks according to the search. '
+                'If facets are requested, returns {"items": [...], "facets": {...}} instead of a list'
 )
 async def films_search(
     pagination_data: PaginationDataParams = Depends(PaginationDataParams),
     query: str = Query(None, description="Part of the filmwork's data"),
+    filters: FilmFilterParams = Depends(FilmFilterParams),
+    facets: list[FilmFacet] = Query(None, description='Facets to return along with the results'),
     film_service: FilmsToolkit = Depends(get_films_toolkit),
     allowed: bool = Depends(AllowedUser('SUBSCRIBER'))
-) -> list[Film]:
+) -> RawJSONResponse:
     """Returns list of filmworks by the parameter specified in the query."""
     if not allowed:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only subscribers can use these endpoint')
-    films = await film_service.list(
-        pagination_data=pagination_data,
-        query=query
+
+    async def get_facets():
+        return await film_service.facets(facets=facets, query=query, filters=filters) if facets else (None, True)
+
+    if pagination_data.cursor is not None:
+        (films, next_cursor), (facets_body, complete) = await asyncio.gather(
+            film_service.list_by_cursor(pagination_data=pagination_data, query=query, filters=filters),
+            get_facets(),
+        )
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        if not complete:
+            headers.update(NO_STORE_HEADERS)
+        body = film_service.serialize_instances(films, Film)
+        return RawJSONResponse(with_facets(body, facets_body) if facets else body, headers=headers or None)
+    films, (facets_body, complete) = await asyncio.gather(
+        film_service.list_serialized(
+            response_model=Film,
+            pagination_data=pagination_data,
+            query=query,
+            filters=filters,
+        ),
+        get_facets(),
+    )
+    if not films:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Films not found')
+    return RawJSONResponse(
+        with_facets(films, facets_body) if facets else films,
+        headers=None if complete else NO_STORE_HEADERS,
     )
+
+
+@router.get(
+    '/facets',
+    response_model=dict[str, list[FacetBucket]],
+    summary='Search facets',
+    description='Returns genre counts and rating and year histograms of filmworks matching the search',
+)
+async def films_facets(
+    query: str = Query(None, description="Part of the filmwork's data"),
+    filters: FilmFilterParams = Depends(FilmFilterParams),
+    facets: list[FilmFacet] = Query(list(FilmFacet), description='Facets to return'),
+    film_service: FilmsToolkit = Depends(get_films_toolkit),
+    allowed: bool = Depends(AllowedUser('SUBSCRIBER'))
+) -> RawJSONResponse:
+    """Returns facets of filmworks matching the query and filters, full-text query is available to subscribers."""
+    if query and not allowed:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only subscribers can use these endpoint')
+    body, complete = await film_service.facets(facets=facets, query=query, filters=filters)
+    return RawJSONResponse(body, headers=None if complete else NO_STORE_HEADERS)
+
+
+@router.get(
+    '/batch',
+    response_model=list[FilmDetailed],
+    summary='Several films',
+    description='Returns information about movies by the list of their ids',
+)
+async def films_batch(
+    ids: list[str] = Query(..., description='Film ids', max_items=settings.BATCH_MAX_SIZE),
+    film_service: FilmsToolkit = Depends(get_films_toolkit),
+    allowed: bool = Depends(AllowedUser('GUEST'))
+) -> list[FilmDetailed]:
+    """Returns filmworks' detailed descriptions in the order of requested ids."""
+    films = await film_service.get_many(ids)
     if not films:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Films not found')
     return films
@@ -4,11 +4,13 @@ from typing import List
 
 from aioredis import Redis
 from elasticsearch import AsyncElasticsearch
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.connections.elastic import get_es_connection
 from app.connections.redis import get_redis
+from app.core.config import settings
 from app.dependencies import AllowedUser
+from app.responses import RawJSONResponse
 from app.serializers.query_params_classes import PaginationDataParams
 from models.genre import Genre
 from services.genres_toolkit import GenresToolkit
@@ -23,6 +25,18 @@ async def get_genres_toolkit(
     return GenresToolkit(redis=redis, elastic=elastic)
 
 
+@router.get("/batch", response_model=List[Genre])
+async def genres_batch_api(
+    ids: List[uuid.UUID] = Query(..., description='Genre ids', max_items=settings.BATCH_MAX_SIZE),
+    genres_toolkit: GenresToolkit = Depends(get_genres_toolkit),
+    allowed: bool = Depends(AllowedUser('GUEST'))
+) -> List[Genre]:
+    genres = await genres_toolkit.get_many(pks=ids)
+    if not genres:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Genres not found')
+    return genres
+
+
 @router.get("/{genre_uid}", response_model=Genre)
 async def genre_get_api(
     genre_uid: uuid.UUID,
@@ -40,8 +54,12 @@ async def genres_get_list_api(
     pagination_data: PaginationDataParams = Depends(PaginationDataParams),
     genres_toolkit: GenresToolkit = Depends(get_genres_toolkit),
     allowed: bool = Depends(AllowedUser('GUEST'))
-) -> List[Genre]:
-    genres = await genres_toolkit.list(pagination_data=pagination_data)
+) -> RawJSONResponse:
+    if pagination_data.cursor is not None:
+        genres, next_cursor = await genres_toolkit.list_by_cursor(pagination_data=pagination_data)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return RawJSONResponse(genres_toolkit.serialize_instances(genres, Genre), headers=headers)
+    genres = await genres_toolkit.list_serialized(response_model=Genre, pagination_data=pagination_data)
     if not genres:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Genres not found')
-    return genres
+    return RawJSONResponse(genres)
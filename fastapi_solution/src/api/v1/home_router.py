@@ -0,0 +1,38 @@
+from http import HTTPStatus
+from typing import List
+
+from aioredis import Redis
+from elasticsearch import AsyncElasticsearch
+from fastapi import APIRouter, Body, Depends, HTTPException
+
+from app.connections.elastic import get_es_connection
+from app.connections.redis import get_redis
+from app.core.config import settings
+from app.dependencies import AllowedUser
+from app.responses import RawJSONResponse
+from models.home import HomeSection
+from services.home_toolkit import HomeToolkit
+
+router = APIRouter()
+
+
+async def get_home_toolkit(
+        redis: Redis = Depends(get_redis),
+        elastic: AsyncElasticsearch = Depends(get_es_connection),
+) -> HomeToolkit:
+    return HomeToolkit(redis=redis, elastic=elastic)
+
+
+@router.post(
+    '/',
+    summary='Home page',
+    description='Returns several lists of filmworks and genres in one response, keyed by section name'
+)
+async def home_api(
+    sections: List[HomeSection] = Body(..., min_items=1, max_items=settings.HOME_MAX_SECTIONS),
+    home_toolkit: HomeToolkit = Depends(get_home_toolkit),
+    allowed: bool = Depends(AllowedUser('GUEST'))
+) -> RawJSONResponse:
+    if len({section.name for section in sections}) != len(sections):
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Section names must be unique')
+    return RawJSONResponse(await home_toolkit.get_sections(sections))
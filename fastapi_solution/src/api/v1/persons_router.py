@@ -9,7 +9,9 @@ from fastapi.params import Query
 
 from app.connections.elastic import get_es_connection
 from app.connections.redis import get_redis
+from app.core.config import settings
 from app.dependencies import AllowedUser
+from app.responses import RawJSONResponse
 from app.serializers.query_params_classes import PaginationDataParams
 from models.film import Film
 from models.person import Person
@@ -31,10 +33,30 @@ async def get_filtered_persons(
     person_toolkit: PersonsToolkit = Depends(get_persons_toolkit),
     query: str = Query(None, description="Part of the person's data"),
     allowed: bool = Depends(AllowedUser('SUBSCRIBER'))
-) -> List[Person]:
+) -> RawJSONResponse:
     if not allowed:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only subscribers can use these endpoint')
-    persons = await person_toolkit.list(pagination_data=pagination_data, query=query)
+    if pagination_data.cursor is not None:
+        persons, next_cursor = await person_toolkit.list_by_cursor(pagination_data=pagination_data, query=query)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return RawJSONResponse(person_toolkit.serialize_instances(persons, Person), headers=headers)
+    persons = await person_toolkit.list_serialized(
+        response_model=Person,
+        pagination_data=pagination_data,
+        query=query,
+    )
+    if not persons:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Persons not found')
+    return RawJSONResponse(persons)
+
+
+@router.get("/batch", response_model=List[Person])
+async def persons_batch_api(
+    ids: List[uuid.UUID] = Query(..., description='Person ids', max_items=settings.BATCH_MAX_SIZE),
+    person_toolkit: PersonsToolkit = Depends(get_persons_toolkit),
+    allowed: bool = Depends(AllowedUser('GUEST'))
+) -> List[Person]:
+    persons = await person_toolkit.get_many(pks=ids)
     if not persons:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Persons not found')
     return persons
@@ -57,11 +79,15 @@ async def persons_get_list_api(
     pagination_data: PaginationDataParams = Depends(PaginationDataParams),
     person_toolkit: PersonsToolkit = Depends(get_persons_toolkit),
     allowed: bool = Depends(AllowedUser('GUEST'))
-) -> List[Person]:
-    persons = await person_toolkit.list(pagination_data=pagination_data)
+) -> RawJSONResponse:
+    if pagination_data.cursor is not None:
+        persons, next_cursor = await person_toolkit.list_by_cursor(pagination_data=pagination_data)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return RawJSONResponse(person_toolkit.serialize_instances(persons, Person), headers=headers)
+    persons = await person_toolkit.list_serialized(response_model=Person, pagination_data=pagination_data)
     if not persons:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Persons not found')
-    return persons
+    return RawJSONResponse(persons)
 
 
 @router.get("/{person_uid}/film", response_model=List[Film])
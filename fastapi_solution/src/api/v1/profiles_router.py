@@ -0,0 +1,26 @@
+from http import HTTPStatus
+
+from aioredis import Redis
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import HTMLResponse
+
+from app.connections.redis import get_redis
+from app.dependencies import AllowedUser
+from app.enums import UserRoles
+from app.middlewares import get_profile_key
+
+router = APIRouter()
+
+
+@router.get("/{profile_id}", response_class=HTMLResponse)
+async def profile_get_api(
+    profile_id: str,
+    redis: Redis = Depends(get_redis),
+    allowed: bool = Depends(AllowedUser(UserRoles.ADMIN.value)),
+) -> HTMLResponse:
+    if not allowed:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only admins can use these endpoint')
+    profile = await redis.get(get_profile_key(profile_id))
+    if profile is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Profile not found')
+    return HTMLResponse(profile)
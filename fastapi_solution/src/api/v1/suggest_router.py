@@ -0,0 +1,34 @@
+from elasticsearch import AsyncElasticsearch
+from fastapi import APIRouter, Depends, Query
+
+from app.connections.elastic import get_es_connection
+from app.core.config import settings
+from app.dependencies import AllowedUser
+from app.responses import NO_STORE_HEADERS, RawJSONResponse
+from models.suggest import Suggestions
+from services.suggest_toolkit import SuggestToolkit
+
+router = APIRouter()
+
+
+async def get_suggest_toolkit(
+        elastic: AsyncElasticsearch = Depends(get_es_connection),
+) -> SuggestToolkit:
+    return SuggestToolkit(elastic=elastic)
+
+
+@router.get(
+    '/',
+    response_model=Suggestions,
+    summary='Autocomplete',
+    description='Returns ids and titles of filmworks and ids and names of persons starting with the typed text'
+)
+async def suggest_api(
+    query: str = Query(..., description='Typed text', min_length=1, max_length=settings.SUGGEST_MAX_QUERY_LENGTH),
+    size: int = Query(settings.SUGGEST_DEFAULT_SIZE, description='Number of suggestions of each kind',
+                      ge=1, le=settings.SUGGEST_MAX_SIZE),
+    suggest_toolkit: SuggestToolkit = Depends(get_suggest_toolkit),
+    allowed: bool = Depends(AllowedUser('GUEST'))
+) -> RawJSONResponse:
+    body, complete = await suggest_toolkit.suggest(query=query, size=size)
+    return RawJSONResponse(body, headers=None if complete else NO_STORE_HEADERS)
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import logging
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Union
+
+from app.core.config import settings
+from app.metrics import CACHE_CODEC_DURATION, CACHE_COMPRESSION_RATIO, CACHE_PAYLOAD_BYTES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DECODE_ERRORS = (binascii.Error, zlib.error, ValueError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class Codec(ABC):
+    """
+    Алгоритм сжатия записей кэша. Сжатая запись начинается с символа header,
+    с которого не может начинаться JSON, поэтому старые несжатые записи читаются как раньше
+    """
+    name: str
+    header: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        pass
+
+
+class ZlibCodec(Codec):
+    name = 'zlib'
+    header = '\x01'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(Codec):
+    """zstd, при наличии словаря, обученного на документах индекса, хорошо сжимает и небольшие записи"""
+    name = 'zstd'
+    header = '\x02'
+
+    def __init__(self, level: int = 3, dictionary: Optional[bytes] = None):
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        if dict_data is not None:
+            # записи, сжатые со словарём, нельзя прочитать без него, поэтому у них свой заголовок
+            self.name, self.header = 'zstd_dict', '\x03'
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class CacheCodec:
+    """
+    Кодирует записи кэша перед записью в Redis и декодирует после чтения.
+    Сжимаются только записи не меньше threshold байт и только если это уменьшает их размер.
+    Клиент Redis работает со строками (decode_responses), поэтому сжатые данные хранятся в base64.
+    Декодируются записи любого из decoders, что позволяет менять алгоритм без сброса кэша
+    """
+
+    def __init__(self, codec: Optional[Codec], threshold: int, decoders: Iterable[Codec] = ()):
+        self.codec = codec
+        self.threshold = threshold
+        self.decoders: Dict[str, Codec] = {decoder.header: decoder for decoder in decoders}
+        if codec is not None:
+            self.decoders[codec.header] = codec
+
+    def encode(self, data: Union[str, bytes]) -> Union[str, bytes]:
+        if self.codec is None or len(data) < self.threshold:
+            return data
+        raw = data.encode() if isinstance(data, str) else data
+        started = time.perf_counter()
+        compressed = self.codec.compress(raw)
+        CACHE_CODEC_DURATION.labels(self.codec.name, 'encode').observe(time.perf_counter() - started)
+        encoded = self.codec.header + base64.b64encode(compressed).decode()
+        if len(encoded) >= len(raw):
+            return data
+        CACHE_COMPRESSION_RATIO.labels(self.codec.name).observe(len(raw) / len(encoded))
+        CACHE_PAYLOAD_BYTES.labels(self.codec.name, 'raw').inc(len(raw))
+        CACHE_PAYLOAD_BYTES.labels(self.codec.name, 'stored').inc(len(encoded))
+        return encoded
+
+    def decode(self, value: Optional[Union[str, bytes]]) -> Optional[Union[str, bytes]]:
+        """Исходные данные записи, None, если запись не удалось распаковать (например, другим словарём)"""
+        if not value or isinstance(value, bytes) or value[0] >= ' ':
+            return value
+        decoder = self.decoders.get(value[0])
+        if decoder is None:
+            # заголовки - управляющие символы, если алгоритм записи здесь недоступен, она считается промахом
+            logger.warning('Unknown cache entry codec %r', value[0])
+            return None
+        started = time.perf_counter()
+        try:
+            data = decoder.decompress(base64.b64decode(value[1:]))
+        except DECODE_ERRORS as e:
+            logger.warning('Cannot decode %s cache entry: %s', decoder.name, e)
+            return None
+        CACHE_CODEC_DURATION.labels(decoder.name, 'decode').observe(time.perf_counter() - started)
+        return data
+
+
+def load_zstd_dictionary() -> Optional[bytes]:
+    if not settings.CACHE_ZSTD_DICT_PATH:
+        return None
+    with open(settings.CACHE_ZSTD_DICT_PATH, 'rb') as f:
+        return f.read()
+
+
+def create_cache_codec() -> CacheCodec:
+    decoders = [ZlibCodec()]
+    if zstandard is not None:
+        decoders.append(ZstdCodec(level=settings.CACHE_ZSTD_LEVEL))
+    codec = None
+    if settings.CACHE_CODEC == 'zlib':
+        codec = ZlibCodec()
+    elif settings.CACHE_CODEC == 'zstd':
+        if zstandard is None:
+            logger.warning('zstandard is not installed, cache entries are compressed with zlib')
+            codec = ZlibCodec()
+        else:
+            codec = ZstdCodec(level=settings.CACHE_ZSTD_LEVEL, dictionary=load_zstd_dictionary())
+    return CacheCodec(codec=codec, threshold=settings.CACHE_COMPRESSION_THRESHOLD, decoders=decoders)
+
+
+cache_codec: Optional[CacheCodec] = None
+
+
+def get_cache_codec() -> CacheCodec:
+    global cache_codec
+    if cache_codec is None:
+        cache_codec = create_cache_codec()
+    return cache_codec
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable, List, Optional, Union
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+from app import cache_keys
+from app.core.config import settings
+from app.existence_filter import add_to_existence_filter
+from app.local_cache import get_local_cache
+
+logger = logging.getLogger(__name__)
+
+listener_task: Optional[asyncio.Task] = None
+
+
+def get_references_key(pk: Union[str, uuid.UUID]) -> str:
+    """Ключ множества закэшированных списков, в которые входит сущность"""
+    return f'refs:{pk}'
+
+
+class CacheInvalidator:
+    """
+    Сбрасывает закэшированные сущности и все списки, в которые они входят,
+    либо весь кэш пространства имён при смене его версии.
+    О завершении переноса данных сообщает on_etl_finished, передавая изменившиеся индексы
+    """
+
+    def __init__(self, redis: Redis, on_etl_finished: Optional[Callable[[List[str]], None]] = None):
+        self.redis = redis
+        self.on_etl_finished = on_etl_finished
+
+    async def invalidate(self, namespace: str, ids: List[str]) -> None:
+        if not ids:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        for pk in ids:
+            pipeline.smembers(get_references_key(pk))
+        list_keys = set()
+        for members in await pipeline.execute():
+            list_keys.update(members)
+        references_keys = [get_references_key(pk) for pk in ids]
+        item_keys = [cache_keys.item_key(namespace, pk) for pk in ids]
+        await self.redis.delete(*item_keys, *references_keys, *list_keys)
+        # in-process кэш живёт недолго, поэтому он сбрасывается для сущности целиком:
+        # другой воркер мог уже удалить множества ссылок, и списки в нём по ним не найти
+        get_local_cache(namespace).clear()
+        # новые документы должны стать видны до того, как ETL перестроит фильтр
+        add_to_existence_filter(namespace, ids)
+        logger.debug('Invalidated %d %s and %d lists', len(ids), namespace, len(list_keys))
+
+    @staticmethod
+    def change_version(namespace: str, version: int) -> None:
+        """Переключается на новую версию ключей пространства имён, старые ключи больше не читаются"""
+        if cache_keys.set_namespace_version(namespace, version):
+            get_local_cache(namespace).clear()
+            logger.debug('Switched %s cache to version %d', namespace, version)
+
+    async def handle_message(self, data: Union[str, bytes]) -> None:
+        message = orjson.loads(data)
+        if message.get('event') == 'etl_finished':
+            if self.on_etl_finished is not None:
+                self.on_etl_finished(message['indexes'])
+        elif 'version' in message:
+            self.change_version(namespace=message['index'], version=int(message['version']))
+        else:
+            await self.invalidate(namespace=message['index'], ids=message['ids'])
+
+
+async def listen(redis: Redis, on_etl_finished: Optional[Callable[[List[str]], None]] = None) -> None:
+    """Слушает канал инвалидации, в который ETL публикует идентификаторы изменённых документов"""
+    invalidator = CacheInvalidator(redis=redis, on_etl_finished=on_etl_finished)
+    while True:
+        try:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                try:
+                    await invalidator.handle_message(message['data'])
+                except (ValueError, KeyError):
+                    logger.exception('Malformed cache invalidation message')
+        except asyncio.CancelledError:
+            raise
+        except RedisError:
+            logger.exception('Cache invalidation listener lost connection, resubscribing')
+            await asyncio.sleep(settings.CACHE_INVALIDATION_RETRY_DELAY)
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import Dict, Iterable, Optional, Union
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+from app.core.config import settings
+from app.query_builder import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# версия пространства имён, для которого она ещё не поднималась
+INITIAL_VERSION = 1
+
+namespace_versions: Dict[str, int] = {}
+refresh_task: Optional[asyncio.Task] = None
+
+
+def get_version_key(namespace: str) -> str:
+    """Ключ Redis с текущей версией ключей кэша пространства имён"""
+    return f'cache_version:{namespace}'
+
+
+def get_namespace_version(namespace: str) -> int:
+    return namespace_versions.get(namespace, INITIAL_VERSION)
+
+
+def set_namespace_version(namespace: str, version: int) -> bool:
+    """Запоминает версию пространства имён, True если она изменилась. Версия никогда не уменьшается"""
+    if version <= get_namespace_version(namespace):
+        return False
+    namespace_versions[namespace] = version
+    return True
+
+
+def normalize_params(params: dict) -> dict:
+    """
+    Параметры запроса в каноническом виде: поисковая строка нормализуется,
+    незаданные параметры (None и пустые строки) отбрасываются
+    """
+    normalized = {}
+    for name, value in params.items():
+        if name == 'query':
+            value = normalize_query(value)
+        if value is None or value == '':
+            continue
+        normalized[name] = value
+    return normalized
+
+
+def params_digest(params: dict) -> str:
+    """Короткий стабильный хеш нормализованных параметров"""
+    data = orjson.dumps(normalize_params(params), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(data, digest_size=settings.CACHE_KEY_DIGEST_SIZE).hexdigest()
+
+
+def build_key(namespace: str, kind: str, suffix: Union[str, uuid.UUID]) -> str:
+    """Ключ вида <пространство имён>:v<версия>:<вид данных>:<суффикс>, например movies:v3:list:<хеш>"""
+    return f'{namespace}:v{get_namespace_version(namespace)}:{kind}:{suffix}'
+
+
+def item_key(namespace: str, pk: Union[str, uuid.UUID]) -> str:
+    return build_key(namespace, 'item', pk)
+
+
+def params_key(namespace: str, kind: str, params: dict) -> str:
+    return build_key(namespace, kind, params_digest(params))
+
+
+async def bump_namespace_version(redis: Redis, namespace: str) -> int:
+    """
+    Сбрасывает весь кэш пространства имён за O(1): после смены версии старые ключи
+    больше не читаются и истекают сами. Остальные воркеры узнают о новой версии из канала инвалидации
+    """
+    pipeline = redis.pipeline(transaction=True)
+    pipeline.set(get_version_key(namespace), INITIAL_VERSION, nx=True)
+    pipeline.incr(get_version_key(namespace))
+    _, version = await pipeline.execute()
+    set_namespace_version(namespace, version)
+    await redis.publish(
+        settings.CACHE_INVALIDATION_CHANNEL,
+        orjson.dumps({'index': namespace, 'version': version}),
+    )
+    return version
+
+
+async def load_namespace_versions(redis: Redis, namespaces: Iterable[str]) -> None:
+    namespaces = list(namespaces)
+    for namespace, version in zip(namespaces, await redis.mget([get_version_key(ns) for ns in namespaces])):
+        if version is not None:
+            set_namespace_version(namespace, int(version))
+
+
+async def refresh_namespace_versions(redis: Redis, namespaces: Iterable[str]) -> None:
+    """
+    Периодически перечитывает версии пространств имён на случай,
+    если сообщение о смене версии было пропущено при переподключении к каналу инвалидации
+    """
+    namespaces = list(namespaces)
+    while True:
+        try:
+            await load_namespace_versions(redis, namespaces)
+        except (RedisError, ValueError):
+            logger.exception('Cannot load cache namespace versions')
+        await asyncio.sleep(settings.CACHE_VERSION_REFRESH_INTERVAL)
@@ -0,0 +1,133 @@
+import logging
+import time
+from enum import IntEnum
+from typing import Dict
+
+from app.core.config import settings
+from app.metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Предохранитель запросов к зависимости (Redis, Elasticsearch).
+    Запрос считается неудачным, если он завершился ошибкой или длился дольше slow_call_duration.
+    Если за окно window из не менее чем min_calls запросов доля неудачных достигла failure_ratio,
+    предохранитель размыкается и open_duration секунд запросы к зависимости не выполняются.
+    Затем пропускаются half_open_calls пробных запросов: если все они удачны, предохранитель замыкается,
+    иначе снова размыкается
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_ratio: float,
+        slow_call_duration: float,
+        min_calls: int,
+        window: float,
+        open_duration: float,
+        half_open_calls: int,
+    ):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.slow_call_duration = slow_call_duration
+        self.min_calls = min_calls
+        self.window = window
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._window_start = time.monotonic()
+        self._calls = 0
+        self._failures = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self._rejected_metric = CIRCUIT_BREAKER_REJECTED.labels(name)
+        CIRCUIT_BREAKER_STATE.labels(name).set(self.state)
+
+    @property
+    def retry_after(self) -> float:
+        """Через сколько секунд предохранитель пропустит пробный запрос"""
+        if self.state != CircuitState.OPEN:
+            return 0
+        return max(0.0, self._opened_at + self.open_duration - time.monotonic())
+
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if self.retry_after > 0:
+                self._rejected_metric.inc()
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self._rejected_metric.inc()
+                return False
+            self._probes += 1
+        return True
+
+    def record(self, duration: float, success: bool = True) -> None:
+        failed = not success or duration > self.slow_call_duration
+        if self.state == CircuitState.HALF_OPEN:
+            if failed:
+                self._transition(CircuitState.OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+        if self.state == CircuitState.OPEN:
+            # ответ на запрос, начатый до размыкания
+            return
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._calls = 0
+            self._failures = 0
+        self._calls += 1
+        self._failures += failed
+        if self._calls >= self.min_calls and self._failures >= self.failure_ratio * self._calls:
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            logger.warning('Circuit breaker %s opened for %s seconds', self.name, self.open_duration)
+        elif state == CircuitState.CLOSED:
+            logger.info('Circuit breaker %s closed', self.name)
+        self.state = state
+        self._window_start = time.monotonic()
+        self._calls = 0
+        self._failures = 0
+        self._probes = 0
+        self._probe_successes = 0
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(state)
+        CIRCUIT_BREAKER_TRANSITIONS.labels(self.name, state.name.lower()).inc()
+
+
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in circuit_breakers:
+        circuit_breakers[name] = CircuitBreaker(
+            name=name,
+            failure_ratio=settings.CIRCUIT_BREAKER_FAILURE_RATIO,
+            slow_call_duration=settings.CIRCUIT_BREAKER_SLOW_CALL_DURATION[name],
+            min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+            window=settings.CIRCUIT_BREAKER_WINDOW,
+            open_duration=settings.CIRCUIT_BREAKER_OPEN_DURATION,
+            half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        )
+    return circuit_breakers[name]
+
+
+def is_open(name: str) -> bool:
+    """True, если запросы к зависимости сейчас не выполняются"""
+    return get_circuit_breaker(name).retry_after > 0
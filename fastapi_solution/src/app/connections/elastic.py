@@ -1,10 +1,210 @@
-from typing import Optional
+import asyncio
+import hashlib
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional
 
-from elasticsearch import AsyncElasticsearch
+import orjson
+from elasticsearch import (
+    AIOHttpConnection,
+    AsyncElasticsearch,
+    AsyncTransport,
+    ConnectionError,
+    NotFoundError,
+    TransportError,
+)
+from elasticsearch.connection_pool import ConnectionSelector
+
+from app import server_timing
+from app.circuit_breaker import get_circuit_breaker
+from app.connections.http_client import RetryBudget
+from app.core.config import settings
+from app.load_shedding import backend_latency
+from app.metrics import BACKEND_ERRORS, BACKEND_LATENCY, ES_HEDGED_REQUESTS
+
+# операции только на чтение, которые можно продублировать на другой узел
+HEDGE_OPERATIONS = {'search', 'msearch', 'mget', 'count'}
+# вес нового замера в сглаженной длительности запросов к узлу
+NODE_LATENCY_ALPHA = 0.2
 
 es: Optional[AsyncElasticsearch] = None
 
 
+class CircuitOpenError(ConnectionError):
+    """Запрос к ES не выполнялся: предохранитель разомкнут"""
+
+    def __init__(self, retry_after: float):
+        super().__init__('N/A', 'Elasticsearch circuit breaker is open', None)
+        self.retry_after = retry_after
+
+
+def is_failure(error: BaseException) -> bool:
+    """Ошибка говорит о проблемах ES, а не о некорректном запросе"""
+    if not isinstance(error, TransportError) or isinstance(error, ConnectionError):
+        return True
+    return isinstance(error.status_code, int) and (error.status_code >= 500 or error.status_code == 429)
+
+
+class LatencyAwareConnection(AIOHttpConnection):
+    """Соединение с узлом ES, запоминающее сглаженную длительность запросов к нему и их текущее количество"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latency: Optional[float] = None
+        self.in_flight = 0
+
+    @property
+    def score(self) -> float:
+        """Чем меньше, тем быстрее узел ответит на новый запрос. Узлы без замеров пробуются в первую очередь"""
+        return (self.latency or 0) * (1 + self.in_flight)
+
+    async def perform_request(self, *args, **kwargs):
+        self.in_flight += 1
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await super().perform_request(*args, **kwargs)
+        except Exception as e:
+            failed = is_failure(e)
+            raise
+        finally:
+            self.in_flight -= 1
+            duration = time.perf_counter() - start
+            if failed:
+                # отказавший узел должен выглядеть медленным, пока не ответит успешно
+                duration = max(duration, settings.ES_REQUEST_TIMEOUT)
+            if self.latency is None:
+                self.latency = duration
+            else:
+                self.latency += NODE_LATENCY_ALPHA * (duration - self.latency)
+
+
+class LatencyAwareSelector(ConnectionSelector):
+    """
+    Выбирает из двух случайных живых узлов тот, что быстрее отвечал и меньше загружен.
+    Узлы, не отвечающие вовсе, пул соединений сам исключает на время dead_timeout
+    """
+
+    def select(self, connections):
+        if len(connections) == 1:
+            return connections[0]
+        return min(random.sample(connections, 2), key=lambda connection: connection.score)
+
+
+class InstrumentedTransport(AsyncTransport):
+    """
+    Транспорт, записывающий длительность и ошибки всех запросов к ES в метрики.
+    Запросы проходят через предохранитель: пока он разомкнут, они сразу завершаются CircuitOpenError.
+    Поиску передаётся preference по хешу запроса, чтобы одинаковые запросы шли на одни и те же копии шардов
+    и попадали в их кэш. Если узлов несколько, запрос на чтение, не получивший ответа за p95 длительности
+    таких запросов, дублируется на другой узел (hedged request) и возвращается первый из ответов
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=settings.ES_HEDGE_WINDOW))
+        self._hedge_budget = RetryBudget(
+            ratio=settings.ES_HEDGE_BUDGET_RATIO,
+            min_retries=settings.ES_HEDGE_BUDGET_MIN,
+            window=settings.ES_HEDGE_BUDGET_WINDOW,
+        )
+
+    async def perform_request(self, method, url, headers=None, params=None, body=None):
+        # операция - первый служебный сегмент пути: _search, _doc, _mget, _pit...
+        operation = next((part[1:] for part in url.split('/') if part.startswith('_')), method.lower())
+        breaker = get_circuit_breaker('elasticsearch') if settings.CIRCUIT_BREAKER_ENABLED else None
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(retry_after=breaker.retry_after)
+        if operation == 'search' and settings.ES_PREFERENCE_ROUTING_ENABLED:
+            params = self._with_preference(params, body)
+        failed = False
+        start = time.perf_counter()
+        try:
+            if self._can_hedge(method, operation):
+                return await self._perform_hedged(operation, method, url, headers, params, body)
+            return await super().perform_request(method, url, headers=headers, params=params, body=body)
+        except NotFoundError:
+            raise
+        except Exception as e:
+            failed = is_failure(e)
+            BACKEND_ERRORS.labels('elasticsearch', operation).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            BACKEND_LATENCY.labels('elasticsearch', operation).observe(duration)
+            server_timing.record('es', duration)
+            backend_latency.observe('elasticsearch', duration)
+            if breaker is not None:
+                breaker.record(duration, success=not failed)
+            if not failed:
+                self._latencies[operation].append(duration)
+
+    @staticmethod
+    def _with_preference(params: Optional[dict], body) -> Optional[dict]:
+        if not isinstance(body, dict) or 'pit' in body or (params and 'preference' in params):
+            return params
+        digest = hashlib.blake2b(orjson.dumps(body, option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+        return {**(params or {}), 'preference': digest}
+
+    def _can_hedge(self, method: str, operation: str) -> bool:
+        if not settings.ES_HEDGING_ENABLED or len(self.connection_pool.connections) < 2:
+            return False
+        return method in ('GET', 'HEAD') or operation in HEDGE_OPERATIONS
+
+    def _hedge_delay(self, operation: str) -> Optional[float]:
+        """p95 длительности последних запросов операции, None, пока замеров слишком мало"""
+        latencies = self._latencies[operation]
+        if len(latencies) < settings.ES_HEDGE_MIN_SAMPLES:
+            return None
+        p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+        return max(settings.ES_HEDGE_MIN_DELAY, p95)
+
+    async def _perform_hedged(self, operation, method, url, headers, params, body):
+        self._hedge_budget.record_request()
+        delay = self._hedge_delay(operation)
+        if delay is None:
+            return await super().perform_request(method, url, headers=headers, params=params, body=body)
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(
+            super().perform_request(method, url, headers=headers, params=params, body=body)
+        )]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._hedge_budget.can_retry():
+                return await tasks[0]
+            # селектор выберет узел с меньшей нагрузкой, а узел первого запроса уже занят им
+            tasks.append(asyncio.ensure_future(
+                super().perform_request(method, url, headers=headers, params=params, body=body)
+            ))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 404 и ошибки запроса - такой же окончательный ответ, как и успешный
+                answered = [task for task in done if task.exception() is None or not is_failure(task.exception())]
+                if answered or not pending:
+                    task = answered[0] if answered else done.pop()
+                    ES_HEDGED_REQUESTS.labels(operation, 'hedge' if task is tasks[1] else 'primary').inc()
+                    return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def get_hosts() -> List[str]:
+    """Узлы кластера из ELASTIC_HOSTS, для одного узла достаточно ELASTIC_HOST и ELASTIC_PORT"""
+    return settings.ELASTIC_HOSTS or [f'{settings.ELASTIC_HOST}:{settings.ELASTIC_PORT}']
+
+
+def create_elasticsearch() -> AsyncElasticsearch:
+    return AsyncElasticsearch(
+        hosts=get_hosts(),
+        transport_class=InstrumentedTransport,
+        connection_class=LatencyAwareConnection,
+        selector_class=LatencyAwareSelector,
+        timeout=settings.ES_REQUEST_TIMEOUT,
+    )
+
+
 async def get_es_connection():
     """Функция для установления соединения с es"""
     return es
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from http import HTTPStatus
+from typing import Any, Optional
+
+import aiohttp
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.metrics import (
+    HTTP_CLIENT_IN_PROGRESS,
+    HTTP_CLIENT_LATENCY,
+    HTTP_CLIENT_POOL_SIZE,
+    HTTP_CLIENT_RETRIES,
+    HTTP_CLIENT_RETRIES_EXHAUSTED,
+)
+
+# идемпотентные запросы, которые можно безопасно повторить
+RETRY_METHODS = {'GET', 'HEAD'}
+RETRY_STATUSES = {HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT}
+
+http_client: Optional['HTTPClient'] = None
+
+
+class HTTPStatusError(aiohttp.ClientError):
+    def __init__(self, status: int, body: Any):
+        super().__init__(f'Unexpected response status {status}')
+        self.status = status
+        self.body = body
+
+
+class HTTPResponse(BaseModel):
+    body: Any
+    headers: dict
+    status: int
+
+    def raise_for_status(self) -> None:
+        if self.status >= HTTPStatus.BAD_REQUEST:
+            raise HTTPStatusError(status=self.status, body=self.body)
+
+
+class RetryBudget:
+    """
+    Ограничивает количество повторов долей от числа запросов за окно времени,
+    чтобы при отказе сервиса повторы не умножали нагрузку на него
+    """
+
+    def __init__(self, ratio: float, min_retries: int, window: float):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._window_start = time.monotonic()
+        self._requests = 0
+        self._retries = 0
+
+    def _roll(self) -> None:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._requests = 0
+            self._retries = 0
+
+    def record_request(self) -> None:
+        self._roll()
+        self._requests += 1
+
+    def can_retry(self) -> bool:
+        self._roll()
+        if self._retries < self.min_retries + self.ratio * self._requests:
+            self._retries += 1
+            return True
+        return False
+
+
+class HTTPClient:
+    """Долгоживущий HTTP клиент с ограниченным пулем keep-alive соединений, таймаутами и повторами"""
+
+    def __init__(self, session: aiohttp.ClientSession, retry_budget: RetryBudget):
+        self.session = session
+        self.retry_budget = retry_budget
+
+    async def get(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> HTTPResponse:
+        attempts = settings.HTTP_RETRIES + 1 if method in RETRY_METHODS else 1
+        self.retry_budget.record_request()
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self._request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt or not self._can_retry(method):
+                    raise
+            else:
+                if response.status not in RETRY_STATUSES or last_attempt or not self._can_retry(method):
+                    return response
+            HTTP_CLIENT_RETRIES.labels(method).inc()
+            await asyncio.sleep(settings.HTTP_RETRY_BACKOFF * 2 ** attempt)
+
+    def _can_retry(self, method: str) -> bool:
+        if self.retry_budget.can_retry():
+            return True
+        HTTP_CLIENT_RETRIES_EXHAUSTED.labels(method).inc()
+        return False
+
+    async def _request(self, method: str, url: str, **kwargs) -> HTTPResponse:
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            with HTTP_CLIENT_IN_PROGRESS.track_inprogress():
+                async with self.session.request(method, url, **kwargs) as response:
+                    status = str(response.status)
+                    if response.content_type == 'application/json':
+                        body = await response.json()
+                    else:
+                        body = await response.text()
+                    return HTTPResponse(body=body, headers=response.headers, status=response.status)
+        finally:
+            HTTP_CLIENT_LATENCY.labels(method, status).observe(time.perf_counter() - start)
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+def create_http_client() -> HTTPClient:
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_SIZE,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+    )
+    timeout = aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+    HTTP_CLIENT_POOL_SIZE.set(settings.HTTP_POOL_SIZE)
+    return HTTPClient(
+        session=aiohttp.ClientSession(connector=connector, timeout=timeout),
+        retry_budget=RetryBudget(
+            ratio=settings.HTTP_RETRY_BUDGET_RATIO,
+            min_retries=settings.HTTP_RETRY_BUDGET_MIN,
+            window=settings.HTTP_RETRY_BUDGET_WINDOW,
+        ),
+    )
+
+
+async def get_http_client() -> HTTPClient:
+    return http_client
@@ -1,9 +1,81 @@
+import time
 from typing import Optional
 
 from aioredis import Redis
+from aioredis.client import Pipeline
+from aioredis.exceptions import ConnectionError, TimeoutError
+
+from app import server_timing
+from app.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.config import settings
+from app.load_shedding import backend_latency
+from app.metrics import BACKEND_ERRORS, BACKEND_LATENCY
 
 redis: Optional[Redis] = None
 
 
+class CircuitOpenError(ConnectionError):
+    """Команда Redis не выполнялась: предохранитель разомкнут"""
+
+
+def get_breaker() -> Optional[CircuitBreaker]:
+    if not settings.CIRCUIT_BREAKER_ENABLED:
+        return None
+    breaker = get_circuit_breaker('redis')
+    if not breaker.allow_request():
+        raise CircuitOpenError('Redis circuit breaker is open')
+    return breaker
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        breaker = get_breaker()
+        failed = False
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        except Exception as e:
+            # ошибки самих команд (ResponseError) говорят о некорректном запросе, а не о проблемах Redis
+            failed = isinstance(e, (ConnectionError, TimeoutError))
+            BACKEND_ERRORS.labels('redis', 'pipeline').inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            BACKEND_LATENCY.labels('redis', 'pipeline').observe(duration)
+            server_timing.record('redis', duration)
+            backend_latency.observe('redis', duration)
+            if breaker is not None:
+                breaker.record(duration, success=not failed)
+
+
+class InstrumentedRedis(Redis):
+    """
+    Клиент Redis, записывающий длительность и ошибки всех команд в метрики.
+    Команды проходят через предохранитель: пока он разомкнут, они сразу завершаются CircuitOpenError
+    """
+
+    async def execute_command(self, *args, **options):
+        operation = str(args[0]).lower()
+        breaker = get_breaker()
+        failed = False
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception as e:
+            failed = isinstance(e, (ConnectionError, TimeoutError))
+            BACKEND_ERRORS.labels('redis', operation).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            BACKEND_LATENCY.labels('redis', operation).observe(duration)
+            server_timing.record('redis', duration)
+            backend_latency.observe('redis', duration)
+            if breaker is not None:
+                breaker.record(duration, success=not failed)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 async def get_redis() -> Redis:
     return redis
@@ -1,7 +1,7 @@
 import os
 from typing import Optional
 
-from pydantic import BaseSettings
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
@@ -16,6 +16,101 @@ class Settings(BaseSettings):
 
     REDIS_URL: str = 'redis://localhost:6379'
     REDIS_CACHE_TTL: int = 60*5  # в секундах
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # в секундах, на команду
+    REDIS_CONNECT_TIMEOUT: float = 0.5  # в секундах
+
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_TTL: int = 10  # в секундах, должен быть меньше REDIS_CACHE_TTL
+    LOCAL_CACHE_MAX_ITEMS: dict[str, int] = {'movies': 5000, 'persons': 2000, 'genres': 500, 'suggest': 10000}
+    LOCAL_CACHE_DEFAULT_MAX_ITEMS: int = 1000
+    LOCAL_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # на каждую сущность
+
+    # stale-while-revalidate: сколько секунд после REDIS_CACHE_TTL запись сущности ещё отдаётся
+    # как устаревшая, пока в фоне идёт её обновление, 0 - режим выключен
+    CACHE_STALE_TTL: dict[str, int] = {'movies': 60*60, 'persons': 60*60, 'genres': 60*60}
+    CACHE_REFRESH_TIMEOUT: int = 30  # в секундах
+
+    CACHE_INVALIDATION_ENABLED: bool = True  # сброс кэша по событиям ETL
+    CACHE_INVALIDATION_CHANNEL: str = 'cache_invalidation'
+    CACHE_INVALIDATION_RETRY_DELAY: int = 5  # в секундах
+    CACHE_KEY_DIGEST_SIZE: int = 16  # в байтах, хеш параметров списка в ключе кэша
+    CACHE_VERSION_REFRESH_INTERVAL: int = 30  # в секундах, на случай пропущенных сообщений о смене версии
+
+    # сжатие записей кэша в Redis: zstd, zlib или none. Записи меньше порога хранятся как есть
+    CACHE_CODEC: str = 'zstd'
+    CACHE_COMPRESSION_THRESHOLD: int = 1024  # в байтах
+    CACHE_ZSTD_LEVEL: int = 3
+    CACHE_ZSTD_DICT_PATH: Optional[str] = None  # словарь, обученный train_cache_dictionary.py
+
+    # списки из целых сущностей кэшируются идентификаторами, а сами сущности - по своим ключам
+    CACHE_WRITE_THROUGH_ENABLED: bool = True
+
+    # популярность запросов к сущностям и спискам, по которой прогревается кэш
+    POPULARITY_TRACKING_ENABLED: bool = True
+    POPULARITY_FLUSH_INTERVAL: float = 1  # в секундах, как часто счётчики записываются в Redis
+    POPULARITY_DECAY_INTERVAL: int = 10*60  # в секундах
+    POPULARITY_DECAY_FACTOR: float = 0.5  # во сколько раз уменьшаются счётчики за интервал
+    POPULARITY_MAX_ENTRIES: int = 10000  # на каждую сущность, остальные отбрасываются при затухании
+    # прогрев кэша самыми популярными запросами при старте и после переноса данных ETL
+    CACHE_WARM_ENABLED: bool = True
+    CACHE_WARM_TOP_N: int = 500  # на каждую сущность
+    CACHE_WARM_CONCURRENCY: int = 4  # одновременных запросов прогрева
+    CACHE_WARM_RATE: float = 50  # запросов прогрева в секунду
+    CACHE_WARM_TIMEOUT: float = 120  # в секундах, на весь прогрев
+    CACHE_WARM_MAX_ERRORS: int = 10  # после стольких ошибок прогрев прекращается
+
+    NEGATIVE_CACHE_TTL: int = 30  # в секундах, для отсутствующих в индексе сущностей
+    EXISTENCE_FILTER_ENABLED: bool = True  # фильтры Блума по идентификаторам, которые строит ETL
+    EXISTENCE_FILTER_REFRESH_INTERVAL: int = 60  # в секундах
+
+    CACHE_LOCK_ENABLED: bool = False  # межпроцессная блокировка загрузки через Redis
+    CACHE_LOCK_TIMEOUT: int = 10  # в секундах
+    CACHE_LOCK_WAIT: float = 2  # в секундах
+
+    # предохранители запросов к redis и elasticsearch: размыкаются, когда доля ошибок и медленных запросов
+    # за окно достигает порога, пока предохранитель разомкнут, отдаются устаревшие записи кэша,
+    # а без Redis запросы обслуживаются в обход кэша
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_FAILURE_RATIO: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_DURATION: dict[str, float] = {'redis': 0.1, 'elasticsearch': 1}  # в секундах
+    CIRCUIT_BREAKER_MIN_CALLS: int = 20  # за окно, чтобы единичные ошибки не размыкали предохранитель
+    CIRCUIT_BREAKER_WINDOW: float = 10  # в секундах
+    CIRCUIT_BREAKER_OPEN_DURATION: float = 5  # в секундах
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = 3
+
+    # ограничение одновременных запросов по классам маршрутов, лишние получают 503 с Retry-After.
+    # Лимиты подбираются по длительности запросов к redis и elasticsearch (см. app.load_shedding)
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHEDDING_ROUTE_CLASSES: dict[str, str] = {
+        '/api/v1/genres': 'cheap',
+        '/api/v1/suggest': 'cheap',
+        '/api/v1/films/search': 'expensive',
+        '/api/v1/films/facets': 'expensive',
+        '/api/v1/persons/search': 'expensive',
+        '/api/v1/home': 'expensive',
+    }  # префикс пути - класс, остальные маршруты относятся к standard
+    LOAD_SHEDDING_INITIAL_LIMIT: dict[str, int] = {'cheap': 200, 'standard': 100, 'expensive': 40}
+    LOAD_SHEDDING_MIN_LIMIT: dict[str, int] = {'cheap': 50, 'standard': 20, 'expensive': 4}
+    LOAD_SHEDDING_MAX_LIMIT: int = 1000
+    LOAD_SHEDDING_DECREASE_FACTOR: dict[str, float] = {'cheap': 0.9, 'standard': 0.75, 'expensive': 0.5}
+    LOAD_SHEDDING_LATENCY_TARGET: dict[str, float] = {'redis': 0.01, 'elasticsearch': 0.25}  # в секундах
+    LOAD_SHEDDING_ADJUST_INTERVAL: float = 0.5  # в секундах
+    LOAD_SHEDDING_RETRY_AFTER: int = 1  # в секундах
+
+    # кэш готовых ответов на GET запросы по пути, параметрам и роли пользователя
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: dict[str, int] = {
+        '/api/v1/films': 60,
+        '/api/v1/persons': 60,
+        '/api/v1/genres': 5*60,
+        '/api/v1/suggest': 60,
+    }  # префикс пути - TTL в секундах, ответы остальных маршрутов не кэшируются
+    RESPONSE_CACHE_MAX_BYTES: int = 512 * 1024  # ответы больше не кэшируются
+
+    SERVER_TIMING_ENABLED: bool = True
+    # профилирование запроса по заголовку X-Profile, доступно только администраторам
+    PROFILING_ENABLED: bool = True
+    PROFILE_TTL: int = 60*60  # в секундах, сколько хранится отчёт профилировщика
 
     PROJECT_NAME: str = 'Read-only API for an online cinema'
     PROJECT_DESCRIPTION: str = 'Information about films, genres and people who participated in the creation of the work'
@@ -25,13 +120,68 @@ class Settings(BaseSettings):
 
     DEFAULT_PAGE_SIZE: int = 50
     DEFAULT_PAGE_NUMBER: int = 1
+    BATCH_MAX_SIZE: int = 100
+    HOME_MAX_SECTIONS: int = 20
+    HOME_SECTION_MAX_SIZE: int = 50
+    FACETS_GENRE_SIZE: int = 100  # сколько жанров возвращает фасет genre
+    SUGGEST_DEFAULT_SIZE: int = 5
+    SUGGEST_MAX_SIZE: int = 10
+    SUGGEST_MAX_QUERY_LENGTH: int = 64
+    SUGGEST_TIMEOUT: float = 0.15  # в секундах, после него подсказки не ждут и отдаются пустыми
 
     ELASTIC_HOST: str = 'localhost'
     ELASTIC_PORT: int = 9200
+    ELASTIC_HOSTS: list[str] = []  # узлы кластера, например ["es1:9200", "es2:9200"], заменяют ELASTIC_HOST
+    # поиск с preference по хешу запроса, чтобы повторные запросы попадали в кэш тех же копий шардов
+    ES_PREFERENCE_ROUTING_ENABLED: bool = True
+    # дублирование запросов на чтение на другой узел, если первый не ответил за p95 длительности таких запросов
+    ES_HEDGING_ENABLED: bool = False
+    ES_HEDGE_MIN_DELAY: float = 0.02  # в секундах
+    ES_HEDGE_MIN_SAMPLES: int = 20  # до стольких замеров операции запросы не дублируются
+    ES_HEDGE_WINDOW: int = 200  # по скольким последним запросам операции считается p95
+    ES_HEDGE_BUDGET_RATIO: float = 0.05  # доля дублированных запросов от числа запросов
+    ES_HEDGE_BUDGET_MIN: int = 5  # дублирований за окно, разрешённых независимо от числа запросов
+    ES_HEDGE_BUDGET_WINDOW: float = 10  # в секундах
+    ES_REQUEST_TIMEOUT: float = 2  # в секундах, по умолчанию клиент ждёт ответа 10 секунд
+    ES_POINT_IN_TIME_ENABLED: bool = False  # требует Elasticsearch 7.10+
+    ES_POINT_IN_TIME_KEEP_ALIVE: str = '1m'
 
     LOG_LEVEL: str = 'DEBUG'
 
     NGINX_URL: str = 'http://127.0.0.1:80'
+    # HTTP клиент для запросов к сервису авторизации
+    HTTP_POOL_SIZE: int = 100
+    HTTP_KEEPALIVE_TIMEOUT: float = 30  # в секундах
+    HTTP_DNS_CACHE_TTL: int = 60  # в секундах
+    HTTP_TIMEOUT: float = 3  # в секундах, на весь запрос
+    HTTP_CONNECT_TIMEOUT: float = 0.5  # в секундах
+    HTTP_RETRIES: int = 2  # только для идемпотентных запросов
+    HTTP_RETRY_BACKOFF: float = 0.05  # в секундах, удваивается с каждой попыткой
+    HTTP_RETRY_BUDGET_RATIO: float = 0.1  # доля повторов от числа запросов
+    HTTP_RETRY_BUDGET_MIN: int = 10  # повторов за окно, разрешённых независимо от числа запросов
+    HTTP_RETRY_BUDGET_WINDOW: float = 10  # в секундах
+    # проверка токенов по открытому ключу сервиса авторизации вместо запроса к нему
+    AUTH_LOCAL_VERIFICATION_ENABLED: bool = True
+    SERVICE_API_KEY: Optional[str] = None  # ключ служебных эндпоинтов сервиса авторизации (/auth/revoked)
+    AUTH_REVOKED_REFRESH_INTERVAL: int = 10  # в секундах
+    # роли берутся из токена, пока он не старше этого срока, дальше - у сервиса авторизации с кэшем на REDIS_CACHE_TTL,
+    # поэтому смена ролей пользователя видна не позже чем через AUTH_LOCAL_ROLE_MAX_AGE + REDIS_CACHE_TTL
+    AUTH_LOCAL_ROLE_MAX_AGE: int = 60*5  # в секундах
+    # пауза перед повторным запросом ключа проверки токенов, удваивается до AUTH_KEY_RETRY_MAX_DELAY
+    AUTH_KEY_RETRY_DELAY: float = 1  # в секундах
+    AUTH_KEY_RETRY_MAX_DELAY: float = 60  # в секундах
+
+    @validator('LOCAL_CACHE_TTL')
+    def local_cache_ttl_below_redis_ttl(cls, v, values):
+        if 'REDIS_CACHE_TTL' in values and v >= values['REDIS_CACHE_TTL']:
+            raise ValueError('LOCAL_CACHE_TTL must be less than REDIS_CACHE_TTL')
+        return v
+
+    @validator('CACHE_CODEC')
+    def known_cache_codec(cls, v):
+        if v not in ('zstd', 'zlib', 'none'):
+            raise ValueError('CACHE_CODEC must be one of zstd, zlib, none')
+        return v
 
 
 settings = Settings()
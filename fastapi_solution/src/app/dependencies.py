@@ -1,26 +1,55 @@
+from http import HTTPStatus
 from typing import Optional, List
 
+import jwt
 from aioredis import Redis
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 
 from api.v1.auth_router import oauth2_scheme
+from app import server_timing, token_verifier
+from app.connections.http_client import HTTPStatusError
 from app.connections.redis import get_redis
 from app.enums import UserRoles
+from app.metrics import AUTH_ROLE_REQUESTS
 from services.auth_service import AuthService
 
 
+async def get_role_by_token(token: str, redis: Redis) -> str:
+    verifier = token_verifier.token_verifier
+    if verifier is not None:
+        try:
+            role = verifier.get_role(token)
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='Invalid token')
+        except token_verifier.UnverifiableTokenError:
+            # например, токен выпущен до появления ролей в токенах: роль знает только сервис авторизации
+            role = None
+        if role is not None:
+            AUTH_ROLE_REQUESTS.labels('local').inc()
+            return role
+    try:
+        return await AuthService(redis=redis).authenticate(token=token)
+    except HTTPStatusError as e:
+        if e.status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.UNPROCESSABLE_ENTITY):
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='Invalid token')
+        raise
+
+
 async def get_current_user_role(
     request: Request,
     redis: Redis = Depends(get_redis),
     # иначе fastapi в /docs не узнает, где нужна авторизация
     dummy_token: Optional[str] = Depends(oauth2_scheme),
 ) -> str:
+    # роль уже могла определить ResponseCacheMiddleware
+    if (role := getattr(request.state, 'user_role', None)) is not None:
+        return role
     authorization_header: str = request.headers.get("Authorization")
     if not authorization_header:
         return UserRoles.GUEST.value
     token = authorization_header.split(' ')[-1]
-    role = await AuthService(redis=redis).authenticate(token=token)
-    return role
+    with server_timing.timed('auth'):
+        return await get_role_by_token(token=token, redis=redis)
 
 
 class AllowedUser:
@@ -5,3 +5,9 @@ class UserRoles(enum.Enum):
     GUEST = 'GUEST'
     ADMIN = 'ADMIN'
     SUBSCRIBER = 'SUBSCRIBER'
+
+
+class FilmFacet(str, enum.Enum):
+    GENRE = 'genre'
+    RATING = 'rating'
+    YEAR = 'year'
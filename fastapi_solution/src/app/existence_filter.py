@@ -0,0 +1,101 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import math
+import struct
+import uuid
+from typing import Dict, Iterable, Optional, Union
+
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>IB')
+
+existence_filters: Dict[str, 'BloomFilter'] = {}
+_loaded_filters: Dict[str, str] = {}
+refresh_task: Optional[asyncio.Task] = None
+
+
+class BloomFilter:
+    """
+    Фильтр Блума по идентификаторам документов индекса.
+    Формат хеширования и сериализации должен совпадать с etl_service/etl/existence_filter.py,
+    т.к. фильтр строится в ETL, а проверяется в API.
+    """
+
+    def __init__(self, size: int, hash_count: int, bits: Optional[bytearray] = None):
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> 'BloomFilter':
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hash_count = max(round(size / capacity * math.log(2)), 1)
+        return cls(size=size, hash_count=hash_count)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack('>QQ', digest)
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def to_string(self) -> str:
+        return base64.b64encode(HEADER.pack(self.size, self.hash_count) + bytes(self.bits)).decode()
+
+    @classmethod
+    def from_string(cls, data: str) -> 'BloomFilter':
+        raw = base64.b64decode(data)
+        size, hash_count = HEADER.unpack_from(raw)
+        return cls(size=size, hash_count=hash_count, bits=bytearray(raw[HEADER.size:]))
+
+
+def get_existence_filter_key(index: str) -> str:
+    return f'existence_filter:{index}'
+
+
+def may_exist(index: str, pk: Union[str, uuid.UUID]) -> bool:
+    """False, если документа с таким ключом точно нет в индексе"""
+    existence_filter = existence_filters.get(index)
+    return existence_filter is None or str(pk) in existence_filter
+
+
+def add_to_existence_filter(index: str, ids: Iterable[str]) -> None:
+    """Добавляет в загруженный фильтр документы, проиндексированные после его построения"""
+    existence_filter = existence_filters.get(index)
+    if existence_filter is None:
+        return
+    for pk in ids:
+        existence_filter.add(str(pk))
+
+
+async def load_existence_filters(redis: Redis, indices: Iterable[str]) -> None:
+    indices = list(indices)
+    for index, data in zip(indices, await redis.mget([get_existence_filter_key(index) for index in indices])):
+        # неизменившийся фильтр не перечитывается, иначе потерялись бы добавленные в него новые документы
+        if data and data != _loaded_filters.get(index):
+            existence_filters[index] = BloomFilter.from_string(data)
+            _loaded_filters[index] = data
+
+
+async def refresh_existence_filters(redis: Redis, indices: Iterable[str]) -> None:
+    """Периодически перечитывает фильтры, которые ETL публикует в Redis после каждого переноса данных"""
+    indices = list(indices)
+    while True:
+        try:
+            await load_existence_filters(redis, indices)
+        except (RedisError, ValueError, struct.error):
+            logger.exception('Cannot load existence filters')
+        await asyncio.sleep(settings.EXISTENCE_FILTER_REFRESH_INTERVAL)
@@ -0,0 +1,101 @@
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.metrics import CONCURRENCY_LIMIT, SHED_REQUESTS
+
+# доля лимита, которую должны занимать запросы, чтобы лимит увеличивался
+UTILIZATION_TO_INCREASE = 0.5
+
+
+class BackendLatency:
+    """Экспоненциально сглаженная длительность запросов к каждой зависимости"""
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.latency: Dict[str, float] = {}
+
+    def observe(self, backend: str, duration: float) -> None:
+        previous = self.latency.get(backend)
+        self.latency[backend] = duration if previous is None else previous + self.alpha * (duration - previous)
+
+    def overloaded(self) -> bool:
+        """True, если хотя бы одна зависимость отвечает медленнее целевой длительности"""
+        return any(
+            latency > settings.LOAD_SHEDDING_LATENCY_TARGET.get(backend, float('inf'))
+            for backend, latency in self.latency.items()
+        )
+
+
+backend_latency = BackendLatency()
+
+
+class AdaptiveLimiter:
+    """
+    Лимит одновременных запросов класса маршрутов, подбираемый по AIMD:
+    пока зависимости отвечают быстрее целевой длительности, а запросы занимают заметную часть лимита,
+    он увеличивается на единицу, иначе умножается на decrease_factor, но не опускается ниже min_limit.
+    Дорогие маршруты получают меньший лимит и уменьшают его сильнее, поэтому при перегрузке
+    отбрасываются первыми, а дешёвые закэшированные продолжают обслуживаться
+    """
+
+    def __init__(self, name: str, initial_limit: int, min_limit: int, max_limit: int, decrease_factor: float):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._peak = 0
+        self._adjusted_at = time.monotonic()
+        self._limit_metric = CONCURRENCY_LIMIT.labels(name)
+        self._shed_metric = SHED_REQUESTS.labels(name)
+        self._limit_metric.set(self.limit)
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self._shed_metric.inc()
+            return False
+        self.in_flight += 1
+        self._peak = max(self._peak, self.in_flight)
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        now = time.monotonic()
+        if now - self._adjusted_at < settings.LOAD_SHEDDING_ADJUST_INTERVAL:
+            return
+        if backend_latency.overloaded():
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        elif self._peak >= self.limit * UTILIZATION_TO_INCREASE:
+            self.limit = min(self.max_limit, self.limit + 1)
+        self._adjusted_at = now
+        self._peak = self.in_flight
+        self._limit_metric.set(self.limit)
+
+
+limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(route_class: str) -> AdaptiveLimiter:
+    if route_class not in limiters:
+        limiters[route_class] = AdaptiveLimiter(
+            name=route_class,
+            initial_limit=settings.LOAD_SHEDDING_INITIAL_LIMIT[route_class],
+            min_limit=settings.LOAD_SHEDDING_MIN_LIMIT[route_class],
+            max_limit=settings.LOAD_SHEDDING_MAX_LIMIT,
+            decrease_factor=settings.LOAD_SHEDDING_DECREASE_FACTOR[route_class],
+        )
+    return limiters[route_class]
+
+
+def get_route_class(path: str) -> Optional[str]:
+    """Класс маршрута по самому длинному подходящему префиксу пути, None для путей вне API"""
+    if not path.startswith('/api/v1/'):
+        return None
+    matched = max(
+        (prefix for prefix in settings.LOAD_SHEDDING_ROUTE_CLASSES if path.startswith(prefix)),
+        key=len,
+        default=None,
+    )
+    return settings.LOAD_SHEDDING_ROUTE_CLASSES[matched] if matched is not None else 'standard'
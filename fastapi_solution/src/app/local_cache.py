@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+
+
+class LocalCache:
+    """
+    In-process LRU кэш с TTL, хранящий уже собранные объекты моделей.
+    Ограничен как количеством элементов (max_items), так и суммарным размером
+    исходных данных (max_bytes), по которым были построены объекты.
+    """
+
+    def __init__(self, max_items: int, max_bytes: int, ttl: int, name: str = 'default'):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._data: 'OrderedDict[str, Tuple[float, int, Any]]' = OrderedDict()
+        # дочерние метрики создаются заранее, чтобы не искать их по меткам на каждом обращении
+        self._hits_metric = CACHE_REQUESTS.labels(name, 'local', 'hit')
+        self._misses_metric = CACHE_REQUESTS.labels(name, 'local', 'miss')
+        self._evictions_metric = CACHE_EVICTIONS.labels(name)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер закэшированных данных в байтах"""
+        return self._size
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            self._misses_metric.inc()
+            return None
+        expires_at, _, value = item
+        if expires_at < time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            self._misses_metric.inc()
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        self._hits_metric.inc()
+        return value
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._data:
+            self._pop(key)
+        self._data[key] = (time.monotonic() + self.ttl, size, value)
+        self._size += size
+        while len(self._data) > self.max_items or self._size > self.max_bytes:
+            oldest_key = next(iter(self._data))
+            self._pop(oldest_key)
+            self.evictions += 1
+            self._evictions_metric.inc()
+
+    def delete(self, key: str) -> None:
+        if key in self._data:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        return {
+            'items': len(self._data),
+            'bytes': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _pop(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._size -= size
+
+
+local_caches: Dict[str, LocalCache] = {}
+
+
+def get_local_cache(namespace: str) -> LocalCache:
+    """Возвращает in-process кэш сущности, создавая его при первом обращении"""
+    cache = local_caches.get(namespace)
+    if cache is None:
+        cache = LocalCache(
+            max_items=settings.LOCAL_CACHE_MAX_ITEMS.get(namespace, settings.LOCAL_CACHE_DEFAULT_MAX_ITEMS),
+            max_bytes=settings.LOCAL_CACHE_MAX_BYTES,
+            ttl=settings.LOCAL_CACHE_TTL,
+            name=namespace,
+        )
+        local_caches[namespace] = cache
+    return cache
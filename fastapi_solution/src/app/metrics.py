@@ -0,0 +1,136 @@
+import os
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+
+HTTP_CLIENT_LATENCY = Histogram(
+    'http_client_request_duration_seconds',
+    'Длительность запросов к внешним HTTP сервисам',
+    ['method', 'status'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+HTTP_CLIENT_IN_PROGRESS = Gauge(
+    'http_client_requests_in_progress',
+    'Количество занятых соединений пула HTTP клиента',
+    multiprocess_mode='livesum',
+)
+HTTP_CLIENT_POOL_SIZE = Gauge(
+    'http_client_pool_size',
+    'Размер пула соединений HTTP клиента',
+    multiprocess_mode='liveall',
+)
+HTTP_CLIENT_RETRIES = Counter(
+    'http_client_retries_total',
+    'Повторные запросы к внешним HTTP сервисам',
+    ['method'],
+)
+HTTP_CLIENT_RETRIES_EXHAUSTED = Counter(
+    'http_client_retry_budget_exhausted_total',
+    'Запросы, которые не были повторены из-за исчерпанного бюджета повторов',
+    ['method'],
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Длительность обработки запросов к API',
+    ['method', 'route', 'status'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'Количество запросов к API, обрабатываемых в данный момент',
+    multiprocess_mode='livesum',
+)
+BACKEND_LATENCY = Histogram(
+    'backend_request_duration_seconds',
+    'Длительность запросов к Redis и Elasticsearch',
+    ['backend', 'operation'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1),
+)
+BACKEND_ERRORS = Counter(
+    'backend_errors_total',
+    'Ошибки запросов к Redis и Elasticsearch',
+    ['backend', 'operation'],
+)
+ES_HEDGED_REQUESTS = Counter(
+    'elasticsearch_hedged_requests_total',
+    'Запросы к ES, продублированные на другой узел, по тому, какой из запросов ответил первым',
+    ['operation', 'winner'],
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state',
+    'Состояние предохранителя зависимости: 0 - замкнут, 1 - пробные запросы, 2 - разомкнут',
+    ['dependency'],
+    multiprocess_mode='liveall',
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    'circuit_breaker_transitions_total',
+    'Переходы предохранителей зависимостей в состояние state',
+    ['dependency', 'state'],
+)
+CIRCUIT_BREAKER_REJECTED = Counter(
+    'circuit_breaker_rejected_total',
+    'Запросы к зависимостям, не выполненные из-за разомкнутого предохранителя',
+    ['dependency'],
+)
+CONCURRENCY_LIMIT = Gauge(
+    'concurrency_limit',
+    'Текущий лимит одновременных запросов класса маршрутов',
+    ['route_class'],
+    multiprocess_mode='livesum',
+)
+SHED_REQUESTS = Counter(
+    'shed_requests_total',
+    'Запросы, отклонённые с 503 из-за превышения лимита одновременных запросов',
+    ['route_class'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Обращения к кэшу сущностей: hit, miss или stale (отдана устаревшая запись)',
+    ['entity', 'layer', 'result'],
+)
+CACHE_EVICTIONS = Counter(
+    'cache_evictions_total',
+    'Записи, вытесненные из in-process кэша',
+    ['entity'],
+)
+CACHE_REFRESHES = Counter(
+    'cache_refreshes_total',
+    'Фоновые обновления устаревших записей кэша',
+    ['entity'],
+)
+CACHE_CODEC_DURATION = Histogram(
+    'cache_codec_duration_seconds',
+    'Длительность сжатия и распаковки записей кэша',
+    ['codec', 'operation'],
+    buckets=(.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01),
+)
+CACHE_COMPRESSION_RATIO = Histogram(
+    'cache_compression_ratio',
+    'Во сколько раз сжатая запись кэша меньше исходной',
+    ['codec'],
+    buckets=(1, 1.5, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+CACHE_PAYLOAD_BYTES = Counter(
+    'cache_payload_bytes_total',
+    'Объём сжимаемых записей кэша: raw (исходный) и stored (записанный в Redis)',
+    ['codec', 'form'],
+)
+CACHE_WARM_REQUESTS = Counter(
+    'cache_warm_requests_total',
+    'Запросы прогрева кэша: ok, error или skipped (не уложились в бюджет прогрева)',
+    ['entity', 'result'],
+)
+AUTH_ROLE_REQUESTS = Counter(
+    'auth_role_requests_total',
+    'Определение роли пользователя: local (по токену), cache (роль из Redis) или auth_service',
+    ['source'],
+)
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    """Реестр для /metrics, под gunicorn метрики собираются со всех воркеров через PROMETHEUS_MULTIPROC_DIR"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
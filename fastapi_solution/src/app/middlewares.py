@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import time
+import uuid
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aioredis.exceptions import RedisError
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from pyinstrument import Profiler
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import server_timing
+from app.connections import redis
+from app.core.config import settings
+from app.dependencies import get_role_by_token
+from app.enums import UserRoles
+from app.load_shedding import get_limiter, get_route_class
+from app.metrics import CACHE_REQUESTS, REQUEST_LATENCY, REQUESTS_IN_PROGRESS
+from app.popularity import tracker
+from app.response_cache import (
+    STORED_HEADERS,
+    decode_entry,
+    get_response_key,
+    get_route_ttl,
+    is_no_store,
+    make_etag,
+    normalize_query_string,
+    store_response,
+    strip_weak_etag,
+)
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = 'unmatched'
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+
+def get_profile_key(profile_id: str) -> str:
+    return f'profile:{profile_id}'
+
+
+class MetricsMiddleware:
+    """
+    Записывает длительность обработки запросов по шаблону пути маршрута (а не по самому пути,
+    чтобы идентификаторы не раздували количество серий) и количество обрабатываемых запросов
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Dict[Callable, str] = {}
+
+    def _get_route(self, scope: Scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if not self._routes:
+            routes: list[BaseRoute] = scope['app'].routes
+            self._routes = {route.endpoint: route.path for route in routes if hasattr(route, 'endpoint')}
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            REQUEST_LATENCY.labels(scope['method'], self._get_route(scope), status).observe(
+                time.perf_counter() - start
+            )
+
+
+class ServerTimingMiddleware:
+    """
+    Возвращает длительности этапов обработки запроса (auth, redis, es, serialize) в заголовке Server-Timing.
+    Запрос администратора с заголовком X-Profile дополнительно профилируется, HTML отчёт сохраняется
+    в Redis на PROFILE_TTL и доступен по идентификатору из заголовка X-Profile-Id (см. api.v1.profiles_router)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = server_timing.start()
+        profile_id = await self._get_profile_id(scope)
+        start = time.perf_counter()
+
+        async def send_with_timings(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', server_timing.format_header(timings, time.perf_counter() - start))
+                if profile_id is not None:
+                    headers.append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        if profile_id is None:
+            await self.app(scope, receive, send_with_timings)
+            return
+
+        profiler = Profiler(async_mode='enabled')
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            profiler.stop()
+            try:
+                await redis.redis.set(get_profile_key(profile_id), profiler.output_html(), ex=settings.PROFILE_TTL)
+            except RedisError as e:
+                logger.warning('Profile %s was not saved: %s', profile_id, e)
+
+    @staticmethod
+    async def _get_profile_id(scope: Scope) -> Optional[str]:
+        """Идентификатор отчёта, если запрос нужно профилировать"""
+        if not settings.PROFILING_ENABLED:
+            return None
+        headers = Headers(scope=scope)
+        authorization_header = headers.get('Authorization')
+        if PROFILE_HEADER not in headers or not authorization_header:
+            return None
+        try:
+            role = await get_role_by_token(token=authorization_header.split(' ')[-1], redis=redis.redis)
+        except HTTPException:
+            return None
+        return str(uuid.uuid4()) if role == UserRoles.ADMIN.value else None
+
+
+class LoadSheddingMiddleware:
+    """
+    Ограничивает количество одновременно обрабатываемых запросов каждого класса маршрутов
+    адаптивным лимитом (см. app.load_shedding). Запросы сверх лимита сразу получают 503 с Retry-After,
+    не дожидаясь, пока перегрузка замедлит все остальные
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_class = get_route_class(scope['path']) if scope['type'] == 'http' else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = get_limiter(route_class)
+        if not limiter.try_acquire():
+            response = ORJSONResponse(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                content={'detail': 'Server is overloaded'},
+                headers={'Retry-After': str(settings.LOAD_SHEDDING_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+class ResponseCacheMiddleware:
+    """
+    Кэширует в Redis готовые ответы на GET запросы к API (статус, заголовки и тело)
+    по пути, нормализованным параметрам и роли пользователя, TTL задаётся по маршрутам.
+    Повторный запрос гостя обходится одним GET в Redis: без разрешения зависимостей, создания тулкитов
+    и построения моделей. Ответы получают ETag, на запрос с совпадающим If-None-Match отдаётся 304 без тела.
+    Ответы с Cache-Control: no-store (неполные, собранные без части источников) не сохраняются.
+    Ответы сбрасываются вместе с кэшем тулкитов: сменой версий пространств имён данных
+    и через множества ссылок сущностей, попавших в ответ (см. app.response_cache).
+    Обращения к сущностям и спискам, учтённые трекером популярности при построении ответа, хранятся вместе с ним
+    и учитываются заново при каждой выдаче из кэша, иначе популярные у гостей запросы не попадали бы в прогрев
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] != 'GET' or (ttl := get_route_ttl(scope['path'])) is None:
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        params = normalize_query_string(scope['query_string'].decode('latin-1'))
+        role = await self._get_role(request_headers) if params is not None else None
+        if role is None or PROFILE_HEADER in request_headers:
+            await self.app(scope, receive, send)
+            return
+        scope.setdefault('state', {})['user_role'] = role
+
+        key = get_response_key(scope['path'], params, role)
+        try:
+            entry = decode_entry(await redis.redis.get(key))
+        except (RedisError, ValueError, KeyError) as e:
+            logger.warning('Response cache read skipped: %s', e)
+            entry = None
+        if entry is not None:
+            CACHE_REQUESTS.labels('response', 'redis', 'hit').inc()
+            self._resolve_endpoint(scope)
+            for namespace, hit in entry.hits:
+                tracker.hit(namespace, hit)
+            await self._send(send, request_headers, entry.status, entry.headers, entry.body, cache_status=b'HIT')
+            return
+        CACHE_REQUESTS.labels('response', 'redis', 'miss').inc()
+
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_or_capture(message: Message) -> None:
+            nonlocal start_message
+            if (
+                message['type'] == 'http.response.start'
+                and message['status'] == HTTPStatus.OK
+                and not is_no_store(message['headers'])
+            ):
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+            body = b''.join(chunks)
+            headers = [
+                (name, value) for name, value in start_message['headers'] if name.lower() in STORED_HEADERS
+            ]
+            headers.append((b'etag', make_etag(body).encode()))
+            if len(body) <= settings.RESPONSE_CACHE_MAX_BYTES:
+                try:
+                    await store_response(redis.redis, key, ttl, start_message['status'], headers, body, hits)
+                except RedisError as e:
+                    logger.warning('Response cache write skipped: %s', e)
+            # остальные заголовки (например, Server-Timing) отдаются только в этом ответе
+            extra_headers = [
+                (name, value) for name, value in start_message['headers']
+                if name.lower() not in STORED_HEADERS and name.lower() != b'content-length'
+            ]
+            await self._send(
+                send, request_headers, start_message['status'], headers + extra_headers, body, cache_status=b'MISS'
+            )
+
+        with tracker.capture() as hits:
+            await self.app(scope, receive, send_or_capture)
+
+    @staticmethod
+    async def _get_role(headers: Headers) -> Optional[str]:
+        """Роль пользователя, None, если её не удалось определить: тогда запрос обрабатывается без кэша"""
+        authorization_header = headers.get('Authorization')
+        if not authorization_header:
+            return UserRoles.GUEST.value
+        try:
+            return await get_role_by_token(token=authorization_header.split(' ')[-1], redis=redis.redis)
+        except (HTTPException, aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+
+    @staticmethod
+    def _resolve_endpoint(scope: Scope) -> None:
+        """Находит маршрут запроса, отданного из кэша, чтобы MetricsMiddleware учёл его под своим шаблоном пути"""
+        for route in scope['app'].routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope['endpoint'] = child_scope.get('endpoint')
+                return
+
+    @staticmethod
+    async def _send(
+        send: Send,
+        request_headers: Headers,
+        status: int,
+        headers: List[Tuple[bytes, bytes]],
+        body: bytes,
+        cache_status: bytes,
+    ) -> None:
+        etag = next((value.decode() for name, value in headers if name == b'etag'), None)
+        if_none_match = request_headers.get('If-None-Match')
+        if etag is not None and if_none_match is not None and (
+            if_none_match.strip() == '*' or etag in [strip_weak_etag(tag.strip()) for tag in if_none_match.split(',')]
+        ):
+            status, body = HTTPStatus.NOT_MODIFIED, b''
+            headers = [(b'etag', etag.encode())]
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers + [(b'content-length', str(len(body)).encode()), (b'x-cache', cache_status)],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracker_task: Optional[asyncio.Task] = None
+
+# обращения, учтённые при обработке текущего запроса (см. PopularityTracker.capture)
+_request_hits: ContextVar[Optional[List[Tuple[str, dict]]]] = ContextVar('popularity_hits', default=None)
+
+
+def get_popularity_key(namespace: str) -> str:
+    """Ключ sorted set с популярностью запросов к сущностям пространства имён"""
+    return f'popularity:{namespace}'
+
+
+class PopularityTracker:
+    """
+    Считает обращения к сущностям и спискам, чтобы после рестарта или потери кэша прогреть самые популярные.
+    Обращения накапливаются в памяти и раз в POPULARITY_FLUSH_INTERVAL записываются в Redis одним pipeline.
+    Раз в POPULARITY_DECAY_INTERVAL один из воркеров уменьшает все счётчики в POPULARITY_DECAY_FACTOR раз,
+    поэтому популярность отражает последние запросы, а не всю историю
+    """
+
+    def __init__(self):
+        self._counts: Counter[Tuple[str, str]] = Counter()
+
+    def hit(self, namespace: str, entry: dict) -> None:
+        if settings.POPULARITY_TRACKING_ENABLED:
+            self._counts[namespace, orjson.dumps(entry, option=orjson.OPT_SORT_KEYS).decode()] += 1
+            if (hits := _request_hits.get()) is not None:
+                hits.append((namespace, entry))
+
+    @staticmethod
+    @contextmanager
+    def capture() -> Iterator[List[Tuple[str, dict]]]:
+        """
+        Запоминает обращения, учтённые внутри блока. Кэш ответов сохраняет их вместе с ответом
+        и учитывает повторно при его выдаче, ведь тулкиты в этом случае не вызываются
+        """
+        hits = []
+        token = _request_hits.set(hits)
+        try:
+            yield hits
+        finally:
+            _request_hits.reset(token)
+
+    async def flush(self, redis: Redis) -> None:
+        if not self._counts:
+            return
+        counts, self._counts = self._counts, Counter()
+        pipeline = redis.pipeline(transaction=False)
+        for (namespace, member), count in counts.items():
+            pipeline.zincrby(get_popularity_key(namespace), count, member)
+        await pipeline.execute()
+
+    @staticmethod
+    async def decay(redis: Redis, namespaces: List[str]) -> None:
+        # блокировка живёт весь интервал, поэтому затухание выполняет только один воркер
+        if not await redis.set('popularity:decay_lock', 1, nx=True, ex=settings.POPULARITY_DECAY_INTERVAL):
+            return
+        pipeline = redis.pipeline(transaction=False)
+        for namespace in namespaces:
+            key = get_popularity_key(namespace)
+            pipeline.zunionstore(key, {key: settings.POPULARITY_DECAY_FACTOR})
+            pipeline.zremrangebyrank(key, 0, -settings.POPULARITY_MAX_ENTRIES - 1)
+        await pipeline.execute()
+
+    @staticmethod
+    async def top(redis: Redis, namespace: str, count: int) -> List[dict]:
+        """Самые популярные запросы пространства имён, начиная с самого популярного"""
+        members = await redis.zrevrange(get_popularity_key(namespace), 0, count - 1)
+        return [orjson.loads(member) for member in members]
+
+    async def run(self, redis: Redis, namespaces: List[str]) -> None:
+        loop = asyncio.get_running_loop()
+        next_decay = loop.time() + settings.POPULARITY_DECAY_INTERVAL
+        while True:
+            await asyncio.sleep(settings.POPULARITY_FLUSH_INTERVAL)
+            try:
+                await self.flush(redis)
+                if loop.time() >= next_decay:
+                    next_decay = loop.time() + settings.POPULARITY_DECAY_INTERVAL
+                    await self.decay(redis, namespaces)
+            except RedisError:
+                logger.exception('Cannot save request popularity')
+
+
+tracker = PopularityTracker()
@@ -0,0 +1,47 @@
+from typing import Any, List, Optional
+
+
+def normalize_query(query: Optional[str]) -> Optional[str]:
+    """Приводит поисковую строку к виду, одинаковому для запросов, которые ES обработает одинаково"""
+    if query is None:
+        return None
+    return ' '.join(query.lower().split()) or None
+
+
+class SearchQueryBuilder:
+    """
+    Собирает bool-запрос к ES из независимых условий.
+    Полнотекстовые условия попадают в must и влияют на релевантность,
+    фильтры попадают в filter: они не считают score и кэшируются в query cache узла ES.
+    """
+
+    def __init__(self):
+        self._must: List[dict] = []
+        self._filter: List[dict] = []
+
+    def match(self, query: Optional[str], fields: List[str]) -> 'SearchQueryBuilder':
+        if query:
+            self._must.append({'multi_match': {'query': query, 'fields': fields}})
+        return self
+
+    def term(self, field: str, value: Any) -> 'SearchQueryBuilder':
+        if value is not None:
+            self._filter.append({'term': {field: value}})
+        return self
+
+    def range(self, field: str, gte: Any = None, lte: Any = None) -> 'SearchQueryBuilder':
+        bounds = {name: value for name, value in (('gte', gte), ('lte', lte)) if value is not None}
+        if bounds:
+            self._filter.append({'range': {field: bounds}})
+        return self
+
+    def build(self) -> Optional[dict]:
+        """Тело запроса или None, если условий нет"""
+        if not self._must and not self._filter:
+            return None
+        query = {}
+        if self._must:
+            query['must'] = self._must
+        if self._filter:
+            query['filter'] = self._filter
+        return {'query': {'bool': query}}
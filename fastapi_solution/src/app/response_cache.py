@@ -0,0 +1,145 @@
+import hashlib
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+import orjson
+from aioredis import Redis
+
+from app import cache_keys
+from app.cache_codec import get_cache_codec
+from app.cache_invalidation import get_references_key
+from app.core.config import settings
+from app.query_builder import normalize_query
+
+# пространство имён ключей ответов, весь кэш ответов сбрасывается сменой его версии
+RESPONSE_NAMESPACE = 'response'
+# пространства имён, данные которых попадают в ответы: смена любой из их версий сбрасывает и ответы
+DATA_NAMESPACES = ('movies', 'persons', 'genres')
+# параметры, с которыми ответ не кэшируется: курсор может ссылаться на point in time конкретного обхода
+UNCACHED_PARAMS = {'page[cursor]'}
+# заголовки ответа, которые сохраняются вместе с телом
+STORED_HEADERS = {b'content-type', b'x-next-cursor'}
+
+
+def get_route_ttl(path: str) -> Optional[int]:
+    """TTL ответов маршрута по самому длинному подходящему префиксу пути, None, если ответы не кэшируются"""
+    matched = max((prefix for prefix in settings.RESPONSE_CACHE_TTL if path.startswith(prefix)), key=len, default=None)
+    return settings.RESPONSE_CACHE_TTL[matched] if matched is not None else None
+
+
+def normalize_query_string(query_string: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Параметры запроса в каноническом порядке, поисковая строка нормализуется так же, как в ключах тулкитов.
+    None, если с такими параметрами ответ не кэшируется
+    """
+    params = []
+    for name, value in parse_qsl(query_string):
+        if name in UNCACHED_PARAMS:
+            return None
+        if name == 'query':
+            value = normalize_query(value) or ''
+        params.append((name, value))
+    return sorted(params)
+
+
+def get_response_key(path: str, params: List[Tuple[str, str]], role: str) -> str:
+    # версии пространств имён данных входят в хеш, поэтому их смена ETL сбрасывает и ответы
+    versions = [cache_keys.get_namespace_version(namespace) for namespace in DATA_NAMESPACES]
+    return cache_keys.params_key(
+        RESPONSE_NAMESPACE,
+        'body',
+        {'path': path, 'params': params, 'role': role, 'versions': versions},
+    )
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def strip_weak_etag(tag: str) -> str:
+    """If-None-Match сравнивается слабо: метка W/"x" совпадает с "x", поэтому признак W/ отбрасывается"""
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def is_no_store(headers: List[Tuple[bytes, bytes]]) -> bool:
+    """Ответ помечен Cache-Control: no-store, например, неполный из-за недоступности Elasticsearch, и не кэшируется"""
+    for name, value in headers:
+        if name.lower() == b'cache-control' and b'no-store' in [d.strip() for d in value.lower().split(b',')]:
+            return True
+    return False
+
+
+def collect_ids(data: Any) -> List[str]:
+    """
+    Идентификаторы сущностей ответа: самой сущности, элементов списка или элементов разделов главной страницы.
+    По ним ответ попадает в множества ссылок этих сущностей и сбрасывается вместе с их кэшем
+    """
+    if isinstance(data, dict):
+        if isinstance(data.get('id'), str):
+            return [data['id']]
+        return [pk for value in data.values() if isinstance(value, list) for pk in collect_ids(value)]
+    if isinstance(data, list):
+        return [item['id'] for item in data if isinstance(item, dict) and isinstance(item.get('id'), str)]
+    return []
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    # обращения к сущностям и спискам, учтённые трекером популярности при построении ответа
+    hits: List[Tuple[str, dict]]
+
+
+def encode_entry(
+    status: int,
+    headers: List[Tuple[bytes, bytes]],
+    body: bytes,
+    hits: List[Tuple[str, dict]] = (),
+) -> Union[str, bytes]:
+    meta = {'status': status, 'headers': [[name.decode(), value.decode()] for name, value in headers]}
+    if hits:
+        meta['hits'] = hits
+    return get_cache_codec().encode(orjson.dumps(meta) + b'\n' + body)
+
+
+def decode_entry(value: Optional[Union[str, bytes]]) -> Optional[CachedResponse]:
+    """Сохранённый ответ, None, если записи нет или её не удалось прочитать"""
+    data = get_cache_codec().decode(value)
+    if not data:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    meta, _, body = data.partition(b'\n')
+    meta = orjson.loads(meta)
+    return CachedResponse(
+        status=meta['status'],
+        headers=[(name.encode(), value.encode()) for name, value in meta['headers']],
+        body=body,
+        hits=[(namespace, entry) for namespace, entry in meta.get('hits', [])],
+    )
+
+
+async def store_response(
+    redis: Redis,
+    key: str,
+    ttl: int,
+    status: int,
+    headers: List[Tuple[bytes, bytes]],
+    body: bytes,
+    hits: List[Tuple[str, dict]] = (),
+) -> None:
+    """Сохраняет ответ и запоминает его ключ в множествах ссылок сущностей ответа (см. app.cache_invalidation)"""
+    try:
+        ids = collect_ids(orjson.loads(body))
+    except orjson.JSONDecodeError:
+        ids = []
+    # множества ссылок общие с тулкитами, поэтому их срок не должен стать короче заданного ими
+    references_ttl = max(ttl, settings.REDIS_CACHE_TTL + max(settings.CACHE_STALE_TTL.values(), default=0))
+    pipeline = redis.pipeline(transaction=False)
+    pipeline.set(key, encode_entry(status, headers, body, hits), ex=ttl)
+    for pk in ids:
+        references_key = get_references_key(pk)
+        pipeline.sadd(references_key, key)
+        pipeline.expire(references_key, references_ttl)
+    await pipeline.execute()
@@ -0,0 +1,9 @@
+from starlette.responses import Response
+
+# неполный ответ (источник данных недоступен или не уложился в таймаут) не сохраняется в кэшах
+NO_STORE_HEADERS = {'Cache-Control': 'no-store'}
+
+
+class RawJSONResponse(Response):
+    """Ответ с телом, уже сериализованным в JSON, которое отдаётся без повторной обработки"""
+    media_type = 'application/json'
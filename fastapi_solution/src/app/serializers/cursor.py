@@ -0,0 +1,30 @@
+import base64
+from typing import Optional, Tuple
+
+import orjson
+
+START_CURSOR = '*'
+
+
+def encode_cursor(search_after: list, pit_id: Optional[str] = None) -> str:
+    """Упаковывает значения сортировки последнего документа страницы в непрозрачный курсор"""
+    payload = {'s': search_after}
+    if pit_id is not None:
+        payload['p'] = pit_id
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[list], Optional[str]]:
+    """
+    Распаковывает курсор в значения search_after и идентификатор point in time.
+    Курсор START_CURSOR означает начало обхода. ValueError, если курсор повреждён.
+    """
+    if cursor == START_CURSOR:
+        return None, None
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not isinstance(payload, dict) or not isinstance(payload.get('s'), list):
+        raise ValueError('Invalid cursor')
+    return payload['s'], payload.get('p')
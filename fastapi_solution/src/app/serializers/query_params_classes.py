@@ -1,6 +1,11 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException
 from fastapi.params import Query
 
 from app.core.config import settings
+from app.serializers.cursor import START_CURSOR, decode_cursor
 
 
 class PaginationDataParams:
@@ -9,8 +14,44 @@ class PaginationDataParams:
         sort: str = Query('', description='Sorting by imdb_rating', regex='^-?imdb_rating$'),
         page_size: int = Query(settings.DEFAULT_PAGE_SIZE, description='Number of filmworks on page',
                                alias='page[size]', ge=1),
-        page: int = Query(settings.DEFAULT_PAGE_NUMBER, description='Page number', alias='page[number]', ge=1)
+        page: int = Query(settings.DEFAULT_PAGE_NUMBER, description='Page number', alias='page[number]', ge=1),
+        cursor: Optional[str] = Query(
+            None,
+            description=f'Cursor of the next page from the X-Next-Cursor header, "{START_CURSOR}" starts iteration. '
+                        f'Replaces page number',
+            alias='page[cursor]',
+        ),
     ):
         self.sort = sort
         self.page_size = page_size
         self.page = page
+        self.cursor = cursor
+        self.search_after = None
+        self.pit_id = None
+        if cursor is not None:
+            try:
+                self.search_after, self.pit_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Invalid cursor')
+
+
+class FilmFilterParams:
+    def __init__(
+        self,
+        genre: Optional[str] = Query(None, description='Filter by genre uuid', alias='filter[genre]'),
+        rating_from: Optional[float] = Query(None, description='Minimum imdb_rating', alias='filter[rating_from]',
+                                             ge=0, le=10),
+        rating_to: Optional[float] = Query(None, description='Maximum imdb_rating', alias='filter[rating_to]',
+                                           ge=0, le=10),
+        year_from: Optional[int] = Query(None, description='Minimum release year', alias='filter[year_from]', ge=0),
+        year_to: Optional[int] = Query(None, description='Maximum release year', alias='filter[year_to]', ge=0),
+    ):
+        if rating_from is not None and rating_to is not None and rating_from > rating_to:
+            raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Invalid rating range')
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Invalid year range')
+        self.genre = genre
+        self.rating_from = rating_from
+        self.rating_to = rating_to
+        self.year_from = year_from
+        self.year_to = year_to
@@ -0,0 +1,46 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# длительность (в секундах) и количество вызовов по этапам обработки текущего запроса
+_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar('server_timings', default=None)
+
+
+def start() -> Dict[str, List[float]]:
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def record(stage: str, duration: float) -> None:
+    """Добавляет длительность этапа к текущему запросу, вне запроса ничего не делает"""
+    timings = _timings.get()
+    if timings is None:
+        return
+    if (stage_timing := timings.get(stage)) is None:
+        timings[stage] = [duration, 1]
+    else:
+        stage_timing[0] += duration
+        stage_timing[1] += 1
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start_time)
+
+
+def format_header(timings: Dict[str, List[float]], total: float) -> str:
+    """Значение заголовка Server-Timing, длительности в миллисекундах"""
+    metrics = []
+    for stage, (duration, count) in timings.items():
+        metric = f'{stage};dur={duration * 1000:.2f}'
+        if count > 1:
+            metric += f';desc="{int(count)} calls"'
+        metrics.append(metric)
+    metrics.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(metrics)
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Set
+
+import aiohttp
+import jwt
+
+from app.core.config import settings
+from services.auth_service import AuthService
+
+logger = logging.getLogger(__name__)
+
+token_verifier: Optional['TokenVerifier'] = None
+refresh_task: Optional[asyncio.Task] = None
+
+
+class UnverifiableTokenError(Exception):
+    """
+    Подпись токена верна, но роль по нему локально не определить: токен выпущен без claim roles
+    или роли в нём могли устареть
+    """
+
+
+class TokenVerifier:
+    """
+    Проверяет access токены сервиса авторизации локально, по его открытому ключу.
+    Отозванные токены периодически запрашиваются у сервиса авторизации,
+    поэтому выход пользователя становится виден с задержкой до AUTH_REVOKED_REFRESH_INTERVAL.
+    Роли берутся из токена, только пока он выпущен не раньше AUTH_LOCAL_ROLE_MAX_AGE секунд назад,
+    для более старых токенов роль запрашивается у сервиса авторизации, чтобы смена ролей не ждала истечения токена.
+    """
+
+    def __init__(self, public_key: str, algorithm: str):
+        self.public_key = public_key
+        self.algorithm = algorithm
+        self.revoked: Set[str] = set()
+
+    def get_role(self, token: str) -> str:
+        """
+        Роль пользователя из токена, jwt.InvalidTokenError, если токен недействителен или отозван.
+        UnverifiableTokenError, если в токене нет ролей или они могли устареть: роль нужно запросить
+        у сервиса авторизации
+        """
+        claims = jwt.decode(
+            token,
+            self.public_key,
+            algorithms=[self.algorithm],
+            options={'require': ['exp', 'jti', 'sub']},
+        )
+        if claims.get('type') != 'access':
+            raise jwt.InvalidTokenError('Only access tokens are allowed')
+        if claims['jti'] in self.revoked:
+            raise jwt.InvalidTokenError('Token has been revoked')
+        if 'roles' not in claims:
+            raise UnverifiableTokenError('Token has no roles claim')
+        if time.time() - claims.get('iat', 0) > settings.AUTH_LOCAL_ROLE_MAX_AGE:
+            raise UnverifiableTokenError('Token roles may be outdated')
+        return AuthService.get_user_role(claims['roles'])
+
+
+async def refresh_revoked_tokens(verifier: TokenVerifier, auth_service: AuthService) -> None:
+    while True:
+        await asyncio.sleep(settings.AUTH_REVOKED_REFRESH_INTERVAL)
+        try:
+            verifier.revoked = set(await auth_service.get_revoked_tokens())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            logger.exception('Cannot refresh revoked tokens')
+
+
+async def load_token_verifier(auth_service: AuthService) -> bool:
+    """
+    Получает ключ проверки токенов и отозванные токены у сервиса авторизации.
+    False, если сервис недоступен и попытку нужно повторить
+    """
+    global token_verifier
+    try:
+        public_key = await auth_service.get_public_key()
+        revoked = await auth_service.get_revoked_tokens() if public_key is not None else []
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning('Cannot get token verification key: %s', e)
+        return False
+    if public_key is None:
+        logger.warning('Auth service does not expose a public key, falling back to auth service')
+        return True
+    verifier = TokenVerifier(public_key=public_key['public_key'], algorithm=public_key['algorithm'])
+    verifier.revoked = set(revoked)
+    token_verifier = verifier
+    return True
+
+
+async def retry_token_verifier(auth_service: AuthService) -> None:
+    """Повторяет получение ключа с удваивающейся паузой, пока оно не удастся, затем обновляет отозванные токены"""
+    delay = settings.AUTH_KEY_RETRY_DELAY
+    while True:
+        await asyncio.sleep(delay)
+        if await load_token_verifier(auth_service):
+            break
+        delay = min(delay * 2, settings.AUTH_KEY_RETRY_MAX_DELAY)
+    if token_verifier is not None:
+        await refresh_revoked_tokens(token_verifier, auth_service)
+
+
+async def init_token_verifier(auth_service: AuthService) -> None:
+    """
+    Получает ключ проверки токенов у сервиса авторизации до приёма запросов.
+    Если сервис недоступен, попытки продолжаются в фоне, а до их успеха роли запрашиваются
+    у сервиса авторизации на каждый токен
+    """
+    global refresh_task
+    if not await load_token_verifier(auth_service):
+        refresh_task = asyncio.create_task(retry_token_verifier(auth_service))
+    elif token_verifier is not None:
+        refresh_task = asyncio.create_task(refresh_revoked_tokens(token_verifier, auth_service))
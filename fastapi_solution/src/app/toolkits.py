@@ -1,15 +1,44 @@
-import json
+import asyncio
+import logging
 import uuid
 from abc import ABC, abstractmethod
-from typing import Optional, Type, Union, List
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, Union, List, Tuple
 
 from aioredis import Redis
+from aioredis.client import Pipeline
+from aioredis.exceptions import LockError, RedisError
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from orjson import orjson
 from pydantic import BaseModel
 
+from app import cache_keys, circuit_breaker, server_timing
+from app.cache_codec import get_cache_codec
+from app.cache_invalidation import get_references_key
 from app.core.config import settings
+from app.existence_filter import may_exist
+from app.local_cache import LocalCache, get_local_cache
+from app.metrics import CACHE_REFRESHES, CACHE_REQUESTS
+from app.popularity import tracker
+from app.serializers.cursor import encode_cursor
 from app.serializers.query_params_classes import PaginationDataParams
+from app.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+FRESH = '1'
+REFRESHING = '0'
+NOT_FOUND_MARKER = 'null'
+
+# признак сущности, отсутствие которой в индексе закэшировано
+NOT_FOUND = object()
+
+# ссылки на фоновые задачи обновления кэша, чтобы их не собрал сборщик мусора
+_refresh_tasks = set()
+
+
+def get_fresh_key(key: Union[str, uuid.UUID]) -> str:
+    """Ключ метки свежести записи в режиме stale-while-revalidate"""
+    return f'fresh:{key}'
 
 
 class BaseToolkit(ABC):
@@ -42,26 +71,104 @@ class BaseToolkit(ABC):
         """Класс исключения, вызываемый при ошибке поиска экземпляра модели в get"""
         pass
 
+    @property
+    def list_model(self) -> Type[BaseModel]:
+        """Модель сущности в списках, по умолчанию совпадает с entity_model"""
+        return self.entity_model
+
+    @property
+    def list_source_fields(self) -> List[str]:
+        """Поля документа, которые запрашиваются из индекса для списков: только нужные list_model"""
+        return [field.alias for field in self.list_model.__fields__.values()]
+
     async def list(
             self,
             pagination_data: PaginationDataParams,
             body: Optional[dict] = None
     ):
-        if (sort := pagination_data.sort) and sort.startswith('-'):
-            sort = sort.lstrip('-')+':desc'
         try:
-            data = await self.elastic.search(
-                index=self.entity_name,
-                body=body,
-                params={
-                    'size': pagination_data.page_size,
-                    'from': pagination_data.page - 1,
-                    'sort': sort
-                }
-            )
+            data = await self.elastic.search(index=self.entity_name, body=self.search_request(pagination_data, body))
         except NotFoundError:
             return None
-        return [self.entity_model(uuid=doc['_id'], **doc['_source']) for doc in data['hits']['hits']]
+        return self.build_list(data['hits']['hits'])
+
+    def search_request(self, pagination_data: PaginationDataParams, body: Optional[dict] = None) -> dict:
+        """Тело запроса страницы списка: условия из body, пагинация, сортировка и только нужные list_model поля"""
+        request = {
+            **(body or {}),
+            'size': pagination_data.page_size,
+            'from': (pagination_data.page - 1) * pagination_data.page_size,
+            '_source': self.list_source_fields,
+        }
+        if sort := self._sort(pagination_data):
+            request['sort'] = sort
+        return request
+
+    def build_list(self, hits: List[dict]) -> List[BaseModel]:
+        return [self.list_model(uuid=doc['_id'], **doc['_source']) for doc in hits]
+
+    @staticmethod
+    def _sort(pagination_data: PaginationDataParams) -> List[dict]:
+        if not (sort_field := pagination_data.sort):
+            return []
+        order = 'desc' if sort_field.startswith('-') else 'asc'
+        return [{sort_field.lstrip('-'): {'order': order, 'unmapped_type': 'float'}}]
+
+    async def list_by_cursor(
+            self,
+            pagination_data: PaginationDataParams,
+            body: Optional[dict] = None
+    ) -> Tuple[List[BaseModel], Optional[str]]:
+        """
+        Постраничное получение сущностей через search_after, стоимость страницы не зависит от глубины обхода.
+        Сортировка всегда дополняется ключевым атрибутом, чтобы порядок документов был однозначным.
+        Возвращает сущности страницы и курсор следующей страницы (None, если страница последняя).
+        """
+        sort = self._sort(pagination_data) or ['_score']
+        body = {
+            **(body or {}),
+            'size': pagination_data.page_size,
+            'sort': sort + [{self.pk_field_name: 'asc'}],
+            '_source': self.list_source_fields,
+        }
+        if pagination_data.search_after is not None:
+            body['search_after'] = pagination_data.search_after
+
+        pit_id = pagination_data.pit_id
+        try:
+            if settings.ES_POINT_IN_TIME_ENABLED:
+                if pit_id is None:
+                    pit_id = await self._open_point_in_time()
+                body['pit'] = {'id': pit_id, 'keep_alive': settings.ES_POINT_IN_TIME_KEEP_ALIVE}
+                data = await self.elastic.search(body=body)
+                pit_id = data.get('pit_id', pit_id)
+            else:
+                data = await self.elastic.search(index=self.entity_name, body=body)
+        except NotFoundError:
+            return [], None
+
+        hits = data['hits']['hits']
+        instances = self.build_list(hits)
+        if len(hits) < pagination_data.page_size:
+            if pit_id is not None:
+                await self._close_point_in_time(pit_id)
+            return instances, None
+        return instances, encode_cursor(hits[-1]['sort'], pit_id)
+
+    async def _open_point_in_time(self) -> str:
+        # клиент elasticsearch 7.9 не умеет работать с point in time, он появился в ES 7.10
+        data = await self.elastic.transport.perform_request(
+            'POST',
+            f'/{self.entity_name}/_pit',
+            params={'keep_alive': settings.ES_POINT_IN_TIME_KEEP_ALIVE},
+        )
+        return data['id']
+
+    async def _close_point_in_time(self, pit_id: str) -> None:
+        try:
+            await self.elastic.transport.perform_request('DELETE', '/_pit', body={'id': pit_id})
+        except NotFoundError:
+            pass
 
     async def get(self, pk: Union[str, uuid.UUID]):
         try:
@@ -70,9 +177,28 @@ class BaseToolkit(ABC):
             return None
         return self.entity_model(uuid=doc['_id'], **doc['_source'])
 
+    def may_exist(self, pk: Union[str, uuid.UUID]) -> bool:
+        """False, если сущности с таким ключом точно нет в индексе, ES в этом случае можно не опрашивать"""
+        return may_exist(self.entity_name, pk)
+
+    async def mget(self, pks: List[Union[str, uuid.UUID]]) -> List[BaseModel]:
+        """Получение нескольких сущностей одним запросом, отсутствующие в индексе пропускаются"""
+        try:
+            data = await self.elastic.mget(body={'ids': [str(pk) for pk in pks]}, index=self.entity_name)
+        except NotFoundError:
+            return []
+        return [self.entity_model(uuid=doc['_id'], **doc['_source']) for doc in data['docs'] if doc.get('found')]
+
 
 class RedisCacheToolkit(ABC):
-    """Класс, предоставляющий возможность кэшировать сущности по ключу"""
+    """
+    Класс, предоставляющий возможность кэшировать сущности по ключу.
+    Перед Redis стоит in-process кэш (LocalCache) с уже собранными объектами моделей,
+    он используется только тулкитами, у которых определено entity_name.
+    """
+    # обращения учитываются трекером популярности, прогрев кэша его выключает, чтобы не учитывать сам себя
+    track_popularity = True
+
     def __init__(self, redis: Redis):
         self.redis = redis
 
@@ -82,42 +208,448 @@ class RedisCacheToolkit(ABC):
         """Модель сущности"""
         pass
 
-    async def _cache_data(self, key: str, data: str):
-        await self.redis.set(
-            key,
-            data,
-            ex=settings.REDIS_CACHE_TTL
-        )
+    @property
+    def list_model(self) -> Type[BaseModel]:
+        """Модель сущности в закэшированных списках"""
+        return self.entity_model
+
+    @property
+    def cache_namespace(self) -> Optional[str]:
+        """Имя сущности для in-process кэша, stale-while-revalidate и метрик, None, если у тулкита его нет"""
+        return getattr(self, 'entity_name', None)
+
+    @property
+    def local_cache(self) -> Optional[LocalCache]:
+        """In-process кэш сущности, None, если он выключен или не применим"""
+        namespace = self.cache_namespace
+        if not settings.LOCAL_CACHE_ENABLED or namespace is None:
+            return None
+        return get_local_cache(namespace)
+
+    @property
+    def key_namespace(self) -> str:
+        """Пространство имён ключей кэша в Redis, весь кэш пространства сбрасывается сменой его версии"""
+        return self.cache_namespace or 'default'
+
+    def instance_key(self, pk: Union[str, uuid.UUID]) -> str:
+        """Ключ кэша для сущности"""
+        return cache_keys.item_key(self.key_namespace, pk)
+
+    def params_key(self, params: dict, kind: str = 'list') -> str:
+        """Ключ кэша для данных, полученных по параметрам запроса, по умолчанию для списка сущностей"""
+        return cache_keys.params_key(self.key_namespace, kind, params)
+
+    def response_key(self, params: dict, response_model: Type[BaseModel]) -> str:
+        """Ключ кэша для готового тела ответа со списком сущностей"""
+        return self.params_key(params, kind=f'body:{response_model.__name__}')
+
+    def record_hit(self, entry: dict) -> None:
+        """Учитывает обращение к сущности ({"kind": "item", "pk": ...}) или списку ({"kind": "list", "params": ...})"""
+        if self.track_popularity and self.cache_namespace is not None:
+            tracker.hit(self.key_namespace, entry)
+
+    @staticmethod
+    def serialize_instances(instances: List[BaseModel], response_model: Type[BaseModel]) -> bytes:
+        """Сериализует список сущностей в тело ответа так же, как это сделал бы FastAPI по response_model"""
+        with server_timing.timed('serialize'):
+            return orjson.dumps([
+                response_model.parse_obj(instance.dict(by_alias=True)).dict(by_alias=True)
+                for instance in instances
+            ])
+
+    @property
+    def stale_ttl(self) -> int:
+        """
+        Сколько секунд после REDIS_CACHE_TTL запись ещё может отдаваться как устаревшая,
+        пока в фоне идёт её обновление (stale-while-revalidate). 0 - режим выключен
+        """
+        namespace = self.cache_namespace
+        return settings.CACHE_STALE_TTL.get(namespace, 0) if namespace is not None else 0
+
+    def _queue_cache_data(self, pipeline: Pipeline, key: str, data: Union[str, bytes]) -> None:
+        pipeline.set(key, get_cache_codec().encode(data), ex=settings.REDIS_CACHE_TTL + self.stale_ttl)
+        if self.stale_ttl:
+            pipeline.set(get_fresh_key(key), FRESH, ex=settings.REDIS_CACHE_TTL)
+
+    async def _cache_data(self, key: str, data: str, references: Optional[List[BaseModel]] = None):
+        """
+        Кэширует данные по ключу. Для данных, собранных из нескольких сущностей (references),
+        ключ дополнительно запоминается в множествах ссылок этих сущностей,
+        чтобы при их изменении сбросить и его (см. app.cache_invalidation)
+        """
+        if not references and not self.stale_ttl:
+            await self._write(self.redis.set(
+                key,
+                get_cache_codec().encode(data),
+                ex=settings.REDIS_CACHE_TTL
+            ))
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        self._queue_cache_data(pipeline, key, data)
+        self._queue_references(pipeline, key, references or [])
+        await self._write(pipeline.execute())
+
+    @staticmethod
+    async def _write(command: Awaitable) -> None:
+        """Запись в кэш не нужна для ответа, поэтому при недоступности Redis она пропускается"""
+        try:
+            await command
+        except RedisError as e:
+            logger.warning('Cache write skipped: %s', e)
+
+    def _queue_references(self, pipeline: Pipeline, key: str, references: List[BaseModel]) -> None:
+        for instance in references:
+            references_key = get_references_key(instance.uuid)
+            pipeline.sadd(references_key, key)
+            pipeline.expire(references_key, settings.REDIS_CACHE_TTL + self.stale_ttl)
 
     async def cache_instance(self, instance: Type[BaseModel]):
+        data = instance.json(by_alias=True)
+        key = self.instance_key(instance.uuid)
         await self._cache_data(
-            key=instance.uuid,
-            data=instance.json(by_alias=True),
+            key=key,
+            data=data,
         )
+        if (local_cache := self.local_cache) is not None:
+            local_cache.set(key, instance, size=len(data))
+
+    async def cache_missing_instances(self, pks: List[Union[str, uuid.UUID]]):
+        """Запоминает на NEGATIVE_CACHE_TTL, что сущностей с такими ключами нет"""
+        if not pks:
+            return
+        keys = [self.instance_key(pk) for pk in pks]
+        pipeline = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(key, NOT_FOUND_MARKER, ex=settings.NEGATIVE_CACHE_TTL)
+        await self._write(pipeline.execute())
+        if (local_cache := self.local_cache) is not None:
+            for key in keys:
+                local_cache.set(key, NOT_FOUND)
+
+    async def cache_instances(self, instances: List[BaseModel]):
+        """Кэширует несколько сущностей по их ключам одним pipeline запросом"""
+        if not instances:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        self._queue_instances(pipeline, instances)
+        await self._write(pipeline.execute())
+
+    def _queue_instances(self, pipeline: Pipeline, instances: List[BaseModel]) -> None:
+        local_cache = self.local_cache
+        for instance in instances:
+            data = instance.json(by_alias=True)
+            key = self.instance_key(instance.uuid)
+            self._queue_cache_data(pipeline, key, data)
+            if local_cache is not None:
+                local_cache.set(key, instance, size=len(data))
+
+    @property
+    def lists_hold_full_documents(self) -> bool:
+        """Элементы списков - целые сущности, их можно кэшировать и собирать по ключам самих сущностей"""
+        return self.list_model is self.entity_model
 
     async def cache_instances_by_params(self, params: dict, instances: List[Type[BaseModel]]):
-        await self._cache_data(
-            key=json.dumps(params, sort_keys=True),
-            data=orjson.dumps([instance.json(by_alias=True) for instance in instances]),
+        """
+        Кэширует список сущностей. Если список состоит из целых сущностей, каждая из них записывается
+        по своему ключу тем же pipeline запросом, а сам список хранит только их идентификаторы
+        и при чтении собирается из кэша сущностей (см. get_cached_instances)
+        """
+        key = self.params_key(params)
+        if not (settings.CACHE_WRITE_THROUGH_ENABLED and self.lists_hold_full_documents):
+            data = orjson.dumps([instance.dict(by_alias=True) for instance in instances])
+            await self._cache_data(
+                key=key,
+                data=data,
+                references=instances,
             )
+        else:
+            data = orjson.dumps({'ids': [str(instance.uuid) for instance in instances]})
+            pipeline = self.redis.pipeline(transaction=False)
+            self._queue_instances(pipeline, instances)
+            self._queue_cache_data(pipeline, key, data)
+            self._queue_references(pipeline, key, instances)
+            await self._write(pipeline.execute())
+        if (local_cache := self.local_cache) is not None:
+            local_cache.set(key, instances, size=len(data))
 
-    async def _get_cached_data(self, key: str):
-        data = await self.redis.get(str(key))
+    async def load_once(
+            self,
+            key: str,
+            loader: Callable[[], Awaitable[Any]],
+            reader: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        """
+        Загружает данные по ключу, объединяя одновременные промахи кэша в один вызов loader.
+        При включенном CACHE_LOCK_ENABLED загрузка дополнительно защищается блокировкой в Redis,
+        после её получения кэш перечитывается через reader, т.к. его мог заполнить другой воркер.
+        """
+        if not settings.CACHE_LOCK_ENABLED or reader is None:
+            return await single_flight.do(key, loader)
+
+        async def locked_loader():
+            lock = self.redis.lock(
+                f'lock:{key}',
+                timeout=settings.CACHE_LOCK_TIMEOUT,
+                blocking_timeout=settings.CACHE_LOCK_WAIT,
+            )
+            try:
+                acquired = await lock.acquire()
+            except RedisError:
+                acquired = False
+            if not acquired:
+                return await loader()
+            try:
+                data = await reader()
+                if data is not None:
+                    return data
+                return await loader()
+            finally:
+                try:
+                    await lock.release()
+                except (LockError, RedisError):
+                    pass
+
+        return await single_flight.do(key, locked_loader)
+
+    async def _get_cached_data(self, key: str, refresh: Optional[Callable[[], Awaitable[Any]]] = None):
+        """
+        Возвращает закэшированные данные. Если запись устарела, но ещё не истекла окончательно,
+        она всё равно возвращается, а её обновление через refresh запускается в фоне один раз на все воркеры
+        """
+        namespace = self.cache_namespace or 'default'
+        try:
+            if not self.stale_ttl:
+                data, fresh = await self.redis.get(str(key)), None
+            else:
+                data, fresh = await self.redis.mget(str(key), get_fresh_key(key))
+        except RedisError as e:
+            # без Redis запрос обслуживается в обход кэша
+            CACHE_REQUESTS.labels(namespace, 'redis', 'error').inc()
+            logger.warning('Cache read skipped: %s', e)
+            return None
+        data = get_cache_codec().decode(data)
+        if not self.stale_ttl:
+            if not data:
+                CACHE_REQUESTS.labels(namespace, 'redis', 'miss').inc()
+                return None
+            CACHE_REQUESTS.labels(namespace, 'redis', 'hit').inc()
+            return data
         if not data:
+            CACHE_REQUESTS.labels(namespace, 'redis', 'miss').inc()
             return None
+        if data == NOT_FOUND_MARKER or fresh == FRESH:
+            CACHE_REQUESTS.labels(namespace, 'redis', 'hit').inc()
+            return data
+        CACHE_REQUESTS.labels(namespace, 'redis', 'stale').inc()
+        # пока предохранитель ES разомкнут, устаревшая запись отдаётся без попытки обновления
+        if fresh is None and refresh is not None and not circuit_breaker.is_open('elasticsearch'):
+            await self._schedule_refresh(str(key), refresh)
         return data
 
-    async def get_cached_instance_by_pk(self, pk: Union[str, uuid.UUID]) -> Optional[Type[BaseModel]]:
-        data = await self.redis.get(str(pk))
+    async def _schedule_refresh(self, key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+        # пока идёт обновление, метка свежести хранит REFRESHING, чтобы другие запросы его не дублировали
+        try:
+            if not await self.redis.set(get_fresh_key(key), REFRESHING, ex=settings.CACHE_REFRESH_TIMEOUT, nx=True):
+                return
+        except RedisError:
+            return
+        CACHE_REFRESHES.labels(self.cache_namespace).inc()
+        task = asyncio.create_task(single_flight.do(key, refresh))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_on_refresh_done)
+
+    async def get_cached_instance_by_pk(
+            self,
+            pk: Union[str, uuid.UUID],
+            refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Optional[Type[BaseModel]]:
+        """Сущность из кэша, NOT_FOUND, если закэшировано её отсутствие, None при промахе"""
+        key = self.instance_key(pk)
+        local_cache = self.local_cache
+        if local_cache is not None and (instance := local_cache.get(key)) is not None:
+            return instance
+        data = await self._get_cached_data(key, refresh=refresh)
         if not data:
             return
+        if data == NOT_FOUND_MARKER:
+            if local_cache is not None:
+                local_cache.set(key, NOT_FOUND)
+            return NOT_FOUND
         instance = self.entity_model.parse_raw(data)
+        if local_cache is not None:
+            local_cache.set(key, instance, size=len(data))
         return instance
 
-    async def get_cached_instances(self, params) -> Optional[List[Type[BaseModel]]]:
-        key = json.dumps(params, sort_keys=True)
-        data = await self.redis.get(key)
+    async def get_cached_instances_by_pks(self, pks: List[str]) -> Dict[str, BaseModel]:
+        """
+        Возвращает найденные в кэше сущности по ключам, Redis опрашивается одним MGET.
+        Для сущностей, отсутствие которых закэшировано, возвращается NOT_FOUND
+        """
+        namespace = self.cache_namespace or 'default'
+        instances = {}
+        keys = {pk: self.instance_key(pk) for pk in pks}
+        local_cache = self.local_cache
+        if local_cache is not None:
+            for pk in pks:
+                if (instance := local_cache.get(keys[pk])) is not None:
+                    instances[pk] = instance
+        missing = [pk for pk in pks if pk not in instances]
+        if not missing:
+            return instances
+        try:
+            values = await self.redis.mget([keys[pk] for pk in missing])
+        except RedisError as e:
+            CACHE_REQUESTS.labels(namespace, 'redis', 'error').inc(len(missing))
+            logger.warning('Cache read skipped: %s', e)
+            return instances
+        found = 0
+        codec = get_cache_codec()
+        for pk, data in zip(missing, values):
+            data = codec.decode(data)
+            if not data:
+                continue
+            found += 1
+            if data == NOT_FOUND_MARKER:
+                instances[pk] = NOT_FOUND
+                continue
+            instance = self.entity_model.parse_raw(data)
+            instances[pk] = instance
+            if local_cache is not None:
+                local_cache.set(keys[pk], instance, size=len(data))
+        CACHE_REQUESTS.labels(namespace, 'redis', 'hit').inc(found)
+        CACHE_REQUESTS.labels(namespace, 'redis', 'miss').inc(len(missing) - found)
+        return instances
+
+    async def get_instances_by_pks(
+            self,
+            pks: List[Union[str, uuid.UUID]],
+            loader: Callable[[List[str]], Awaitable[List[BaseModel]]],
+    ) -> List[BaseModel]:
+        """
+        Возвращает сущности в порядке переданных ключей. Попадания берутся из кэша,
+        все промахи загружаются одним вызовом loader и записываются в кэш.
+        """
+        pks = list(dict.fromkeys(str(pk) for pk in pks))
+        instances = await self.get_cached_instances_by_pks(pks)
+        missing = [pk for pk in pks if pk not in instances]
+        if missing:
+            loaded = await loader(missing)
+            await self.cache_instances(loaded)
+            instances.update({str(instance.uuid): instance for instance in loaded})
+            await self.cache_missing_instances([pk for pk in missing if pk not in instances])
+        return [instances[pk] for pk in pks if instances.get(pk, NOT_FOUND) is not NOT_FOUND]
+
+    async def get_cached_instances(
+            self,
+            params,
+            refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Optional[List[Type[BaseModel]]]:
+        key = self.params_key(params)
+        local_cache = self.local_cache
+        if local_cache is not None and (instances := local_cache.get(key)) is not None:
+            return instances
+        data = await self._get_cached_data(key, refresh=refresh)
         if not data:
             return
-        instances = [self.entity_model.parse_raw(item) for item in orjson.loads(data)]
+        items = orjson.loads(data)
+        if isinstance(items, dict):
+            instances = await self._assemble_instances(items['ids'])
+            if instances is None:
+                return
+        else:
+            instances = [
+                # записи старого формата хранят каждый элемент отдельной JSON строкой
+                self.list_model.parse_raw(item) if isinstance(item, str) else self.list_model.parse_obj(item)
+                for item in items
+            ]
+        if local_cache is not None:
+            local_cache.set(key, instances, size=len(data))
         return instances
+
+    async def _assemble_instances(self, pks: List[str]) -> Optional[List[BaseModel]]:
+        """Список из закэшированных сущностей, None, если хотя бы одной из них в кэше уже нет"""
+        instances = await self.get_cached_instances_by_pks(pks)
+        if any(instances.get(pk, NOT_FOUND) is NOT_FOUND for pk in pks):
+            return None
+        return [instances[pk] for pk in pks]
+
+    async def get_serialized_instances(
+            self,
+            params: dict,
+            response_model: Type[BaseModel],
+            loader: Callable[[], Awaitable[Optional[List[BaseModel]]]],
+            fetch: Optional[Callable[[], Awaitable[Optional[List[BaseModel]]]]] = None,
+    ) -> Optional[Union[str, bytes]]:
+        """
+        Возвращает готовое тело ответа со списком сущностей.
+        Тело валидируется по response_model один раз при записи в кэш, при попадании в кэш
+        оно отдаётся как есть, без построения моделей. None, если loader не нашёл сущностей.
+        fetch загружает сущности в обход кэша и используется для фонового обновления устаревшего тела.
+        """
+        key = self.response_key(params, response_model)
+        self.record_hit({'kind': 'list', 'params': cache_keys.normalize_params(params)})
+
+        async def refresh():
+            return await self.cache_body(key, await fetch(), response_model)
+
+        body = await self.get_cached_body(key, refresh=refresh if fetch is not None else None)
+        if body is None:
+            body = await self.cache_body(key, await loader(), response_model)
+        return body
+
+    async def get_cached_body(
+            self,
+            key: str,
+            refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Optional[Union[str, bytes]]:
+        """
+        Готовое тело ответа из in-process кэша или Redis, None при промахе.
+        Устаревшее тело отдаётся, а его обновление через refresh запускается в фоне (см. _get_cached_data)
+        """
+        local_cache = self.local_cache
+        if local_cache is not None and (body := local_cache.get(key)) is not None:
+            return body
+        body = await self._get_cached_data(key, refresh=refresh)
+        if body is not None and local_cache is not None:
+            local_cache.set(key, body, size=len(body))
+        return body
+
+    async def cache_body(
+            self,
+            key: str,
+            instances: Optional[List[BaseModel]],
+            response_model: Type[BaseModel],
+    ) -> Optional[bytes]:
+        """Сериализует список сущностей по response_model и кэширует тело по ключу, None, если список пуст"""
+        if not instances:
+            return None
+        body = self.serialize_instances(instances, response_model)
+        await self._cache_data(key=key, data=body, references=instances)
+        if (local_cache := self.local_cache) is not None:
+            local_cache.set(key, body, size=len(body))
+        return body
+
+
+class WarmableCacheToolkit(RedisCacheToolkit):
+    """Тулкит, списки которого прогреваются по параметрам, сохранённым трекером популярности"""
+
+    @staticmethod
+    def pagination_from_params(params: dict) -> PaginationDataParams:
+        """Параметры пагинации списка, восстановленные из параметров его ключа кэша"""
+        return PaginationDataParams(
+            sort=params.get('sort', ''),
+            page_size=params.get('page_size', settings.DEFAULT_PAGE_SIZE),
+            page=params.get('page', settings.DEFAULT_PAGE_NUMBER),
+            cursor=None,
+        )
+
+    @abstractmethod
+    async def warm_list(self, params: dict) -> None:
+        """Загружает в кэш тело ответа со списком так же, как его загрузил бы запрос к API с этими параметрами"""
+        pass
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _refresh_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error('Background cache refresh failed', exc_info=task.exception())
@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # иначе gauge метрики завершившегося воркера остались бы в /metrics
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,17 +1,37 @@
-# import logging
+import asyncio
+import logging
+import math
+from http import HTTPStatus
 
-import aioredis
 import uvicorn
 # import uvicorn
-from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
-from fastapi.responses import ORJSONResponse
+from aioredis.exceptions import RedisError
+from elasticsearch import ConnectionError
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from api.v1.router_v1 import router
-from app.connections import elastic, redis
+from app import cache_invalidation, cache_keys, existence_filter, popularity, token_verifier
+from app.connections import elastic, http_client, redis
 from app.core.config import settings
+from app.metrics import get_metrics_registry
+from app.middlewares import (
+    LoadSheddingMiddleware,
+    MetricsMiddleware,
+    ResponseCacheMiddleware,
+    ServerTimingMiddleware,
+)
+from services import cache_warmer
+from services.auth_service import AuthService
 # from app.core.logger import LOGGING
 
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACES = ['movies', 'persons', 'genres', 'auth', 'response']
+# пространства имён, популярность запросов к которым учитывается для прогрева кэша
+WARM_NAMESPACES = ['movies', 'persons', 'genres']
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
@@ -24,21 +44,81 @@ app = FastAPI(
 
 @app.on_event('startup')
 async def startup():
-    redis.redis = await aioredis.from_url(
+    redis.redis = await redis.InstrumentedRedis.from_url(
         settings.REDIS_URL,
         encoding="utf-8",
-        decode_responses=True
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
     )
-    elastic.es = AsyncElasticsearch(
-        hosts=[f'{settings.ELASTIC_HOST}:{settings.ELASTIC_PORT}']
+    elastic.es = elastic.create_elasticsearch()
+    # версии читаются до первого запроса, иначе он мог бы попасть в кэш, сброшенный сменой версии
+    try:
+        await cache_keys.load_namespace_versions(redis.redis, CACHE_NAMESPACES)
+    except RedisError:
+        logger.exception('Cannot load cache namespace versions')
+    cache_keys.refresh_task = asyncio.create_task(
+        cache_keys.refresh_namespace_versions(redis.redis, CACHE_NAMESPACES)
     )
+    if settings.CACHE_INVALIDATION_ENABLED:
+        cache_invalidation.listener_task = asyncio.create_task(cache_invalidation.listen(
+            redis.redis,
+            on_etl_finished=lambda indexes: cache_warmer.schedule_cache_warming(elastic.es, redis.redis, indexes),
+        ))
+    http_client.http_client = http_client.create_http_client()
+    if settings.AUTH_LOCAL_VERIFICATION_ENABLED:
+        await token_verifier.init_token_verifier(AuthService(redis=redis.redis))
+    if settings.EXISTENCE_FILTER_ENABLED:
+        existence_filter.refresh_task = asyncio.create_task(
+            existence_filter.refresh_existence_filters(redis.redis, ['movies', 'persons', 'genres'])
+        )
+    if settings.POPULARITY_TRACKING_ENABLED:
+        popularity.tracker_task = asyncio.create_task(popularity.tracker.run(redis.redis, WARM_NAMESPACES))
+    cache_warmer.schedule_cache_warming(elastic.es, redis.redis, WARM_NAMESPACES)
 
 
 @app.on_event('shutdown')
 async def shutdown():
+    if cache_invalidation.listener_task is not None:
+        cache_invalidation.listener_task.cancel()
+    if existence_filter.refresh_task is not None:
+        existence_filter.refresh_task.cancel()
+    if cache_keys.refresh_task is not None:
+        cache_keys.refresh_task.cancel()
+    if popularity.tracker_task is not None:
+        popularity.tracker_task.cancel()
+    if cache_warmer.warm_task is not None:
+        cache_warmer.warm_task.cancel()
+    if token_verifier.refresh_task is not None:
+        token_verifier.refresh_task.cancel()
+    await http_client.http_client.close()
     await redis.redis.close()
     await elastic.es.close()
 
+
+@app.exception_handler(ConnectionError)
+async def elasticsearch_unavailable(request: Request, exc: ConnectionError) -> ORJSONResponse:
+    """ES недоступен или разомкнут его предохранитель, а в кэше ответа нет: клиенту стоит повторить позже"""
+    retry_after = getattr(exc, 'retry_after', settings.CIRCUIT_BREAKER_OPEN_DURATION)
+    return ORJSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content={'detail': 'Service temporarily unavailable'},
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    return Response(generate_latest(get_metrics_registry()), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+if settings.RESPONSE_CACHE_ENABLED:
+    app.add_middleware(ResponseCacheMiddleware)
+if settings.LOAD_SHEDDING_ENABLED:
+    # отклонённые запросы не доходят до авторизации и профилирования, но учитываются в метриках
+    app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(router, prefix='/api/v1')
 
 # if __name__ == '__main__':
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Union
 
 from pydantic import Field
 
@@ -23,6 +23,18 @@ class FilmDetailed(Film):
     directors: Optional[list[ESFilmPerson]]
 
 
+class FacetBucket(BaseMixin):
+    """Facet value and the number of filmworks with it."""
+    key: Union[str, float]
+    count: int
+
+
+class FilmSearchWithFacets(BaseMixin):
+    """Search results along with the requested facets."""
+    items: list[Film]
+    facets: dict[str, list[FacetBucket]]
+
+
 class ESFilm(BaseMixin):
     """Модель описывающая document в Elasticserch."""
     uuid: str = Field(..., alias='id')
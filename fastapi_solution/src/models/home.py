@@ -0,0 +1,20 @@
+import enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+class HomeSectionEntity(str, enum.Enum):
+    FILMS = 'films'
+    GENRES = 'genres'
+
+
+class HomeSection(BaseModel):
+    """Раздел главной страницы: первая страница списка фильмов или жанров."""
+    name: str = Field(..., description='Key of the section in the response', max_length=64)
+    entity: HomeSectionEntity = HomeSectionEntity.FILMS
+    sort: str = Field('', description='Sorting by imdb_rating', regex='^-?imdb_rating$|^$')
+    genre: Optional[str] = Field(None, description='Filter films by genre uuid')
+    size: int = Field(10, description='Number of items in the section', ge=1, le=settings.HOME_SECTION_MAX_SIZE)
@@ -0,0 +1,20 @@
+from pydantic import Field
+
+from app.models import BaseMixin
+
+
+class FilmSuggestion(BaseMixin):
+    """Filmwork in autocomplete suggestions."""
+    uuid: str = Field(..., alias='id')
+    title: str
+
+
+class PersonSuggestion(BaseMixin):
+    """Person in autocomplete suggestions."""
+    uuid: str = Field(..., alias='id')
+    full_name: str = Field(..., alias='name')
+
+
+class Suggestions(BaseMixin):
+    films: list[FilmSuggestion]
+    persons: list[PersonSuggestion]
@@ -1,19 +1,15 @@
-from typing import Any, Type, Optional
+from http import HTTPStatus
+from typing import Iterable, List, Type, Optional
 
-import aiohttp
 from pydantic import BaseModel
 
+from app.connections import http_client
 from app.enums import UserRoles
+from app.metrics import AUTH_ROLE_REQUESTS
 from app.toolkits import RedisCacheToolkit
 from app.core.config import settings
 
 
-class HTTPResponse(BaseModel):
-    body: Any
-    headers: dict
-    status: int
-
-
 class LoginResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -26,47 +22,58 @@ class AuthService(RedisCacheToolkit):
         """Модель сущности, None, если у сущности отсутствует модель"""
         return None
 
+    @property
+    def key_namespace(self) -> str:
+        return 'auth'
+
     auth_service_url = settings.NGINX_URL + '/auth/api/v1'
 
     async def login(self, email: str, password: str) -> LoginResponse:
         url = self.auth_service_url + '/auth/login'
-        session = aiohttp.ClientSession()
-        async with session.post(
-            url,
-            data={'email': email, 'password': password},
-        ) as response:
-            resp = HTTPResponse(
-                body=await response.json(),
-                headers=response.headers,
-                status=response.status,
-            )
-        await session.close()
-
+        resp = await http_client.http_client.post(url, data={'email': email, 'password': password})
         return LoginResponse(**resp.body)
 
+    def token_key(self, token: str) -> str:
+        """Ключ кэша роли по токену: в ключе хранится хеш токена, а не сам токен"""
+        return self.params_key({'token': token}, kind='token')
+
     async def authenticate(self, token: str):
-        role = await self._get_cached_data(key=token)
+        key = self.token_key(token)
+        role = await self._get_cached_data(key=key)
         if role:
+            AUTH_ROLE_REQUESTS.labels('cache').inc()
             return role
         else:
+            AUTH_ROLE_REQUESTS.labels('auth_service').inc()
             url = self.auth_service_url + '/auth/authenticate'
-            session = aiohttp.ClientSession()
-            async with session.get(
-                    url,
-                    headers={'Authorization': f'Bearer {token}'},
-            ) as response:
-                resp = HTTPResponse(
-                    body=await response.json(),
-                    headers=response.headers,
-                    status=response.status,
-                )
-            await session.close()
-            user_roles = resp.body['user_roles']
-            if 'superuser' in user_roles:
-                role = UserRoles.ADMIN.value
-            elif 'subscriber' in user_roles:
-                role = UserRoles.SUBSCRIBER.value
-            else:
-                role = UserRoles.GUEST.value
-            await self._cache_data(key=token, data=role)
+            resp = await http_client.http_client.get(url, headers={'Authorization': f'Bearer {token}'})
+            resp.raise_for_status()
+            role = self.get_user_role(resp.body['user_roles'])
+            await self._cache_data(key=key, data=role)
             return role
+
+    @staticmethod
+    def get_user_role(user_roles: Iterable[str]) -> str:
+        """Роль пользователя в API по его ролям в сервисе авторизации"""
+        if 'superuser' in user_roles:
+            return UserRoles.ADMIN.value
+        elif 'subscriber' in user_roles:
+            return UserRoles.SUBSCRIBER.value
+        return UserRoles.GUEST.value
+
+    async def get_public_key(self) -> Optional[dict]:
+        """Алгоритм и открытый ключ подписи токенов, None, если токены подписаны симметричным ключом"""
+        resp = await http_client.http_client.get(self.auth_service_url + '/auth/public-key')
+        if resp.status == HTTPStatus.NOT_FOUND:
+            return None
+        resp.raise_for_status()
+        return resp.body
+
+    async def get_revoked_tokens(self) -> List[str]:
+        """Идентификаторы (jti) отозванных, но ещё не истёкших токенов"""
+        resp = await http_client.http_client.get(
+            self.auth_service_url + '/auth/revoked',
+            headers={'X-Service-Key': settings.SERVICE_API_KEY or ''},
+        )
+        resp.raise_for_status()
+        return resp.body['jti']
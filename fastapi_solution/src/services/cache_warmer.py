@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from itertools import chain, zip_longest
+from typing import Dict, List, Optional, Tuple
+
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+from elasticsearch import AsyncElasticsearch, TransportError
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.metrics import CACHE_WARM_REQUESTS
+from app.popularity import tracker
+from app.toolkits import WarmableCacheToolkit
+from services.films_toolkit import FilmsToolkit
+from services.genres_toolkit import GenresToolkit
+from services.persons_toolkit import PersonsToolkit
+
+logger = logging.getLogger(__name__)
+
+WARM_LOCK_KEY = 'cache_warm_lock'
+
+warm_task: Optional[asyncio.Task] = None
+
+
+class CacheWarmer:
+    """
+    Прогревает кэш самыми популярными сущностями и списками через обычные методы тулкитов,
+    поэтому записи получаются такими же, как при запросах пользователей, а уже закэшированные пропускаются.
+    Нагрузка на ES ограничена бюджетом: не больше CACHE_WARM_CONCURRENCY одновременных запросов,
+    не больше CACHE_WARM_RATE запросов в секунду и не дольше CACHE_WARM_TIMEOUT на весь прогрев.
+    После CACHE_WARM_MAX_ERRORS ошибок прогрев прекращается: ES, скорее всего, и так перегружен
+    """
+
+    def __init__(self, elastic: AsyncElasticsearch, redis: Redis):
+        self.redis = redis
+        self.toolkits: Dict[str, WarmableCacheToolkit] = {}
+        for toolkit in (
+            FilmsToolkit(elastic=elastic, redis=redis),
+            PersonsToolkit(elastic=elastic, redis=redis),
+            GenresToolkit(elastic=elastic, redis=redis),
+        ):
+            toolkit.track_popularity = False
+            self.toolkits[toolkit.key_namespace] = toolkit
+        self.errors = 0
+
+    async def warm(self, namespaces: Optional[List[str]] = None) -> None:
+        namespaces = [namespace for namespace in (namespaces or self.toolkits) if namespace in self.toolkits]
+        if not namespaces:
+            return
+        # прогревает только один воркер, остальные получили то же событие и пропускают его
+        if not await self.redis.set(WARM_LOCK_KEY, 1, nx=True, ex=int(settings.CACHE_WARM_TIMEOUT) + 1):
+            return
+        try:
+            entries = await self._top_entries(namespaces)
+            try:
+                await asyncio.wait_for(self._warm_entries(entries), timeout=settings.CACHE_WARM_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning('Cache warming did not fit into %s seconds', settings.CACHE_WARM_TIMEOUT)
+        finally:
+            await self.redis.delete(WARM_LOCK_KEY)
+
+    async def _top_entries(self, namespaces: List[str]) -> List[Tuple[str, dict]]:
+        """Популярные запросы всех сущностей вперемешку, чтобы при нехватке бюджета прогрелась каждая"""
+        top = [
+            [(namespace, entry) for entry in await tracker.top(self.redis, namespace, settings.CACHE_WARM_TOP_N)]
+            for namespace in namespaces
+        ]
+        return [entry for entry in chain.from_iterable(zip_longest(*top)) if entry is not None]
+
+    async def _warm_entries(self, entries: List[Tuple[str, dict]]) -> None:
+        semaphore = asyncio.Semaphore(settings.CACHE_WARM_CONCURRENCY)
+        interval = 1 / settings.CACHE_WARM_RATE
+        tasks = []
+        try:
+            for namespace, entry in entries:
+                if self.errors >= settings.CACHE_WARM_MAX_ERRORS:
+                    logger.warning('Cache warming stopped after %d errors', self.errors)
+                    break
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(self._warm_entry(namespace, entry, semaphore)))
+                await asyncio.sleep(interval)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for namespace, _ in entries[len(tasks):]:
+                CACHE_WARM_REQUESTS.labels(namespace, 'skipped').inc()
+        logger.info('Cache warmed with %d requests, %d errors', len(tasks), self.errors)
+
+    async def _warm_entry(self, namespace: str, entry: dict, semaphore: asyncio.Semaphore) -> None:
+        toolkit = self.toolkits[namespace]
+        try:
+            if entry['kind'] == 'item':
+                await toolkit.get(entry['pk'])
+            else:
+                await toolkit.warm_list(entry['params'])
+        except (TransportError, RedisError, HTTPException, KeyError, ValueError) as e:
+            self.errors += 1
+            CACHE_WARM_REQUESTS.labels(namespace, 'error').inc()
+            logger.warning('Cannot warm %s cache entry %s: %s', namespace, entry, e)
+        else:
+            CACHE_WARM_REQUESTS.labels(namespace, 'ok').inc()
+        finally:
+            semaphore.release()
+
+
+async def warm_cache(elastic: AsyncElasticsearch, redis: Redis, namespaces: Optional[List[str]] = None) -> None:
+    try:
+        await CacheWarmer(elastic=elastic, redis=redis).warm(namespaces)
+    except RedisError:
+        logger.exception('Cache warming failed')
+
+
+def schedule_cache_warming(elastic: AsyncElasticsearch, redis: Redis, namespaces: Optional[List[str]] = None) -> None:
+    """Запускает прогрев в фоне, пока идёт предыдущий прогрев, новый не запускается"""
+    global warm_task
+    if not settings.CACHE_WARM_ENABLED or (warm_task is not None and not warm_task.done()):
+        return
+    warm_task = asyncio.create_task(warm_cache(elastic=elastic, redis=redis, namespaces=namespaces))
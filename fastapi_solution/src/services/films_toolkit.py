@@ -1,21 +1,39 @@
 import uuid
-from typing import Optional, Type, Union, List
+from typing import Optional, Type, Union, List, Tuple
 
+import orjson
 from aioredis import Redis
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch, NotFoundError
 from pydantic import BaseModel
-from app.serializers.query_params_classes import PaginationDataParams
-from app.toolkits import BaseToolkit, RedisCacheToolkit
-from models.film import FilmDetailed
+from app.core.config import settings
+from app.enums import FilmFacet
+from app.query_builder import SearchQueryBuilder, normalize_query
+from app.serializers.query_params_classes import FilmFilterParams, PaginationDataParams
+from app.toolkits import NOT_FOUND, BaseToolkit, WarmableCacheToolkit
+from models.film import Film, FilmDetailed
 
 FILM_CACHE_EXPIRE_IN_SECONDS = 60 * 5
 
+SEARCH_FIELDS = [
+    'title^5',
+    'description^4',
+    'genre^3',
+    '*_names^2',
+]
 
-class FilmsToolkit(BaseToolkit, RedisCacheToolkit):
+# агрегации ES, из которых строятся фасеты
+FACET_AGGREGATIONS = {
+    FilmFacet.GENRE: lambda: {'terms': {'field': 'genre_ids', 'size': settings.FACETS_GENRE_SIZE}},
+    FilmFacet.RATING: lambda: {'histogram': {'field': 'imdb_rating', 'interval': 1, 'min_doc_count': 1}},
+    FilmFacet.YEAR: lambda: {'histogram': {'field': 'year', 'interval': 10, 'min_doc_count': 1}},
+}
+
+
+class FilmsToolkit(BaseToolkit, WarmableCacheToolkit):
 
     def __init__(self, elastic: AsyncElasticsearch, redis: Redis):
         BaseToolkit.__init__(self, elastic)
-        RedisCacheToolkit.__init__(self, redis)
+        WarmableCacheToolkit.__init__(self, redis)
 
     @property
     def entity_name(self) -> str:
@@ -37,73 +55,224 @@ class FilmsToolkit(BaseToolkit, RedisCacheToolkit):
         """Класс исключения, вызываемый при ошибке поиска экземпляра модели в get"""
         return Exception('Не удалось получить данные о фильме по указанным параметрам')
 
+    @property
+    def list_model(self) -> Type[BaseModel]:
+        """В списках фильмов отдаются только id, title и imdb_rating"""
+        return Film
+
     async def list(
         self,
         pagination_data: PaginationDataParams,
         query: str = None,
-        genre: str = None,
-    ) -> Optional[List[FilmDetailed]]:
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Optional[List[Film]]:
 
-        params = {
+        params = self._list_params(pagination_data=pagination_data, query=query, filters=filters)
+        body = self._search_body(query=query, filters=filters)
+        films = await self.get_cached_instances(
+            params,
+            refresh=lambda: self._load_list(params=params, pagination_data=pagination_data, body=body),
+        )
+        if films is not None:
+            return films
+        else:
+            return await self.load_once(
+                key=self.params_key(params),
+                loader=lambda: self._load_list(params=params, pagination_data=pagination_data, body=body),
+                reader=lambda: self.get_cached_instances(params),
+            )
+
+    @staticmethod
+    def _search_body(query: str = None, filters: Optional[FilmFilterParams] = None) -> Optional[dict]:
+        """
+        Релевантность считается только по полнотекстовому запросу,
+        жанр, рейтинг и год применяются в контексте фильтра и поэтому совместимы с поиском
+        """
+        builder = SearchQueryBuilder().match(query, SEARCH_FIELDS)
+        if filters is not None:
+            builder.term('genre_ids', filters.genre)
+            builder.range('imdb_rating', gte=filters.rating_from, lte=filters.rating_to)
+            builder.range('year', gte=filters.year_from, lte=filters.year_to)
+        return builder.build()
+
+    async def list_by_cursor(
+        self,
+        pagination_data: PaginationDataParams,
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Tuple[List[Film], Optional[str]]:
+        return await super().list_by_cursor(
+            pagination_data=pagination_data,
+            body=self._search_body(query=query, filters=filters),
+        )
+
+    def _list_params(
+        self,
+        pagination_data: PaginationDataParams,
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> dict:
+        return {
             'page_size': pagination_data.page_size,
             'page': pagination_data.page,
             'sort': pagination_data.sort,
-            'genre': genre,
+            **self._filter_params(query=query, filters=filters),
+        }
+
+    def list_request(
+        self,
+        pagination_data: PaginationDataParams,
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Tuple[dict, dict]:
+        """Параметры ключа кэша страницы списка фильмов и тело её запроса к ES"""
+        return (
+            self._list_params(pagination_data=pagination_data, query=query, filters=filters),
+            self.search_request(pagination_data, self._search_body(query=query, filters=filters)),
+        )
+
+    def _filter_params(self, query: str = None, filters: Optional[FilmFilterParams] = None) -> dict:
+        params = {
+            'genre': filters.genre if filters is not None else None,
             'query': query,
             'entity_name': self.entity_name
         }
-        films = await self.get_cached_instances(params)
-        body = None
+        if filters is not None:
+            # диапазоны добавляются в ключ только если заданы, чтобы ключи прежних запросов не изменились
+            for name in ('rating_from', 'rating_to', 'year_from', 'year_to'):
+                if (value := getattr(filters, name)) is not None:
+                    params[name] = value
+        return params
+
+    async def list_serialized(
+        self,
+        response_model: Type[BaseModel],
+        pagination_data: PaginationDataParams,
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Optional[Union[str, bytes]]:
+        """Список фильмов в виде готового тела ответа, сериализованного по response_model"""
+        return await self.get_serialized_instances(
+            params=self._list_params(pagination_data=pagination_data, query=query, filters=filters),
+            response_model=response_model,
+            loader=lambda: self.list(pagination_data=pagination_data, query=query, filters=filters),
+            fetch=lambda: self._load_list(
+                params=self._list_params(pagination_data=pagination_data, query=query, filters=filters),
+                pagination_data=pagination_data,
+                body=self._search_body(query=query, filters=filters),
+            ),
+        )
+
+    async def warm_list(self, params: dict) -> None:
+        await self.list_serialized(
+            response_model=self.list_model,
+            pagination_data=self.pagination_from_params(params),
+            query=params.get('query'),
+            filters=FilmFilterParams(
+                genre=params.get('genre'),
+                rating_from=params.get('rating_from'),
+                rating_to=params.get('rating_to'),
+                year_from=params.get('year_from'),
+                year_to=params.get('year_to'),
+            ),
+        )
+
+    async def facets(
+        self,
+        facets: List[FilmFacet],
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Tuple[Union[str, bytes], bool]:
+        """
+        Фасеты по фильмам, подходящим под запрос и фильтры, в виде готового тела ответа
+        {"<фасет>": [{"key": ..., "count": ...}, ...], ...} и признак того, что оно полное.
+        Все фасеты считаются одним запросом с size 0, который ES кэширует в shard request cache,
+        тело дополнительно кэшируется в Redis по нормализованному запросу.
+        Пока индекса нет, фасеты отдаются пустыми и не кэшируются
+        """
+        facets = sorted(set(facets))
+        query = normalize_query(query)
+        params = {**self._filter_params(query=query, filters=filters), 'facets': facets}
+        key = self.params_key(params, kind='facets')
+
+        local_cache = self.local_cache
+        if local_cache is not None and (body := local_cache.get(key)) is not None:
+            return body, True
+        body = await self._get_cached_data(
+            key,
+            refresh=lambda: self._load_facets(key=key, facets=facets, query=query, filters=filters),
+        )
+        complete = True
+        if body is None:
+            body, complete = await self.load_once(
+                key=key,
+                loader=lambda: self._load_facets(key=key, facets=facets, query=query, filters=filters),
+            )
+        if complete and local_cache is not None:
+            local_cache.set(key, body, size=len(body))
+        return body, complete
+
+    async def _load_facets(
+        self,
+        key: str,
+        facets: List[FilmFacet],
+        query: str = None,
+        filters: Optional[FilmFilterParams] = None,
+    ) -> Tuple[bytes, bool]:
+        body = {
+            **(self._search_body(query=query, filters=filters) or {}),
+            'size': 0,
+            'aggs': {facet.value: FACET_AGGREGATIONS[facet]() for facet in facets},
+        }
+        try:
+            data = await self.elastic.search(index=self.entity_name, body=body, request_cache='true')
+        except NotFoundError:
+            return orjson.dumps({facet.value: [] for facet in facets}), False
+        aggregations = data.get('aggregations', {})
+        result = orjson.dumps({
+            facet.value: [
+                {'key': bucket['key'], 'count': bucket['doc_count']}
+                for bucket in aggregations.get(facet.value, {}).get('buckets', [])
+            ]
+            for facet in facets
+        })
+        await self._cache_data(key=key, data=result)
+        return result, True
+
+    async def _load_list(
+        self,
+        params: dict,
+        pagination_data: PaginationDataParams,
+        body: Optional[dict] = None,
+    ) -> Optional[List[Film]]:
+        films = await super().list(pagination_data=pagination_data, body=body)
         if films is not None:
+            await self.cache_instances_by_params(params, films)
             return films
         else:
-            if genre:
-                body = {
-                    'query': {
-                        'nested': {
-                            'path': "genres",
-                            'query': {
-                                'bool': {
-                                    'must': [
-                                        {
-                                            'match': {
-                                                'genres.id': genre
-                                            }
-                                        }
-                                    ]
-                                }
-                            }
-                        }
-                    }
-                }
-
-            search_fields = [
-                'title^5',
-                'description^4',
-                'genre^3',
-                '*_names^2',
-            ]
-            if query:
-                body = {
-                    "query": {
-                        "multi_match": {
-                            "query": query,
-                            "fields": search_fields,
-                        }
-                    }
-                }
-            films = await super().list(pagination_data=pagination_data, body=body)
-            if films is not None:
-                await self.cache_instances_by_params(params, films)
-                return films
-            else:
-                return None
+            return None
+
+    async def get_many(self, pks: List[Union[str, uuid.UUID]]) -> List[FilmDetailed]:
+        pks = [pk for pk in pks if self.may_exist(pk)]
+        return await self.get_instances_by_pks(pks=pks, loader=self.mget)
 
     async def get(self, pk: Union[str, uuid.UUID]):
-        film = await self.get_cached_instance_by_pk(pk=pk)
+        if not self.may_exist(pk):
+            return None
+        self.record_hit({'kind': 'item', 'pk': str(pk)})
+        film = await self.get_cached_instance_by_pk(pk=pk, refresh=lambda: self._load_instance(pk=pk))
+        if film is None:
+            film = await self.load_once(
+                key=self.instance_key(pk),
+                loader=lambda: self._load_instance(pk=pk),
+                reader=lambda: self.get_cached_instance_by_pk(pk=pk),
+            )
+        return film if film is not NOT_FOUND else None
+
+    async def _load_instance(self, pk: Union[str, uuid.UUID]):
+        film = await super().get(pk=pk)
         if film is not None:
-            return film
-        else:
-            film = await super().get(pk=pk)
             await self.cache_instance(film)
-            return film
+        else:
+            await self.cache_missing_instances([pk])
+        return film
@@ -1,21 +1,21 @@
 import uuid
 
-from typing import Type, Optional, Union
+from typing import Type, Optional, Union, List, Tuple
 
 from aioredis import Redis
 from elasticsearch import AsyncElasticsearch
 from pydantic import BaseModel
 
 from app.serializers.query_params_classes import PaginationDataParams
-from app.toolkits import BaseToolkit, RedisCacheToolkit
+from app.toolkits import NOT_FOUND, BaseToolkit, WarmableCacheToolkit
 from models.genre import Genre
 
 
-class GenresToolkit(BaseToolkit, RedisCacheToolkit):
+class GenresToolkit(BaseToolkit, WarmableCacheToolkit):
 
     def __init__(self, elastic: AsyncElasticsearch, redis: Redis):
         BaseToolkit.__init__(self, elastic)
-        RedisCacheToolkit.__init__(self, redis)
+        WarmableCacheToolkit.__init__(self, redis)
 
     @property
     def entity_name(self) -> str:
@@ -37,32 +37,81 @@ class GenresToolkit(BaseToolkit, RedisCacheToolkit):
         """Класс исключения, вызываемый при ошибке поиска экземпляра модели в get"""
         return Exception('Не удалось получить данные о жанре по указанным параметрам')
 
+    async def get_many(self, pks: List[Union[str, uuid.UUID]]) -> List[Genre]:
+        pks = [pk for pk in pks if self.may_exist(pk)]
+        return await self.get_instances_by_pks(pks=pks, loader=self.mget)
+
     async def get(self, pk: Union[str, uuid.UUID]):
-        genre = await self.get_cached_instance_by_pk(pk=pk)
+        if not self.may_exist(pk):
+            return None
+        self.record_hit({'kind': 'item', 'pk': str(pk)})
+        genre = await self.get_cached_instance_by_pk(pk=pk, refresh=lambda: self._load_instance(pk=pk))
+        if genre is None:
+            genre = await self.load_once(
+                key=self.instance_key(pk),
+                loader=lambda: self._load_instance(pk=pk),
+                reader=lambda: self.get_cached_instance_by_pk(pk=pk),
+            )
+        return genre if genre is not NOT_FOUND else None
+
+    async def _load_instance(self, pk: Union[str, uuid.UUID]):
+        genre = await super().get(pk=pk)
         if genre is not None:
-            return genre
+            await self.cache_instance(genre)
         else:
-            genre = await super().get(pk=pk)
-            if genre is not None:
-                await self.cache_instance(genre)
-                return genre
-            else:
-                return None
+            await self.cache_missing_instances([pk])
+        return genre
 
     async def list(self, pagination_data: PaginationDataParams, body: Optional[dict] = None):
-        params = {
+        params = self._list_params(pagination_data=pagination_data)
+        genres = await self.get_cached_instances(
+            params=params,
+            refresh=lambda: self._load_list(params=params, pagination_data=pagination_data),
+        )
+        if genres is not None:
+            return genres
+        else:
+            return await self.load_once(
+                key=self.params_key(params),
+                loader=lambda: self._load_list(params=params, pagination_data=pagination_data),
+                reader=lambda: self.get_cached_instances(params=params),
+            )
+
+    def _list_params(self, pagination_data: PaginationDataParams) -> dict:
+        return {
             'page_size': pagination_data.page_size,
             'page': pagination_data.page,
             'sort': pagination_data.sort,
             'entity_name': self.entity_name
         }
-        genres = await self.get_cached_instances(params=params)
+
+    def list_request(self, pagination_data: PaginationDataParams) -> Tuple[dict, dict]:
+        """Параметры ключа кэша страницы списка жанров и тело её запроса к ES"""
+        return self._list_params(pagination_data=pagination_data), self.search_request(pagination_data)
+
+    async def list_serialized(
+        self,
+        response_model: Type[BaseModel],
+        pagination_data: PaginationDataParams,
+    ) -> Optional[Union[str, bytes]]:
+        """Список жанров в виде готового тела ответа, сериализованного по response_model"""
+        return await self.get_serialized_instances(
+            params=self._list_params(pagination_data=pagination_data),
+            response_model=response_model,
+            loader=lambda: self.list(pagination_data=pagination_data),
+            fetch=lambda: self._load_list(
+                params=self._list_params(pagination_data=pagination_data),
+                pagination_data=pagination_data,
+            ),
+        )
+
+    async def warm_list(self, params: dict) -> None:
+        await self.list_serialized(response_model=self.list_model, pagination_data=self.pagination_from_params(params))
+
+    async def _load_list(self, params: dict, pagination_data: PaginationDataParams):
+        genres = await super().list(pagination_data=pagination_data)
         if genres is not None:
+            await self.cache_instances_by_params(params, genres)
             return genres
         else:
-            genres = await super().list(pagination_data=pagination_data)
-            if genres is not None:
-                await self.cache_instances_by_params(params, genres)
-                return genres
-            else:
-                return None
+            return None
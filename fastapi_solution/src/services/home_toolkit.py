@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import logging
+from typing import List, NamedTuple, Optional, Type, Union
+
+import orjson
+from aioredis import Redis
+from elasticsearch import AsyncElasticsearch
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.serializers.query_params_classes import FilmFilterParams, PaginationDataParams
+from models.film import Film
+from models.genre import Genre
+from models.home import HomeSection, HomeSectionEntity
+from services.films_toolkit import FilmsToolkit
+from services.genres_toolkit import GenresToolkit
+
+logger = logging.getLogger(__name__)
+
+
+class SectionRequest(NamedTuple):
+    toolkit: Union[FilmsToolkit, GenresToolkit]
+    response_model: Type[BaseModel]
+    key: str
+    search: dict
+
+
+class HomeToolkit:
+    """
+    Собирает разделы главной страницы одним ответом. Тело каждого раздела кэшируется по тому же ключу,
+    что и соответствующая страница /films/ или /genres/, все промахи загружаются одним запросом _msearch.
+    """
+
+    def __init__(self, elastic: AsyncElasticsearch, redis: Redis):
+        self.elastic = elastic
+        self.redis = redis
+        self.films_toolkit = FilmsToolkit(elastic=elastic, redis=redis)
+        self.genres_toolkit = GenresToolkit(elastic=elastic, redis=redis)
+
+    def _section_request(self, section: HomeSection) -> SectionRequest:
+        pagination_data = PaginationDataParams(sort=section.sort, page_size=section.size, page=1, cursor=None)
+        if section.entity == HomeSectionEntity.GENRES:
+            toolkit, response_model = self.genres_toolkit, Genre
+            params, search = toolkit.list_request(pagination_data=pagination_data)
+        else:
+            toolkit, response_model = self.films_toolkit, Film
+            filters = FilmFilterParams(
+                genre=section.genre, rating_from=None, rating_to=None, year_from=None, year_to=None,
+            )
+            params, search = toolkit.list_request(pagination_data=pagination_data, filters=filters)
+        return SectionRequest(
+            toolkit=toolkit,
+            response_model=response_model,
+            key=toolkit.response_key(params, response_model),
+            search=search,
+        )
+
+    async def get_sections(self, sections: List[HomeSection]) -> bytes:
+        """Тело ответа вида {"<имя раздела>": [...], ...}"""
+        requests = [self._section_request(section) for section in sections]
+        bodies = await self._get_cached_bodies(requests)
+        missing = [i for i, body in enumerate(bodies) if body is None]
+        if missing:
+            loaded = await self._load_bodies([requests[i] for i in missing])
+            for i, body in zip(missing, loaded):
+                bodies[i] = body
+        parts = [
+            orjson.dumps(section.name) + b':' + (body.encode() if isinstance(body, str) else body or b'[]')
+            for section, body in zip(sections, bodies)
+        ]
+        return b'{' + b','.join(parts) + b'}'
+
+    async def _get_cached_bodies(self, requests: List[SectionRequest]) -> List[Optional[Union[str, bytes]]]:
+        """Тела разделов из кэша страниц списков: устаревшие тела отдаются и обновляются в фоне так же, как у них"""
+        return list(await asyncio.gather(*[
+            request.toolkit.get_cached_body(request.key, refresh=functools.partial(self._refresh_body, request))
+            for request in requests
+        ]))
+
+    async def _refresh_body(self, request: SectionRequest) -> Optional[bytes]:
+        (body,) = await self._load_bodies([request])
+        return body
+
+    async def _load_bodies(self, requests: List[SectionRequest]) -> List[Optional[bytes]]:
+        searches = []
+        for request in requests:
+            searches += [{'index': request.toolkit.entity_name}, request.search]
+        data = await self.elastic.msearch(body=searches)
+        loads = []
+        for request, response in zip(requests, data['responses']):
+            if 'error' in response:
+                logger.error('Home section query failed: %s', response['error'])
+                instances = []
+            else:
+                instances = request.toolkit.build_list(response['hits']['hits'])
+            loads.append(self._cache_section(request, instances))
+        return list(await asyncio.gather(*loads))
+
+    @staticmethod
+    async def _cache_section(request: SectionRequest, instances: List[BaseModel]) -> Optional[bytes]:
+        body = await request.toolkit.cache_body(request.key, instances, request.response_model)
+        if body is not None and settings.CACHE_WRITE_THROUGH_ENABLED and request.toolkit.lists_hold_full_documents:
+            await request.toolkit.cache_instances(instances)
+        return body
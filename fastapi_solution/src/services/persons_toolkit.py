@@ -1,21 +1,21 @@
 import uuid
-from typing import Type, Optional, Union, List
+from typing import Type, Optional, Union, List, Tuple
 
 from aioredis import Redis
 from elasticsearch import NotFoundError, AsyncElasticsearch
 from pydantic import BaseModel
 
 from app.serializers.query_params_classes import PaginationDataParams
-from app.toolkits import BaseToolkit, RedisCacheToolkit
+from app.toolkits import NOT_FOUND, BaseToolkit, WarmableCacheToolkit
 from models.film import Film
 from models.person import Person
 
 
-class PersonsToolkit(BaseToolkit, RedisCacheToolkit):
+class PersonsToolkit(BaseToolkit, WarmableCacheToolkit):
 
     def __init__(self, elastic: AsyncElasticsearch, redis: Redis):
         BaseToolkit.__init__(self, elastic)
-        RedisCacheToolkit.__init__(self, redis)
+        WarmableCacheToolkit.__init__(self, redis)
 
     @property
     def entity_name(self) -> str:
@@ -37,51 +37,123 @@ class PersonsToolkit(BaseToolkit, RedisCacheToolkit):
         """Класс исключения, вызываемый при ошибке поиска экземпляра модели в get"""
         return Exception('Не удалось получить данные о человеке по указанным параметрам')
 
+    async def get_many(self, pks: List[Union[str, uuid.UUID]]) -> List[Person]:
+        pks = [pk for pk in pks if self.may_exist(pk)]
+        return await self.get_instances_by_pks(pks=pks, loader=self.mget)
+
     async def get(self, pk: Union[str, uuid.UUID]):
-        person = await self.get_cached_instance_by_pk(pk=pk)
+        if not self.may_exist(pk):
+            return None
+        self.record_hit({'kind': 'item', 'pk': str(pk)})
+        person = await self.get_cached_instance_by_pk(pk=pk, refresh=lambda: self._load_instance(pk=pk))
+        if person is None:
+            person = await self.load_once(
+                key=self.instance_key(pk),
+                loader=lambda: self._load_instance(pk=pk),
+                reader=lambda: self.get_cached_instance_by_pk(pk=pk),
+            )
+        return person if person is not NOT_FOUND else None
+
+    async def _load_instance(self, pk: Union[str, uuid.UUID]):
+        person = await super().get(pk=pk)
         if person is not None:
-            return person
-        else:
-            person = await super().get(pk=pk)
             await self.cache_instance(person)
-            return person
+        else:
+            await self.cache_missing_instances([pk])
+        return person
 
     async def list(
             self,
             pagination_data: PaginationDataParams,
             query: str = None,
     ) -> Optional[List[Person]]:
-        params = {
+        params = self._list_params(pagination_data=pagination_data, query=query)
+        body = self._search_body(query=query)
+        persons = await self.get_cached_instances(
+            params=params,
+            refresh=lambda: self._load_list(params=params, pagination_data=pagination_data, body=body),
+        )
+        if persons is not None:
+            return persons
+        else:
+            return await self.load_once(
+                key=self.params_key(params),
+                loader=lambda: self._load_list(params=params, pagination_data=pagination_data, body=body),
+                reader=lambda: self.get_cached_instances(params=params),
+            )
+
+    @staticmethod
+    def _search_body(query: str = None) -> Optional[dict]:
+        search_fields = [
+                'name^2',
+                'roles',
+            ]
+        return {
+            "query": {
+                "multi_match": {
+                    "query": query,
+                    "fields": search_fields,
+                }
+            }
+        } if query is not None else None
+
+    async def list_by_cursor(
+            self,
+            pagination_data: PaginationDataParams,
+            query: str = None,
+    ) -> Tuple[List[Person], Optional[str]]:
+        return await super().list_by_cursor(pagination_data=pagination_data, body=self._search_body(query=query))
+
+    def _list_params(self, pagination_data: PaginationDataParams, query: str = None) -> dict:
+        return {
             'page_size': pagination_data.page_size,
             'page': pagination_data.page,
             'sort': pagination_data.sort,
             'query': query,
             'entity_name': self.entity_name
         }
-        persons = await self.get_cached_instances(params=params)
+
+    async def list_serialized(
+            self,
+            response_model: Type[BaseModel],
+            pagination_data: PaginationDataParams,
+            query: str = None,
+    ) -> Optional[Union[str, bytes]]:
+        """Список персон в виде готового тела ответа, сериализованного по response_model"""
+        return await self.get_serialized_instances(
+            params=self._list_params(pagination_data=pagination_data, query=query),
+            response_model=response_model,
+            loader=lambda: self.list(pagination_data=pagination_data, query=query),
+            fetch=lambda: self._load_list(
+                params=self._list_params(pagination_data=pagination_data, query=query),
+                pagination_data=pagination_data,
+                body=self._search_body(query=query),
+            ),
+        )
+
+    async def warm_list(self, params: dict) -> None:
+        await self.list_serialized(
+            response_model=self.list_model,
+            pagination_data=self.pagination_from_params(params),
+            query=params.get('query'),
+        )
+
+    async def _load_list(
+            self,
+            params: dict,
+            pagination_data: PaginationDataParams,
+            body: Optional[dict] = None,
+    ) -> Optional[List[Person]]:
+        persons = await super().list(pagination_data=pagination_data, body=body)
         if persons is not None:
+            await self.cache_instances_by_params(params, persons)
             return persons
         else:
-            search_fields = [
-                    'name^2',
-                    'roles',
-                ]
-            body = {
-                "query": {
-                    "multi_match": {
-                        "query": query,
-                        "fields": search_fields,
-                    }
-                }
-            } if query is not None else None
-            persons = await super().list(pagination_data=pagination_data, body=body)
-            if persons is not None:
-                await self.cache_instances_by_params(params, persons)
-                return persons
-            else:
-                return None
+            return None
 
     async def get_persons_films(self, pk: Union[str, uuid.UUID]) -> Optional[List[Film]]:
+        if not self.may_exist(pk):
+            return None
         try:
             doc = await self.elastic.get(self.entity_name, pk)
         except NotFoundError:
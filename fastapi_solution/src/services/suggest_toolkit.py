@@ -0,0 +1,100 @@
+import logging
+from typing import NamedTuple, Optional, Tuple, Type
+
+import orjson
+from elasticsearch import AsyncElasticsearch, TransportError
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.local_cache import LocalCache, get_local_cache
+from app.query_builder import normalize_query
+from app.single_flight import single_flight
+from models.suggest import FilmSuggestion, PersonSuggestion
+
+logger = logging.getLogger(__name__)
+
+
+class SuggestSource(NamedTuple):
+    name: str
+    index: str
+    field: str
+    model: Type[BaseModel]
+
+
+SUGGEST_SOURCES = (
+    SuggestSource(name='films', index='movies', field='title', model=FilmSuggestion),
+    SuggestSource(name='persons', index='persons', field='name', model=PersonSuggestion),
+)
+
+
+class SuggestToolkit:
+    """
+    Подсказки для автодополнения по подполям search_as_you_type названий фильмов и имён персон.
+    Все источники опрашиваются одним запросом _msearch, из документов читаются только id и выводимое поле.
+    Ответы кэшируются в памяти процесса по нормализованному префиксу,
+    ответы, не уложившиеся в SUGGEST_TIMEOUT, отдаются пустыми и не кэшируются ни здесь, ни в кэше ответов API.
+    """
+
+    def __init__(self, elastic: AsyncElasticsearch):
+        self.elastic = elastic
+
+    @property
+    def local_cache(self) -> Optional[LocalCache]:
+        return get_local_cache('suggest') if settings.LOCAL_CACHE_ENABLED else None
+
+    async def suggest(self, query: str, size: int) -> Tuple[bytes, bool]:
+        """
+        Тело ответа вида {"films": [{"id", "title"}, ...], "persons": [{"id", "name"}, ...]}
+        и признак того, что все источники ответили полностью
+        """
+        query = normalize_query(query)
+        if query is None:
+            return self._empty_body(), True
+        key = f'{size}:{query}'
+        local_cache = self.local_cache
+        if local_cache is not None and (body := local_cache.get(key)) is not None:
+            return body, True
+        body, complete = await single_flight.do(f'suggest:{key}', lambda: self._load(query, size))
+        if complete and local_cache is not None:
+            local_cache.set(key, body, size=len(body))
+        return body, complete
+
+    async def _load(self, query: str, size: int) -> Tuple[bytes, bool]:
+        """Тело ответа и признак того, что все источники ответили полностью"""
+        searches = []
+        for source in SUGGEST_SOURCES:
+            field = f'{source.field}.suggest'
+            searches += [
+                {'index': source.index},
+                {
+                    'query': {
+                        'multi_match': {
+                            'query': query,
+                            'type': 'bool_prefix',
+                            'operator': 'and',
+                            'fields': [field, f'{field}._2gram', f'{field}._3gram'],
+                        }
+                    },
+                    'size': size,
+                    '_source': [source.field],
+                    'timeout': f'{int(settings.SUGGEST_TIMEOUT * 1000)}ms',
+                },
+            ]
+        try:
+            data = await self.elastic.msearch(body=searches, request_timeout=settings.SUGGEST_TIMEOUT)
+        except TransportError as e:
+            logger.warning('Suggest query failed: %s', e)
+            return self._empty_body(), False
+        result, complete = {}, True
+        for source, response in zip(SUGGEST_SOURCES, data['responses']):
+            if 'error' in response or response.get('timed_out'):
+                complete = False
+            hits = response.get('hits', {}).get('hits', [])
+            result[source.name] = [
+                source.model(uuid=hit['_id'], **hit['_source']).dict(by_alias=True) for hit in hits
+            ]
+        return orjson.dumps(result), complete
+
+    @staticmethod
+    def _empty_body() -> bytes:
+        return orjson.dumps({source.name: [] for source in SUGGEST_SOURCES})
@@ -0,0 +1,59 @@
+"""
+Обучает словарь zstd для сжатия кэша на документах фильмов и персон из Elasticsearch.
+Путь к полученному файлу указывается в CACHE_ZSTD_DICT_PATH.
+
+    python train_cache_dictionary.py /app/cache.dict --samples 5000
+"""
+import argparse
+import asyncio
+
+import zstandard
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_scan
+
+from app.connections.elastic import get_hosts
+from models.film import Film, FilmDetailed
+from models.person import Person
+
+SOURCES = (('movies', FilmDetailed, Film), ('persons', Person, Person))
+LIST_PAGE_SIZE = 50
+
+
+async def collect_samples(es: AsyncElasticsearch, limit: int) -> list[bytes]:
+    """Образцы в том виде, в котором они попадают в кэш: отдельные сущности и страницы списков"""
+    samples = []
+    for index, entity_model, list_model in SOURCES:
+        page = []
+        count = 0
+        async for doc in async_scan(es, index=index, query={'query': {'match_all': {}}}):
+            instance = entity_model(uuid=doc['_id'], **doc['_source'])
+            samples.append(instance.json(by_alias=True).encode())
+            page.append(list_model.parse_obj(instance.dict(by_alias=True)).json(by_alias=True))
+            if len(page) == LIST_PAGE_SIZE:
+                samples.append(('[' + ','.join(page) + ']').encode())
+                page = []
+            count += 1
+            if count >= limit:
+                break
+    return samples
+
+
+async def main(path: str, limit: int, size: int) -> None:
+    es = AsyncElasticsearch(hosts=get_hosts())
+    try:
+        samples = await collect_samples(es, limit)
+    finally:
+        await es.close()
+    dictionary = zstandard.train_dictionary(size, samples)
+    with open(path, 'wb') as f:
+        f.write(dictionary.as_bytes())
+    print(f'Dictionary {dictionary.dict_id()} trained on {len(samples)} samples: {path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train zstd dictionary for Redis cache entries')
+    parser.add_argument('path', help='Output dictionary file')
+    parser.add_argument('--samples', type=int, default=5000, help='Documents of each index to sample')
+    parser.add_argument('--size', type=int, default=64 * 1024, help='Dictionary size in bytes')
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.samples, args.size))
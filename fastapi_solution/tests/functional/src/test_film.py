@@ -3,8 +3,8 @@ from http import HTTPStatus
 
 import pytest
 
-from testdata.es_data import movies_data
-from utils.helpers import make_get_request
+from testdata.es_data import genre_ids, movies_data
+from utils.helpers import decode_cache_value, get_item_cache_key, get_list_cache_key, make_get_request
 
 
 @pytest.mark.asyncio
@@ -39,6 +39,45 @@ async def test_film_pagination():
     assert len(response.body) == 15
 
 
+@pytest.mark.asyncio
+async def test_film_genre_filter():
+    response = await make_get_request('/films/', params={'filter[genre]': genre_ids['Western']})
+    assert response.status == HTTPStatus.OK
+    assert len(response.body) == 20
+    assert all(film['title'] == 'Django' for film in response.body)
+
+
+@pytest.mark.asyncio
+async def test_film_range_filters():
+    response = await make_get_request('/films/', params={
+        'filter[genre]': genre_ids['Action'],
+        'filter[rating_from]': 6,
+        'filter[year_from]': 2000,
+        'filter[year_to]': 2020,
+    })
+    assert response.status == HTTPStatus.OK
+    assert len(response.body) == 20
+    assert all(film['imdb_rating'] == 8.5 for film in response.body)
+
+
+@pytest.mark.asyncio
+async def test_film_invalid_range_filter():
+    response = await make_get_request('/films/', params={'filter[rating_from]': 8, 'filter[rating_to]': 5})
+    assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_film_facets():
+    response = await make_get_request('/films/facets', params={'filter[genre]': genre_ids['Western']})
+    assert response.status == HTTPStatus.OK
+    assert {bucket['key']: bucket['count'] for bucket in response.body['genre']} == {
+        genre_ids['Action']: 20,
+        genre_ids['Western']: 20,
+    }
+    assert response.body['rating'] == [{'key': 5.0, 'count': 20}]
+    assert response.body['year'] == [{'key': 1990.0, 'count': 20}]
+
+
 @pytest.mark.asyncio
 async def test_films_endpoint_cache(redis_client):
     page_size = 15
@@ -50,13 +89,14 @@ async def test_films_endpoint_cache(redis_client):
         'query': None,
         'entity_name': 'movies'
     }
-    key = json.dumps(params, sort_keys=True)
+    key = await get_list_cache_key(redis_client, 'movies', params)
 
     response = await make_get_request('/films/', params={'page[size]': page_size})
     data = await redis_client.get(key)
 
     assert response.status == HTTPStatus.OK
     assert data
+    assert all(set(film) == {'id', 'title', 'imdb_rating'} for film in json.loads(decode_cache_value(data)))
 
 
 @pytest.mark.asyncio
@@ -65,7 +105,7 @@ async def test_get_film(redis_client):
     film_id = original_film['id']
 
     response = await make_get_request(f'/films/{film_id}')
-    data = await redis_client.get(film_id)
+    data = await redis_client.get(await get_item_cache_key(redis_client, 'movies', film_id))
 
     film = response.body
     assert response.status == HTTPStatus.OK
@@ -78,3 +118,15 @@ async def test_get_film(redis_client):
     assert film['writers'] == original_film['writers']
     assert film['directors'] == original_film['directors']
     assert data
+
+
+@pytest.mark.asyncio
+async def test_films_batch(redis_client):
+    film_ids = [movies_data[25]['id'], movies_data[0]['id']]
+
+    response = await make_get_request('/films/batch', params=[('ids', film_id) for film_id in film_ids])
+    data = await redis_client.mget([await get_item_cache_key(redis_client, 'movies', pk) for pk in film_ids])
+
+    assert response.status == HTTPStatus.OK
+    assert [film['id'] for film in response.body] == film_ids
+    assert all(data)
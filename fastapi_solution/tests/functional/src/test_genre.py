@@ -1,4 +1,3 @@
-import json
 import random
 import uuid
 from http import HTTPStatus
@@ -6,7 +5,7 @@ from http import HTTPStatus
 import pytest
 
 from testdata.es_data import genres_data
-from utils.helpers import make_get_request
+from utils.helpers import get_item_cache_key, get_list_cache_key, make_get_request
 
 
 @pytest.mark.asyncio
@@ -41,7 +40,7 @@ async def test_get_one_genre(redis_client):
     genre_id = genre.get('id')
 
     response = await make_get_request(f'/genres/{genre_id}/')
-    cache = await redis_client.get(genre_id)
+    cache = await redis_client.get(await get_item_cache_key(redis_client, 'genres', genre_id))
 
     assert response.status == HTTPStatus.OK
     assert response.body.get('id') == genre_id
@@ -90,7 +89,7 @@ async def test_genres_endpoint_cache(redis_client):
         'sort': '',
         'entity_name': 'genres'
     }
-    key = json.dumps(params, sort_keys=True)
+    key = await get_list_cache_key(redis_client, 'genres', params)
 
     response = await make_get_request(
         '/genres/', params={'page[size]': page_size}
@@ -99,3 +98,24 @@ async def test_genres_endpoint_cache(redis_client):
 
     assert response.status == HTTPStatus.OK
     assert cache
+
+
+@pytest.mark.asyncio
+async def test_genres_cursor_pagination():
+    page_size = 15
+    genre_ids = []
+    cursor = '*'
+    while cursor:
+        response = await make_get_request('/genres/', params={'page[size]': page_size, 'page[cursor]': cursor})
+        assert response.status == HTTPStatus.OK
+        genre_ids.extend(genre['id'] for genre in response.body)
+        cursor = response.headers.get('X-Next-Cursor')
+
+    assert len(genre_ids) == len(set(genre_ids))
+    assert set(genre['id'] for genre in genres_data) <= set(genre_ids)
+
+
+@pytest.mark.asyncio
+async def test_genres_invalid_cursor():
+    response = await make_get_request('/genres/', params={'page[cursor]': 'invalid'})
+    assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
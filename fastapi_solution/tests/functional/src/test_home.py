@@ -0,0 +1,27 @@
+from http import HTTPStatus
+
+import pytest
+
+from utils.helpers import make_get_request, make_post_request
+
+
+@pytest.mark.asyncio
+async def test_home_sections():
+    sections = [
+        {'name': 'top_rated', 'sort': '-imdb_rating', 'size': 5},
+        {'name': 'genres', 'entity': 'genres', 'size': 10},
+    ]
+    response = await make_post_request('/home/', json=sections)
+
+    assert response.status == HTTPStatus.OK
+    assert set(response.body) == {'top_rated', 'genres'}
+    top_rated = await make_get_request('/films/', params={'sort': '-imdb_rating', 'page[size]': 5})
+    assert response.body['top_rated'] == top_rated.body
+    genres = await make_get_request('/genres/', params={'page[size]': 10})
+    assert response.body['genres'] == genres.body
+
+
+@pytest.mark.asyncio
+async def test_home_duplicate_sections():
+    response = await make_post_request('/home/', json=[{'name': 'top'}, {'name': 'top'}])
+    assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -1,4 +1,3 @@
-import json
 import random
 import uuid
 from http import HTTPStatus
@@ -6,7 +5,7 @@ from http import HTTPStatus
 import pytest
 
 from testdata.es_data import person, persons_data, persons_movies
-from utils.helpers import make_get_request
+from utils.helpers import get_item_cache_key, get_list_cache_key, make_get_request
 
 
 @pytest.mark.asyncio
@@ -23,7 +22,7 @@ async def test_get_one_person(redis_client):
     person_id = person.get('id')
 
     response = await make_get_request(f'/persons/{person_id}/')
-    cache = await redis_client.get(person_id)
+    cache = await redis_client.get(await get_item_cache_key(redis_client, 'persons', person_id))
 
     assert response.status == HTTPStatus.OK
     assert response.body.get('id') == person_id
@@ -102,7 +101,7 @@ async def test_persons_endpoint_cache(redis_client):
         'query': None,
         'entity_name': 'persons'
     }
-    key = json.dumps(params, sort_keys=True)
+    key = await get_list_cache_key(redis_client, 'persons', params)
 
     response = await make_get_request(
         '/persons/', params={'page[size]': page_size}
@@ -111,3 +110,12 @@ async def test_persons_endpoint_cache(redis_client):
 
     assert response.status == HTTPStatus.OK
     assert cache
+
+
+@pytest.mark.asyncio
+async def test_persons_list_caches_each_person(redis_client):
+    response = await make_get_request('/persons/', params={'page[size]': 5, 'page[number]': 2})
+    keys = [await get_item_cache_key(redis_client, 'persons', person['id']) for person in response.body]
+
+    assert response.status == HTTPStatus.OK
+    assert all(await redis_client.mget(keys))
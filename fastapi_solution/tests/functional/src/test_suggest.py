@@ -0,0 +1,31 @@
+from http import HTTPStatus
+
+import pytest
+
+from utils.helpers import make_get_request
+
+
+@pytest.mark.asyncio
+async def test_suggest_by_prefix():
+    response = await make_get_request('/suggest/', params={'query': 'dja', 'size': 3})
+
+    assert response.status == HTTPStatus.OK
+    assert len(response.body['films']) == 3
+    assert all(set(film) == {'id', 'title'} for film in response.body['films'])
+    assert all(film['title'] == 'Django' for film in response.body['films'])
+    assert response.body['persons'] == []
+
+
+@pytest.mark.asyncio
+async def test_suggest_persons():
+    response = await make_get_request('/suggest/', params={'query': 'An'})
+
+    assert response.status == HTTPStatus.OK
+    assert response.body['persons']
+    assert all(person['name'] == 'Ann' for person in response.body['persons'])
+
+
+@pytest.mark.asyncio
+async def test_suggest_size_limit():
+    response = await make_get_request('/suggest/', params={'query': 'a', 'size': 1000})
+    assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -1,13 +1,17 @@
 import uuid
 from datetime import datetime
 
+genre_ids = {name: str(uuid.uuid4()) for name in ('Action', 'Sci-Fi', 'Western')}
+
 movies_data = [{
     'id': str(uuid.uuid4()),
     'imdb_rating': 8.5,
+    'year': 2015,
     'genre': ['Action', 'Sci-Fi'],
+    'genre_ids': [genre_ids['Action'], genre_ids['Sci-Fi']],
     "genres": [
-        {"id": str(uuid.uuid4()), "name": 'Action'},
-        {"id": str(uuid.uuid4()), "name": 'Sci-Fi'}
+        {"id": genre_ids['Action'], "name": 'Action'},
+        {"id": genre_ids['Sci-Fi'], "name": 'Sci-Fi'}
     ],
     'title': 'The Star',
     'description': 'New World',
@@ -28,10 +32,12 @@ movies_data = [{
 } for _ in range(20)] + [{
     'id': str(uuid.uuid4()),
     'imdb_rating': 5.5,
+    'year': 1995,
     'genre': ['Action', 'Western'],
+    'genre_ids': [genre_ids['Action'], genre_ids['Western']],
     "genres": [
-        {"id": str(uuid.uuid4()), "name": 'Action'},
-        {"id": str(uuid.uuid4()), "name": 'Western'}
+        {"id": genre_ids['Action'], "name": 'Action'},
+        {"id": genre_ids['Western'], "name": 'Western'}
     ],
     'title': 'Django',
     'description': 'blackguy',
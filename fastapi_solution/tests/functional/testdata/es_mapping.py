@@ -55,6 +55,12 @@ movies_index = {
         "imdb_rating": {
           "type": "float"
         },
+        "year": {
+          "type": "integer"
+        },
+        "genre_ids": {
+          "type": "keyword"
+        },
         "genre": {
           "type": "keyword"
         },
@@ -77,6 +83,9 @@ movies_index = {
           "fields": {
             "raw": {
               "type":  "keyword"
+            },
+            "suggest": {
+              "type": "search_as_you_type"
             }
           }
         },
@@ -152,7 +161,12 @@ persons_index = {
         },
         "name": {
           "type": "text",
-          "analyzer": "ru_en"
+          "analyzer": "ru_en",
+          "fields": {
+            "suggest": {
+              "type": "search_as_you_type"
+            }
+          }
         },
         "film_ids": {
           "type": "text",
@@ -1,6 +1,10 @@
+import base64
+import hashlib
+import json
 import logging
 import os
 import sys
+import zlib
 from functools import wraps
 from time import sleep
 from typing import Union, Any
@@ -8,6 +12,7 @@ from typing import Union, Any
 import asyncio
 
 import aiohttp
+import zstandard
 from pydantic import BaseModel
 
 current = os.path.dirname(os.path.realpath(__file__))
@@ -97,3 +102,48 @@ async def make_get_request(path: str, params: dict = None) -> HTTPResponse:
         )
     await session.close()
     return resp
+
+
+async def make_post_request(path: str, json: Any = None) -> HTTPResponse:
+    url = test_settings.SERVICE_API_V1_URL + path
+    session = aiohttp.ClientSession()
+    async with session.post(url, json=json) as response:
+        resp = HTTPResponse(
+            body=await response.json(),
+            headers=response.headers,
+            status=response.status,
+        )
+    await session.close()
+    return resp
+
+
+async def get_cache_key(redis_client, namespace: str, kind: str, suffix: str) -> str:
+    """Ключ кэша API в формате <пространство имён>:v<версия>:<вид данных>:<суффикс>"""
+    version = await redis_client.get(f'cache_version:{namespace}') or 1
+    return f'{namespace}:v{version}:{kind}:{suffix}'
+
+
+async def get_item_cache_key(redis_client, namespace: str, pk: str) -> str:
+    return await get_cache_key(redis_client, namespace, 'item', pk)
+
+
+async def get_list_cache_key(redis_client, namespace: str, params: dict) -> str:
+    """Ключ закэшированного списка, незаданные параметры в ключ не входят"""
+    params = {name: value for name, value in params.items() if value is not None and value != ''}
+    data = json.dumps(params, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    return await get_cache_key(redis_client, namespace, 'list', hashlib.blake2b(data, digest_size=16).hexdigest())
+
+
+def decode_cache_value(value: str) -> str:
+    """
+    Данные записи кэша API. Большие записи хранятся сжатыми: символ алгоритма (zlib или zstd)
+    и base64 сжатых данных, см. app.cache_codec
+    """
+    if not value or value[0] >= ' ':
+        return value
+    data = base64.b64decode(value[1:])
+    if value[0] == '\x01':
+        return zlib.decompress(data).decode()
+    if value[0] == '\x02':
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    raise ValueError(f'Unknown cache entry codec {value[0]!r}')
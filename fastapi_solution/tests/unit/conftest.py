@@ -0,0 +1,64 @@
+import copy
+import os
+import sys
+
+import httpx
+import pytest
+import pytest_asyncio
+from fakeredis.aioredis import FakeRedis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+import main  # noqa: E402
+from app import dependencies, middlewares  # noqa: E402
+from app.connections import elastic as elastic_connection  # noqa: E402
+from app.connections import redis as redis_connection  # noqa: E402
+from app.enums import UserRoles  # noqa: E402
+from app.local_cache import local_caches  # noqa: E402
+from testdata.documents import documents  # noqa: E402
+from utils.fake_elastic import FakeElasticsearch  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    """In-process кэши глобальны, поэтому после каждого теста очищаются"""
+    yield
+    for cache in local_caches.values():
+        cache.clear()
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    """Redis в памяти процесса, подставленный вместо соединения приложения"""
+    client = FakeRedis(decode_responses=True)
+    redis_connection.redis = client
+    yield client
+    await client.flushall()
+    redis_connection.redis = None
+
+
+@pytest.fixture
+def elastic():
+    """Elasticsearch в памяти процесса с фильмами, жанрами и персонами из testdata"""
+    return FakeElasticsearch(copy.deepcopy(documents))
+
+
+@pytest_asyncio.fixture
+async def client(redis_client, elastic, monkeypatch):
+    """Клиент API без запуска startup: соединения приложения заменены Redis и Elasticsearch в памяти"""
+    monkeypatch.setattr(elastic_connection, 'es', elastic)
+    async with httpx.AsyncClient(app=main.app, base_url='http://test') as client:
+        yield client
+
+
+@pytest.fixture
+def user_role(monkeypatch):
+    """Задаёт роль, которую получит запрос с любым токеном в Authorization"""
+    def set_role(role: UserRoles) -> None:
+        async def get_role_by_token(token, redis):
+            return role.value
+
+        monkeypatch.setattr(middlewares, 'get_role_by_token', get_role_by_token)
+        monkeypatch.setattr(dependencies, 'get_role_by_token', get_role_by_token)
+
+    return set_role
@@ -0,0 +1,82 @@
+import orjson
+import pytest
+import zstandard
+
+from app import cache_codec
+from app.cache_codec import CacheCodec, ZlibCodec, ZstdCodec
+from services.films_toolkit import FilmsToolkit
+from testdata.documents import film_ids
+
+DATA = orjson.dumps([{'id': str(n), 'title': 'Film', 'imdb_rating': 5.0} for n in range(50)]).decode()
+
+
+@pytest.mark.parametrize('codec', [ZlibCodec(), ZstdCodec()], ids=['zlib', 'zstd'])
+def test_compressed_round_trip(codec):
+    cache = CacheCodec(codec=codec, threshold=1024)
+
+    encoded = cache.encode(DATA)
+
+    assert encoded[0] == codec.header
+    assert len(encoded) < len(DATA)
+    assert cache.decode(encoded) == DATA.encode()
+
+
+def test_small_entry_stored_uncompressed():
+    cache = CacheCodec(codec=ZstdCodec(), threshold=1024)
+    data = '{"id":"1"}'
+
+    assert cache.encode(data) == data
+    assert cache.decode(data) == data
+
+
+def test_incompressible_entry_stored_uncompressed():
+    cache = CacheCodec(codec=ZstdCodec(), threshold=16)
+    data = '"' + ''.join(chr(0x400 + n % 200) for n in range(40)) + '"'
+
+    assert cache.encode(data) == data
+
+
+def test_codec_disabled():
+    cache = CacheCodec(codec=None, threshold=16, decoders=[ZlibCodec()])
+    old = CacheCodec(codec=ZlibCodec(), threshold=16).encode(DATA)
+
+    assert cache.encode(DATA) == DATA
+    assert cache.decode(old) == DATA.encode()
+
+
+def test_mixed_entries_readable_after_codec_change():
+    zlib_entry = CacheCodec(codec=ZlibCodec(), threshold=1024).encode(DATA)
+    uncompressed_entry = DATA
+    cache = CacheCodec(codec=ZstdCodec(), threshold=1024, decoders=[ZlibCodec()])
+    zstd_entry = cache.encode(DATA)
+
+    assert {zlib_entry[0], zstd_entry[0]} == {ZlibCodec.header, ZstdCodec.header}
+    assert cache.decode(zlib_entry) == DATA.encode()
+    assert cache.decode(zstd_entry) == DATA.encode()
+    assert cache.decode(uncompressed_entry) == DATA
+
+
+def test_unreadable_entries_are_misses():
+    dictionary = zstandard.train_dictionary(1024, [DATA[n:].encode() for n in range(0, 1000, 10)]).as_bytes()
+    dict_entry = CacheCodec(codec=ZstdCodec(dictionary=dictionary), threshold=1024).encode(DATA)
+    cache = CacheCodec(codec=ZstdCodec(), threshold=1024, decoders=[ZlibCodec()])
+
+    assert dict_entry[0] == '\x03'
+    assert cache.decode(dict_entry) is None
+    assert cache.decode(ZstdCodec.header + 'not base64!') is None
+    assert cache.decode(ZlibCodec.header + 'AAAA') is None
+
+
+@pytest.mark.asyncio
+async def test_toolkit_reads_compressed_entries(redis_client, elastic, monkeypatch):
+    monkeypatch.setattr(cache_codec, 'cache_codec', CacheCodec(codec=ZstdCodec(), threshold=16))
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    film = await toolkit.get(film_ids[0])
+    toolkit.local_cache.clear()
+
+    stored = await redis_client.get(toolkit.instance_key(film_ids[0]))
+    cached = await toolkit.get(film_ids[0])
+
+    assert stored[0] == ZstdCodec.header
+    assert cached == film
+    assert len(elastic.calls_to('get')) == 1
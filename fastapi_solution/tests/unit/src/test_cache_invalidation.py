@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+
+import orjson
+import pytest
+
+from app import cache_invalidation, cache_keys
+from app.core.config import settings
+from models.person import Person
+from services.persons_toolkit import PersonsToolkit
+
+persons = [
+    Person(id=str(uuid.UUID(int=n)), name=f'Person {n}', roles=['actor'], film_ids=[]) for n in range(1, 3)
+]
+list_params = {'page': 1, 'page_size': 2, 'entity_name': 'persons'}
+
+
+@pytest.fixture(autouse=True)
+def namespace_versions(monkeypatch):
+    monkeypatch.setattr(cache_keys, 'namespace_versions', {})
+
+
+async def start_listener(redis_client, on_etl_finished=None) -> asyncio.Task:
+    listener = asyncio.create_task(cache_invalidation.listen(redis_client, on_etl_finished=on_etl_finished))
+    while not (await redis_client.pubsub_numsub(settings.CACHE_INVALIDATION_CHANNEL))[0][1]:
+        await asyncio.sleep(0.01)
+    return listener
+
+
+async def wait_until_deleted(redis_client, *keys: str) -> None:
+    async def poll():
+        while await redis_client.exists(*keys):
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout=1)
+
+
+async def wait_until(condition) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_etl_message_invalidates_entity_and_lists_referencing_it(redis_client):
+    toolkit = PersonsToolkit(elastic=None, redis=redis_client)
+    await toolkit.cache_instances_by_params(list_params, persons)
+    list_key = toolkit.params_key(list_params)
+    changed_key, unchanged_key = toolkit.instance_key(persons[0].uuid), toolkit.instance_key(persons[1].uuid)
+    listener = await start_listener(redis_client)
+    try:
+        await redis_client.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            orjson.dumps({'index': 'persons', 'ids': [persons[0].uuid]}),
+        )
+        await wait_until_deleted(redis_client, changed_key, list_key, f'refs:{persons[0].uuid}')
+    finally:
+        listener.cancel()
+
+    assert await redis_client.exists(unchanged_key)
+    assert toolkit.local_cache.get(list_key) is None
+    assert await toolkit.get_cached_instances(list_params) is None
+
+
+@pytest.mark.asyncio
+async def test_version_message_switches_namespace_keys(redis_client):
+    toolkit = PersonsToolkit(elastic=None, redis=redis_client)
+    await toolkit.cache_instance(persons[0])
+    old_key = toolkit.instance_key(persons[0].uuid)
+    listener = await start_listener(redis_client)
+    try:
+        await redis_client.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            orjson.dumps({'index': 'persons', 'version': 2}),
+        )
+        await wait_until(lambda: cache_keys.get_namespace_version('persons') == 2)
+    finally:
+        listener.cancel()
+
+    assert toolkit.instance_key(persons[0].uuid) != old_key
+    assert await toolkit.get_cached_instance_by_pk(persons[0].uuid) is None
+
+
+@pytest.mark.asyncio
+async def test_etl_finished_message_is_passed_to_callback(redis_client):
+    finished = []
+    listener = await start_listener(redis_client, on_etl_finished=finished.append)
+    try:
+        await redis_client.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            orjson.dumps({'event': 'etl_finished', 'indexes': ['movies', 'persons']}),
+        )
+        await wait_until(lambda: finished)
+    finally:
+        listener.cancel()
+
+    assert finished == [['movies', 'persons']]
+
+
+@pytest.mark.asyncio
+async def test_malformed_message_does_not_stop_listener(redis_client):
+    toolkit = PersonsToolkit(elastic=None, redis=redis_client)
+    await toolkit.cache_instance(persons[0])
+    key = toolkit.instance_key(persons[0].uuid)
+    listener = await start_listener(redis_client)
+    try:
+        await redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL, b'{"index": "persons"}')
+        await redis_client.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            orjson.dumps({'index': 'persons', 'ids': [persons[0].uuid]}),
+        )
+        await wait_until_deleted(redis_client, key)
+    finally:
+        listener.cancel()
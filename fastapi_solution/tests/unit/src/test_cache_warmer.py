@@ -0,0 +1,93 @@
+from collections import Counter
+
+import orjson
+import pytest
+
+from app.core.config import settings
+from app.local_cache import local_caches
+from app.popularity import get_popularity_key, tracker
+from app.serializers.query_params_classes import FilmFilterParams, PaginationDataParams
+from app.toolkits import WarmableCacheToolkit
+from models.film import Film
+from models.genre import Genre
+from services.auth_service import AuthService
+from services.cache_warmer import CacheWarmer
+from services.films_toolkit import FilmsToolkit
+from services.genres_toolkit import GenresToolkit
+from testdata.documents import film_ids
+
+PAGINATION = PaginationDataParams(sort='-imdb_rating', page_size=2, page=1, cursor=None)
+FILTERS = FilmFilterParams(genre=None, rating_from=None, rating_to=None, year_from=None, year_to=None)
+
+
+@pytest.fixture(autouse=True)
+def popularity(monkeypatch):
+    monkeypatch.setattr(tracker, '_counts', Counter())
+    monkeypatch.setattr(settings, 'CACHE_WARM_RATE', 1000)
+
+
+async def forget_cache(redis_client) -> None:
+    """Удаляет все записи кэша, кроме счётчиков популярности, как будто они истекли"""
+    for key in await redis_client.keys():
+        if not key.startswith('popularity:'):
+            await redis_client.delete(key)
+    for cache in local_caches.values():
+        cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_warmed_list_served_from_cache(redis_client, elastic):
+    body = await FilmsToolkit(elastic=elastic, redis=redis_client).list_serialized(
+        response_model=Film, pagination_data=PAGINATION, filters=FILTERS,
+    )
+    await tracker.flush(redis_client)
+    await forget_cache(redis_client)
+
+    await CacheWarmer(elastic=elastic, redis=redis_client).warm(['movies'])
+    for cache in local_caches.values():
+        cache.clear()
+    elastic.calls.clear()
+
+    warmed = await FilmsToolkit(elastic=elastic, redis=redis_client).list_serialized(
+        response_model=Film, pagination_data=PAGINATION, filters=FILTERS,
+    )
+    assert orjson.loads(warmed) == orjson.loads(body)
+    assert elastic.calls == []
+
+
+@pytest.mark.asyncio
+async def test_warmed_items_and_genre_lists_served_from_cache(redis_client, elastic):
+    films_toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    genres_toolkit = GenresToolkit(elastic=elastic, redis=redis_client)
+    await films_toolkit.get(film_ids[0])
+    await genres_toolkit.list_serialized(response_model=Genre, pagination_data=PAGINATION)
+    await tracker.flush(redis_client)
+    await forget_cache(redis_client)
+
+    await CacheWarmer(elastic=elastic, redis=redis_client).warm()
+    for cache in local_caches.values():
+        cache.clear()
+    elastic.calls.clear()
+
+    assert (await films_toolkit.get(film_ids[0])).uuid == film_ids[0]
+    assert await genres_toolkit.list_serialized(response_model=Genre, pagination_data=PAGINATION)
+    assert elastic.calls == []
+
+
+@pytest.mark.asyncio
+async def test_warming_does_not_count_popularity(redis_client, elastic):
+    await FilmsToolkit(elastic=elastic, redis=redis_client).get(film_ids[0])
+    await tracker.flush(redis_client)
+    scores = await redis_client.zrange(get_popularity_key('movies'), 0, -1, withscores=True)
+
+    await CacheWarmer(elastic=elastic, redis=redis_client).warm(['movies'])
+    await tracker.flush(redis_client)
+
+    assert await redis_client.zrange(get_popularity_key('movies'), 0, -1, withscores=True) == scores
+
+
+def test_only_list_toolkits_are_warmable():
+    assert issubclass(FilmsToolkit, WarmableCacheToolkit)
+    assert issubclass(GenresToolkit, WarmableCacheToolkit)
+    assert not issubclass(AuthService, WarmableCacheToolkit)
+    assert not hasattr(AuthService, 'warm_list')
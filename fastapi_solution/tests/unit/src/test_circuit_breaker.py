@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+import aioredis
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from app import circuit_breaker
+from app.circuit_breaker import CircuitBreaker, CircuitState, get_circuit_breaker
+from app.connections import elastic as elastic_connection
+from app.connections import redis as redis_connection
+from app.core.config import settings
+from app.toolkits import REFRESHING, get_fresh_key
+from services.films_toolkit import FilmsToolkit
+from testdata.documents import film_ids
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    """Предохранители глобальны, каждый тест начинает с замкнутых"""
+    monkeypatch.setattr(circuit_breaker, 'circuit_breakers', {})
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = {
+        'name': 'test',
+        'failure_ratio': 0.5,
+        'slow_call_duration': 1,
+        'min_calls': 4,
+        'window': 60,
+        'open_duration': 60,
+        'half_open_calls': 2,
+        **kwargs,
+    }
+    return CircuitBreaker(**options)
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(0, success=False)
+
+
+def test_stays_closed_until_min_calls():
+    breaker = make_breaker()
+    for _ in range(breaker.min_calls - 1):
+        breaker.record(0, success=False)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_when_failure_ratio_reached():
+    breaker = make_breaker()
+    breaker.record(0)
+    breaker.record(0)
+    breaker.record(0, success=False)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record(0, success=False)
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert 0 < breaker.retry_after <= breaker.open_duration
+
+
+def test_slow_calls_are_failures():
+    breaker = make_breaker()
+    for _ in range(breaker.min_calls):
+        breaker.record(breaker.slow_call_duration * 2)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_probes_close_breaker():
+    breaker = make_breaker(open_duration=0)
+    open_breaker(breaker)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record(0)
+    breaker.record(0)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = make_breaker(open_duration=0)
+    open_breaker(breaker)
+    assert breaker.allow_request()
+
+    breaker.record(0, success=False)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_without_elastic_while_open(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    await toolkit.get(film_ids[0])
+    key = toolkit.instance_key(film_ids[0])
+    await redis_client.delete(get_fresh_key(key))
+    toolkit.local_cache.clear()
+    open_breaker(get_circuit_breaker('elasticsearch'))
+
+    film = await toolkit.get(film_ids[0])
+
+    assert film.uuid == film_ids[0]
+    assert len(elastic.calls_to('get')) == 1
+    assert await redis_client.get(get_fresh_key(key)) != REFRESHING
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_while_elastic_open_is_503(client, monkeypatch):
+    es = elastic_connection.create_elasticsearch()
+    monkeypatch.setattr(elastic_connection, 'es', es)
+    breaker = get_circuit_breaker('elasticsearch')
+    open_breaker(breaker)
+
+    try:
+        response = await client.get(f'/api/v1/films/{film_ids[0]}')
+    finally:
+        await es.close()
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert 1 <= int(response.headers['Retry-After']) <= settings.CIRCUIT_BREAKER_OPEN_DURATION
+
+
+@pytest.mark.asyncio
+async def test_requests_served_from_elastic_while_redis_fails(client, elastic, monkeypatch):
+    monkeypatch.setattr(settings, 'CIRCUIT_BREAKER_MIN_CALLS', 2)
+    fake_redis = FakeRedis(decode_responses=True)
+
+    async def get_connection(*args, **kwargs):
+        # ошибка клиента приложения, а не redis-py, которым пользуется fakeredis
+        raise aioredis.exceptions.ConnectionError('Redis is unavailable')
+
+    monkeypatch.setattr(fake_redis.connection_pool, 'get_connection', get_connection)
+    monkeypatch.setattr(
+        redis_connection, 'redis', redis_connection.InstrumentedRedis(connection_pool=fake_redis.connection_pool)
+    )
+
+    for pk in film_ids[:3]:
+        response = await client.get(f'/api/v1/films/{pk}')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['id'] == pk
+
+    assert get_circuit_breaker('redis').state == CircuitState.OPEN
+    assert len(elastic.calls_to('get')) == 3
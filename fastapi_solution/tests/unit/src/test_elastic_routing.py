@@ -0,0 +1,195 @@
+import asyncio
+from typing import Dict, List
+
+import orjson
+import pytest
+from elasticsearch import AIOHttpConnection, AsyncTransport, ConnectionError
+
+from app.connections.elastic import InstrumentedTransport, LatencyAwareConnection, LatencyAwareSelector
+from app.core.config import settings
+
+NODES = ['node1:9200', 'node2:9200']
+
+
+class FakeNodeConnection(AIOHttpConnection):
+    """Узел ES, отвечающий через delays[host] секунд телом с именем узла, запросы запоминаются в requests"""
+    delays: Dict[str, float] = {}
+    failing: set = set()
+    requests: List[tuple] = []
+
+    async def perform_request(self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None):
+        self.requests.append((self.host, url, params))
+        await asyncio.sleep(self.delays.get(self.host, 0))
+        if self.host in self.failing:
+            raise ConnectionError('N/A', 'Connection refused', None)
+        return 200, {'content-type': 'application/json'}, orjson.dumps({'node': self.host}).decode()
+
+
+class FakeConnection(LatencyAwareConnection, FakeNodeConnection):
+    pass
+
+
+@pytest.fixture
+def nodes(monkeypatch):
+    monkeypatch.setattr(FakeNodeConnection, 'delays', {})
+    monkeypatch.setattr(FakeNodeConnection, 'failing', set())
+    monkeypatch.setattr(FakeNodeConnection, 'requests', [])
+    monkeypatch.setattr(settings, 'CIRCUIT_BREAKER_ENABLED', False)
+    return FakeNodeConnection
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(settings, 'ES_HEDGING_ENABLED', True)
+    monkeypatch.setattr(settings, 'ES_HEDGE_MIN_SAMPLES', 5)
+    monkeypatch.setattr(settings, 'ES_HEDGE_MIN_DELAY', 0.01)
+
+
+def make_transport() -> InstrumentedTransport:
+    return InstrumentedTransport(
+        [{'host': node.split(':')[0], 'port': int(node.split(':')[1])} for node in NODES],
+        connection_class=FakeConnection,
+        selector_class=LatencyAwareSelector,
+    )
+
+
+def connections(transport: AsyncTransport) -> Dict[str, LatencyAwareConnection]:
+    return {connection.host: connection for connection in transport.connection_pool.connections}
+
+
+def test_selector_prefers_faster_and_less_loaded_node():
+    fast, slow = LatencyAwareConnection(host='node1'), LatencyAwareConnection(host='node2')
+    fast.latency, slow.latency = 0.01, 0.05
+    selector = LatencyAwareSelector({})
+
+    assert all(selector.select([fast, slow]) is fast for _ in range(10))
+    fast.in_flight = 9
+    assert selector.select([fast, slow]) is slow
+
+
+def test_selector_tries_unmeasured_node_first():
+    measured, unmeasured = LatencyAwareConnection(host='node1'), LatencyAwareConnection(host='node2')
+    measured.latency = 0.01
+
+    assert LatencyAwareSelector({}).select([measured, unmeasured]) is unmeasured
+
+
+@pytest.mark.asyncio
+async def test_connection_latency_smoothed_and_failures_look_slow(nodes):
+    connection = FakeConnection(host='node1')
+    nodes.delays[connection.host] = 0.01
+
+    await connection.perform_request('GET', '/movies/_doc/1')
+    latency = connection.latency
+    nodes.failing.add(connection.host)
+    with pytest.raises(ConnectionError):
+        await connection.perform_request('GET', '/movies/_doc/1')
+
+    assert 0.01 <= latency < settings.ES_REQUEST_TIMEOUT
+    assert connection.latency > latency
+    assert connection.in_flight == 0
+
+
+def test_preference_stable_for_equal_searches():
+    first = InstrumentedTransport._with_preference(None, {'query': {'match_all': {}}, 'size': 10})
+    second = InstrumentedTransport._with_preference({}, {'size': 10, 'query': {'match_all': {}}})
+    other = InstrumentedTransport._with_preference(None, {'size': 20})
+
+    assert first['preference'] == second['preference']
+    assert first['preference'] != other['preference']
+
+
+def test_preference_not_overridden():
+    assert InstrumentedTransport._with_preference({'preference': '_local'}, {'size': 10}) == {'preference': '_local'}
+    assert InstrumentedTransport._with_preference(None, {'pit': {'id': 'abc'}}) is None
+    assert InstrumentedTransport._with_preference(None, None) is None
+
+
+@pytest.mark.asyncio
+async def test_search_routed_by_preference(nodes):
+    transport = make_transport()
+
+    await transport.perform_request('POST', '/movies/_search', body={'size': 10})
+    await transport.perform_request('GET', '/movies/_doc/1')
+
+    (_, _, search_params), (_, _, get_params) = nodes.requests
+    assert 'preference' in search_params
+    assert 'preference' not in (get_params or {})
+
+
+async def connect(transport: InstrumentedTransport) -> None:
+    """Транспорт создаёт соединения с узлами при первом запросе"""
+    await transport.perform_request('GET', '/movies/_doc/1')
+    FakeNodeConnection.requests.clear()
+
+
+async def warm_up(transport: InstrumentedTransport) -> None:
+    """Набирает замеры длительности поиска, после которых запросы начинают дублироваться"""
+    for _ in range(settings.ES_HEDGE_MIN_SAMPLES):
+        await transport.perform_request('POST', '/movies/_search', body={'size': 10})
+
+
+def make_primary(transport: InstrumentedTransport, host: str) -> None:
+    """Селектор выберет host для первого запроса и другой узел для дублирующего"""
+    for connection in connections(transport).values():
+        connection.latency = 0.001 if connection.host == host else 0.0015
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged_to_another_node(nodes, hedging):
+    transport = make_transport()
+    await warm_up(transport)
+    slow, fast = connections(transport)
+    nodes.delays[slow] = 1
+    make_primary(transport, slow)
+
+    result = await asyncio.wait_for(
+        transport.perform_request('POST', '/movies/_search', body={'size': 10}), timeout=0.5,
+    )
+
+    assert result == {'node': fast}
+    assert [host for host, _, _ in nodes.requests[-2:]] == [slow, fast]
+
+
+@pytest.mark.asyncio
+async def test_read_not_hedged_without_samples(nodes, hedging):
+    transport = make_transport()
+    await connect(transport)
+    slow, _ = connections(transport)
+    nodes.delays[slow] = 0.05
+    make_primary(transport, slow)
+
+    result = await transport.perform_request('POST', '/movies/_search', body={'size': 10})
+
+    assert result == {'node': slow}
+    assert len(nodes.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_not_hedged_over_budget(nodes, hedging, monkeypatch):
+    monkeypatch.setattr(settings, 'ES_HEDGE_BUDGET_MIN', 0)
+    monkeypatch.setattr(settings, 'ES_HEDGE_BUDGET_RATIO', 0)
+    transport = make_transport()
+    await warm_up(transport)
+    slow, _ = connections(transport)
+    nodes.delays[slow] = 0.05
+    make_primary(transport, slow)
+
+    result = await transport.perform_request('POST', '/movies/_search', body={'size': 10})
+
+    assert result == {'node': slow}
+    assert len(nodes.requests) == settings.ES_HEDGE_MIN_SAMPLES + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary(nodes, hedging):
+    transport = make_transport()
+    await warm_up(transport)
+    slow, broken = connections(transport)
+    nodes.delays[slow] = 0.05
+    nodes.failing.add(broken)
+    make_primary(transport, slow)
+
+    result = await transport.perform_request('POST', '/movies/_search', body={'size': 10})
+
+    assert result == {'node': slow}
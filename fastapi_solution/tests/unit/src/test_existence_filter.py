@@ -0,0 +1,92 @@
+import uuid
+
+import pytest
+
+from app import existence_filter
+from app.cache_invalidation import CacheInvalidator
+from app.core.config import settings
+from app.existence_filter import BloomFilter, get_existence_filter_key, load_existence_filters
+from app.toolkits import NOT_FOUND_MARKER
+from services.films_toolkit import FilmsToolkit
+from testdata.documents import film_ids
+
+unknown_id = str(uuid.UUID(int=999))
+
+
+@pytest.fixture(autouse=True)
+def existence_filters(monkeypatch):
+    monkeypatch.setattr(existence_filter, 'existence_filters', {})
+    monkeypatch.setattr(existence_filter, '_loaded_filters', {})
+
+
+async def publish_filter(redis_client, ids) -> None:
+    """Публикует фильтр так же, как это делает ETL после переноса данных"""
+    bloom_filter = BloomFilter.for_capacity(capacity=len(ids), error_rate=0.01)
+    for pk in ids:
+        bloom_filter.add(pk)
+    await redis_client.set(get_existence_filter_key('movies'), bloom_filter.to_string())
+    await load_existence_filters(redis_client, ['movies'])
+
+
+@pytest.mark.asyncio
+async def test_missing_entity_is_served_from_negative_cache(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+
+    assert await toolkit.get(unknown_id) is None
+    toolkit.local_cache.clear()
+    assert await toolkit.get(unknown_id) is None
+
+    key = toolkit.instance_key(unknown_id)
+    assert await redis_client.get(key) == NOT_FOUND_MARKER
+    assert 0 < await redis_client.ttl(key) <= settings.NEGATIVE_CACHE_TTL
+    assert len(elastic.calls_to('get')) == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_entities_of_batch_are_cached(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+
+    first = await toolkit.get_many([film_ids[0], unknown_id])
+    toolkit.local_cache.clear()
+    second = await toolkit.get_many([film_ids[0], unknown_id])
+
+    assert [film.uuid for film in first] == [film.uuid for film in second] == [film_ids[0]]
+    assert len(elastic.calls_to('mget')) == 1
+
+
+@pytest.mark.asyncio
+async def test_filter_rejects_unknown_id_without_backend_requests(redis_client, elastic):
+    await publish_filter(redis_client, film_ids)
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+
+    assert await toolkit.get(unknown_id) is None
+    assert (await toolkit.get(film_ids[0])).uuid == film_ids[0]
+    assert elastic.calls_to('get') == [('get', 'movies', film_ids[0])]
+    assert not await redis_client.exists(toolkit.instance_key(unknown_id))
+
+
+@pytest.mark.asyncio
+async def test_new_id_is_not_rejected_by_stale_filter(redis_client, elastic):
+    await publish_filter(redis_client, film_ids)
+    new_id = str(uuid.UUID(int=1000))
+    elastic.documents['movies'][new_id] = {**elastic.documents['movies'][film_ids[0]], 'id': new_id}
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    assert await toolkit.get(new_id) is None
+
+    # ETL сообщает о новом документе раньше, чем перестраивает фильтр
+    await CacheInvalidator(redis_client).invalidate('movies', [new_id])
+    assert (await toolkit.get(new_id)).uuid == new_id
+
+    # неизменившийся фильтр не перечитывается, и добавленный документ из него не пропадает
+    await load_existence_filters(redis_client, ['movies'])
+    assert toolkit.may_exist(new_id)
+
+
+@pytest.mark.asyncio
+async def test_rebuilt_filter_replaces_loaded_one(redis_client):
+    await publish_filter(redis_client, film_ids[:1])
+    assert not existence_filter.may_exist('movies', film_ids[1])
+
+    await publish_filter(redis_client, film_ids)
+
+    assert existence_filter.may_exist('movies', film_ids[1])
@@ -0,0 +1,43 @@
+from http import HTTPStatus
+
+import pytest
+
+import main
+from app.enums import UserRoles
+from models.film import Film, FilmSearchWithFacets
+
+AUTHORIZATION = {'Authorization': 'Bearer token'}
+
+
+@pytest.fixture
+def subscriber(user_role):
+    user_role(UserRoles.SUBSCRIBER)
+
+
+@pytest.mark.asyncio
+async def test_search_returns_list_without_facets(client, subscriber):
+    response = await client.get('/api/v1/films/search', params={'query': 'film'}, headers=AUTHORIZATION)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [Film.parse_obj(film) for film in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_search_with_facets_matches_declared_model(client, subscriber):
+    response = await client.get(
+        '/api/v1/films/search', params={'query': 'film', 'facets': ['genre', 'year']}, headers=AUTHORIZATION,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    result = FilmSearchWithFacets.parse_obj(response.json())
+    assert result.items
+    assert set(result.facets) == {'genre', 'year'}
+
+
+def test_search_response_schema_declares_both_shapes():
+    schema = main.app.openapi()
+    response_schema = schema['paths']['/api/v1/films/search']['get']['responses']['200']['content']
+    refs = str(response_schema['application/json']['schema'])
+
+    assert '#/components/schemas/Film' in refs
+    assert '#/components/schemas/FilmSearchWithFacets' in refs
@@ -0,0 +1,83 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app import toolkits
+from app.local_cache import local_caches
+from app.serializers.query_params_classes import FilmFilterParams, PaginationDataParams
+from app.toolkits import FRESH, get_fresh_key
+from models.film import Film
+from models.home import HomeSection, HomeSectionEntity
+from services.films_toolkit import FilmsToolkit
+from services.home_toolkit import HomeToolkit
+
+SECTIONS = [
+    HomeSection(name='top', sort='-imdb_rating', size=2),
+    HomeSection(name='genres', entity=HomeSectionEntity.GENRES, size=3),
+]
+
+
+def clear_local_caches() -> None:
+    for cache in local_caches.values():
+        cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_missing_sections_loaded_with_one_msearch(redis_client, elastic):
+    body = orjson.loads(await HomeToolkit(elastic=elastic, redis=redis_client).get_sections(SECTIONS))
+
+    assert [film['title'] for film in body['top']] == ['Film 0', 'Film 1']
+    assert [genre['name'] for genre in body['genres']] == ['Genre 0', 'Genre 1', 'Genre 2']
+    assert len(elastic.calls) == 1
+    assert len(elastic.calls_to('msearch')) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_sections_served_without_elastic(redis_client, elastic):
+    home_toolkit = HomeToolkit(elastic=elastic, redis=redis_client)
+    first = await home_toolkit.get_sections(SECTIONS)
+    clear_local_caches()
+
+    assert await home_toolkit.get_sections(SECTIONS) == first
+    assert len(elastic.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_section_shares_cache_with_films_page(redis_client, elastic):
+    body = orjson.loads(await HomeToolkit(elastic=elastic, redis=redis_client).get_sections(SECTIONS[:1]))
+    clear_local_caches()
+
+    films = await FilmsToolkit(elastic=elastic, redis=redis_client).list_serialized(
+        response_model=Film,
+        pagination_data=PaginationDataParams(sort='-imdb_rating', page_size=2, page=1, cursor=None),
+        filters=FilmFilterParams(genre=None, rating_from=None, rating_to=None, year_from=None, year_to=None),
+    )
+
+    assert orjson.loads(films) == body['top']
+    assert len(elastic.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_section_is_served_and_refreshed_in_background(redis_client, elastic):
+    home_toolkit = HomeToolkit(elastic=elastic, redis=redis_client)
+    await home_toolkit.get_sections(SECTIONS[:1])
+    params, _ = home_toolkit.films_toolkit.list_request(
+        pagination_data=PaginationDataParams(sort='-imdb_rating', page_size=2, page=1, cursor=None),
+        filters=FilmFilterParams(genre=None, rating_from=None, rating_to=None, year_from=None, year_to=None),
+    )
+    key = home_toolkit.films_toolkit.response_key(params, Film)
+    await redis_client.delete(get_fresh_key(key))
+    clear_local_caches()
+    film = next(iter(elastic.documents['movies'].values()))
+    film['title'] = 'New title'
+
+    body = orjson.loads(await home_toolkit.get_sections(SECTIONS[:1]))
+    assert body['top'][0]['title'] == 'Film 0'
+    await asyncio.gather(*list(toolkits._refresh_tasks))
+    clear_local_caches()
+
+    body = orjson.loads(await home_toolkit.get_sections(SECTIONS[:1]))
+    assert body['top'][0]['title'] == 'New title'
+    assert await redis_client.get(get_fresh_key(key)) == FRESH
+    assert len(elastic.calls_to('msearch')) == 2
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from aiohttp import test_utils, web
+
+from app.connections import http_client as http_client_module
+from app.connections.http_client import RetryBudget, create_http_client
+from app.core.config import settings
+
+
+class AuthServiceStub:
+    """HTTP сервер, отвечающий 503 на первые failures запросов и запоминающий соединения клиентов"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.requests = 0
+        self.peers = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+        if self.requests <= self.failures:
+            return web.json_response({'error': 'unavailable'}, status=HTTPStatus.SERVICE_UNAVAILABLE)
+        return web.json_response({'user_roles': ['subscriber']})
+
+
+@pytest_asyncio.fixture
+async def stub():
+    stub = AuthServiceStub()
+    app = web.Application()
+    app.router.add_route('*', '/auth', stub.handle)
+    server = test_utils.TestServer(app)
+    await server.start_server()
+    stub.url = str(server.make_url('/auth'))
+    yield stub
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(settings, 'HTTP_RETRY_BACKOFF', 0)
+    client = create_http_client()
+    yield client
+    await client.close()
+
+
+def test_retry_budget_allows_minimum_and_ratio_of_requests(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(http_client_module.time, 'monotonic', lambda: now[0])
+    budget = RetryBudget(ratio=0.1, min_retries=2, window=10)
+    for _ in range(10):
+        budget.record_request()
+
+    assert [budget.can_retry() for _ in range(4)] == [True, True, True, False]
+    now[0] += 10
+    assert budget.can_retry()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(stub, client):
+    for _ in range(5):
+        response = await client.get(stub.url)
+        assert response.status == HTTPStatus.OK
+
+    assert stub.requests == 5
+    assert len(stub.peers) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_is_retried_on_unavailable_service(stub, client):
+    stub.failures = settings.HTTP_RETRIES
+
+    response = await client.get(stub.url)
+
+    assert response.status == HTTPStatus.OK
+    assert response.body == {'user_roles': ['subscriber']}
+    assert stub.requests == settings.HTTP_RETRIES + 1
+
+
+@pytest.mark.asyncio
+async def test_last_response_is_returned_when_retries_run_out(stub, client):
+    stub.failures = settings.HTTP_RETRIES + 1
+
+    response = await client.get(stub.url)
+
+    assert response.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert stub.requests == settings.HTTP_RETRIES + 1
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried(stub, client):
+    stub.failures = 1
+
+    response = await client.post(stub.url)
+
+    assert response.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert stub.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_stops_retries(stub, client):
+    client.retry_budget = RetryBudget(ratio=0, min_retries=1, window=60)
+    stub.failures = 100
+
+    await client.get(stub.url)
+    await client.get(stub.url)
+
+    assert stub.requests == 3
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+
+from app import load_shedding
+from app.core.config import settings
+from app.load_shedding import AdaptiveLimiter, BackendLatency, get_limiter, get_route_class
+from testdata.documents import film_ids, genre_ids
+
+
+@pytest.fixture(autouse=True)
+def limiters(monkeypatch):
+    """Лимиты и замеры длительностей глобальны, каждый тест начинает с начальных, лимит пересчитывается сразу"""
+    monkeypatch.setattr(load_shedding, 'limiters', {})
+    monkeypatch.setattr(load_shedding, 'backend_latency', BackendLatency())
+    monkeypatch.setattr(settings, 'LOAD_SHEDDING_ADJUST_INTERVAL', 0)
+
+
+def make_limiter(**kwargs) -> AdaptiveLimiter:
+    options = {'name': 'test', 'initial_limit': 4, 'min_limit': 2, 'max_limit': 6, 'decrease_factor': 0.5, **kwargs}
+    return AdaptiveLimiter(**options)
+
+
+def serve(limiter: AdaptiveLimiter, concurrency: int) -> None:
+    """Обрабатывает concurrency одновременных запросов"""
+    for _ in range(concurrency):
+        assert limiter.try_acquire()
+    for _ in range(concurrency):
+        limiter.release()
+
+
+def test_requests_over_limit_rejected():
+    limiter = make_limiter()
+    for _ in range(4):
+        assert limiter.try_acquire()
+
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+
+
+def test_limit_increases_additively_under_load():
+    limiter = make_limiter()
+
+    serve(limiter, 3)
+    assert limiter.limit == 5
+    serve(limiter, 3)
+    assert limiter.limit == 6
+    serve(limiter, 6)
+    assert limiter.limit == limiter.max_limit
+
+
+def test_limit_kept_when_mostly_idle():
+    limiter = make_limiter()
+
+    serve(limiter, 1)
+
+    assert limiter.limit == 4
+
+
+def test_limit_decreases_multiplicatively_when_backend_is_slow():
+    limiter = make_limiter()
+    load_shedding.backend_latency.observe('elasticsearch', settings.LOAD_SHEDDING_LATENCY_TARGET['elasticsearch'] * 2)
+
+    serve(limiter, 3)
+    assert limiter.limit == 2
+    serve(limiter, 1)
+    assert limiter.limit == limiter.min_limit
+
+
+def test_route_classes():
+    assert get_route_class('/api/v1/films/search') == 'expensive'
+    assert get_route_class(f'/api/v1/films/{film_ids[0]}') == 'standard'
+    assert get_route_class(f'/api/v1/genres/{genre_ids[0]}') == 'cheap'
+    assert get_route_class('/metrics') is None
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_class_gets_503(client):
+    limiter = get_limiter('standard')
+    limiter.in_flight = int(limiter.limit)
+
+    response = await client.get(f'/api/v1/films/{film_ids[0]}')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == str(settings.LOAD_SHEDDING_RETRY_AFTER)
+    assert (await client.get(f'/api/v1/genres/{genre_ids[0]}')).status_code == HTTPStatus.OK
+    assert (await client.get('/metrics')).status_code == HTTPStatus.OK
+
+    limiter.in_flight = 0
+    assert (await client.get(f'/api/v1/films/{film_ids[0]}')).status_code == HTTPStatus.OK
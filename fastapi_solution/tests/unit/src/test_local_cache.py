@@ -0,0 +1,98 @@
+import pytest
+
+from app import local_cache
+from app.local_cache import LocalCache, get_local_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемые часы in-process кэша"""
+    now = [1000.0]
+    monkeypatch.setattr(local_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_get_returns_cached_value():
+    cache = LocalCache(max_items=10, max_bytes=1024, ttl=10)
+    cache.set('a', {'id': 'a'}, size=10)
+
+    assert cache.get('a') == {'id': 'a'}
+    assert cache.get('b') is None
+    assert cache.stats() == {'items': 1, 'bytes': 10, 'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_least_recently_used_item_is_evicted():
+    cache = LocalCache(max_items=2, max_bytes=1024, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_expired_item_is_not_returned(clock):
+    cache = LocalCache(max_items=10, max_bytes=1024, ttl=10)
+    cache.set('a', 1, size=5)
+
+    clock[0] += 9
+    assert cache.get('a') == 1
+    clock[0] += 2
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_overwrite_refreshes_ttl(clock):
+    cache = LocalCache(max_items=10, max_bytes=1024, ttl=10)
+    cache.set('a', 1)
+    clock[0] += 8
+    cache.set('a', 2)
+    clock[0] += 8
+
+    assert cache.get('a') == 2
+    assert len(cache) == 1
+
+
+def test_size_limit_evicts_oldest_items():
+    cache = LocalCache(max_items=10, max_bytes=100, ttl=10)
+    cache.set('a', 1, size=40)
+    cache.set('b', 2, size=40)
+    cache.set('c', 3, size=40)
+
+    assert cache.get('a') is None
+    assert cache.size == 80
+    assert cache.evictions == 1
+
+
+def test_item_larger_than_limit_is_not_cached():
+    cache = LocalCache(max_items=10, max_bytes=100, ttl=10)
+    cache.set('a', 1, size=10)
+    cache.set('big', 2, size=101)
+
+    assert cache.get('big') is None
+    assert cache.get('a') == 1
+    assert cache.size == 10
+
+
+def test_delete_and_clear_release_size():
+    cache = LocalCache(max_items=10, max_bytes=100, ttl=10)
+    cache.set('a', 1, size=10)
+    cache.set('b', 2, size=20)
+
+    cache.delete('a')
+    assert cache.size == 20
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_get_local_cache_returns_cache_per_namespace():
+    movies = get_local_cache('movies')
+
+    assert get_local_cache('movies') is movies
+    assert get_local_cache('genres') is not movies
+    assert movies.name == 'movies'
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+
+from testdata.documents import film_ids
+
+
+def get_sample(metrics: str, name: str, **labels) -> float:
+    """Значение серии метрики из вывода /metrics, 0 если серии нет"""
+    label_str = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f'{name}{{{label_str}}} ' if labels else f'{name} '
+    for line in metrics.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0
+
+
+@pytest.mark.asyncio
+async def test_request_latency_labelled_by_route_template(client):
+    before = get_sample(
+        (await client.get('/metrics')).text,
+        'http_request_duration_seconds_count',
+        method='GET', route='/api/v1/films/{film_id}', status='200',
+    )
+
+    response = await client.get(f'/api/v1/films/{film_ids[0]}')
+    metrics = (await client.get('/metrics')).text
+
+    assert response.status_code == HTTPStatus.OK
+    after = get_sample(
+        metrics, 'http_request_duration_seconds_count',
+        method='GET', route='/api/v1/films/{film_id}', status='200',
+    )
+    assert after == before + 1
+    assert film_ids[0] not in metrics
+
+
+@pytest.mark.asyncio
+async def test_unknown_path_is_not_a_separate_route(client):
+    await client.get('/api/v1/unknown')
+    metrics = (await client.get('/metrics')).text
+
+    assert get_sample(
+        metrics, 'http_request_duration_seconds_count', method='GET', route='unmatched', status='404'
+    ) >= 1
+    assert '/api/v1/unknown' not in metrics
+
+
+@pytest.mark.asyncio
+async def test_cache_requests_counted(client):
+    metrics = (await client.get('/metrics')).text
+    before = {
+        labels: get_sample(metrics, 'cache_requests_total', entity=labels[0], layer='redis', result=labels[1])
+        for labels in [('movies', 'miss'), ('response', 'miss'), ('response', 'hit')]
+    }
+
+    await client.get(f'/api/v1/films/{film_ids[1]}')
+    await client.get(f'/api/v1/films/{film_ids[1]}')
+    metrics = (await client.get('/metrics')).text
+
+    after = {
+        labels: get_sample(metrics, 'cache_requests_total', entity=labels[0], layer='redis', result=labels[1])
+        for labels in before
+    }
+    assert after[('movies', 'miss')] == before[('movies', 'miss')] + 1
+    assert after[('response', 'miss')] == before[('response', 'miss')] + 1
+    assert after[('response', 'hit')] == before[('response', 'hit')] + 1
+
+
+@pytest.mark.asyncio
+async def test_batch_cache_requests_counted_with_entity_cache(client):
+    labels = {'entity': 'movies', 'layer': 'redis'}
+    before = get_sample((await client.get('/metrics')).text, 'cache_requests_total', **labels, result='miss')
+
+    response = await client.get('/api/v1/films/batch', params=[('ids', pk) for pk in film_ids[:3]])
+    metrics = (await client.get('/metrics')).text
+
+    assert response.status_code == HTTPStatus.OK
+    assert get_sample(metrics, 'cache_requests_total', **labels, result='miss') == before + 3
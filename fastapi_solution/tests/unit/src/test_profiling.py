@@ -0,0 +1,41 @@
+from http import HTTPStatus
+
+import pytest
+from aioredis.exceptions import RedisError
+
+from app import middlewares
+from app.enums import UserRoles
+from testdata.documents import film_ids
+
+PROFILE_HEADERS = {'Authorization': 'Bearer token', middlewares.PROFILE_HEADER: '1'}
+
+
+@pytest.fixture
+def admin(user_role):
+    user_role(UserRoles.ADMIN)
+
+
+@pytest.mark.asyncio
+async def test_profile_saved(client, redis_client, admin):
+    response = await client.get(f'/api/v1/films/{film_ids[0]}', headers=PROFILE_HEADERS)
+
+    assert response.status_code == HTTPStatus.OK
+    profile_id = response.headers[middlewares.PROFILE_ID_HEADER]
+    assert '<html' in await redis_client.get(middlewares.get_profile_key(profile_id))
+
+
+@pytest.mark.asyncio
+async def test_profile_not_saved_when_redis_fails(client, redis_client, admin, monkeypatch):
+    set_value = redis_client.set
+
+    async def set_failing_profiles(name, *args, **kwargs):
+        if name.startswith('profile:'):
+            raise RedisError('Redis is unavailable')
+        return await set_value(name, *args, **kwargs)
+
+    monkeypatch.setattr(redis_client, 'set', set_failing_profiles)
+
+    response = await client.get(f'/api/v1/films/{film_ids[0]}', headers=PROFILE_HEADERS)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['id'] == film_ids[0]
@@ -0,0 +1,135 @@
+from collections import Counter
+from http import HTTPStatus
+
+import orjson
+import pytest
+from elasticsearch import NotFoundError, TransportError
+
+from app import cache_keys
+from app.cache_invalidation import CacheInvalidator
+from app.popularity import tracker
+from app.response_cache import strip_weak_etag
+from testdata.documents import film_ids
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    monkeypatch.setattr(cache_keys, 'namespace_versions', {})
+    monkeypatch.setattr(tracker, '_counts', Counter())
+
+
+@pytest.mark.asyncio
+async def test_second_request_served_from_cache(client, elastic):
+    first = await client.get(f'/api/v1/films/{film_ids[0]}')
+    second = await client.get(f'/api/v1/films/{film_ids[0]}')
+
+    assert first.status_code == second.status_code == HTTPStatus.OK
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert second.content == first.content
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Content-Type'] == first.headers['Content-Type']
+    assert len(elastic.calls) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('if_none_match', ['{etag}', 'W/{etag}', '"other", W/{etag}', '*'])
+async def test_not_modified_when_etag_matches(client, if_none_match):
+    etag = (await client.get(f'/api/v1/films/{film_ids[0]}')).headers['ETag']
+
+    response = await client.get(
+        f'/api/v1/films/{film_ids[0]}', headers={'If-None-Match': if_none_match.format(etag=etag)},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b''
+    assert response.headers['ETag'] == etag
+
+
+@pytest.mark.asyncio
+async def test_full_response_when_etag_differs(client):
+    await client.get(f'/api/v1/films/{film_ids[0]}')
+
+    response = await client.get(f'/api/v1/films/{film_ids[0]}', headers={'If-None-Match': 'W/"other"'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['id'] == film_ids[0]
+
+
+def test_strip_weak_etag():
+    assert strip_weak_etag('W/"abc"') == '"abc"'
+    assert strip_weak_etag('"W/abc"') == '"W/abc"'
+    assert strip_weak_etag('"/W"') == '"/W"'
+
+
+@pytest.mark.asyncio
+async def test_response_invalidated_with_entity(client, redis_client, elastic):
+    await client.get('/api/v1/films/', params={'page[size]': 3})
+    elastic.documents['movies'][film_ids[0]]['title'] = 'New title'
+
+    await CacheInvalidator(redis=redis_client).invalidate('movies', [film_ids[0]])
+    response = await client.get('/api/v1/films/', params={'page[size]': 3})
+
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json()[0]['title'] == 'New title'
+
+
+@pytest.mark.asyncio
+async def test_response_invalidated_with_namespace_version(client):
+    await client.get(f'/api/v1/films/{film_ids[0]}')
+
+    CacheInvalidator.change_version('movies', 2)
+    response = await client.get(f'/api/v1/films/{film_ids[0]}')
+
+    assert response.headers['X-Cache'] == 'MISS'
+
+
+@pytest.mark.asyncio
+async def test_popularity_counted_for_cached_responses(client, redis_client):
+    for _ in range(3):
+        await client.get(f'/api/v1/films/{film_ids[0]}')
+        await client.get('/api/v1/films/', params={'page[size]': 3})
+    await tracker.flush(redis_client)
+
+    top = await tracker.top(redis_client, 'movies', 10)
+    scores = dict(await redis_client.zrange('popularity:movies', 0, -1, withscores=True))
+
+    assert {'kind': 'item', 'pk': film_ids[0]} in top
+    assert sorted(scores.values()) == [3, 3]
+    list_entry = next(entry for entry in top if entry['kind'] == 'list')
+    assert list_entry['params']['page_size'] == 3
+    assert scores[orjson.dumps({'kind': 'item', 'pk': film_ids[0]}, option=orjson.OPT_SORT_KEYS).decode()] == 3
+
+
+@pytest.mark.asyncio
+async def test_degraded_suggestions_not_cached(client, elastic, monkeypatch):
+    async def msearch(body, **kwargs):
+        elastic.calls.append(('msearch', body))
+        raise TransportError('N/A', 'Suggest timed out')
+
+    monkeypatch.setattr(elastic, 'msearch', msearch)
+
+    for _ in range(2):
+        response = await client.get('/api/v1/suggest/', params={'query': 'star'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'films': [], 'persons': []}
+        assert response.headers['Cache-Control'] == 'no-store'
+        assert 'X-Cache' not in response.headers
+
+    assert len(elastic.calls_to('msearch')) == 2
+
+
+@pytest.mark.asyncio
+async def test_facets_of_missing_index_not_cached(client, elastic, monkeypatch):
+    async def search(index=None, body=None, **kwargs):
+        elastic.calls.append(('search', index, body))
+        raise NotFoundError(404, 'index_not_found_exception', {})
+
+    monkeypatch.setattr(elastic, 'search', search)
+
+    for _ in range(2):
+        response = await client.get('/api/v1/films/facets', params={'facets': 'genre'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'genre': []}
+        assert response.headers['Cache-Control'] == 'no-store'
+
+    assert len(elastic.calls_to('search')) == 2
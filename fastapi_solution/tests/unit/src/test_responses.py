@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.responses import RawJSONResponse
+from app.toolkits import RedisCacheToolkit
+from models.film import Film, FilmDetailed
+from models.person import Person
+from services.films_toolkit import FilmsToolkit
+
+films = [
+    FilmDetailed(id=str(uuid.UUID(int=n)), title=f'Film {n}', imdb_rating=n + 0.5, description='Описание')
+    for n in range(3)
+]
+persons = [
+    Person(id=str(uuid.UUID(int=n)), name=f'Person {n}', roles=['actor'], film_ids=[uuid.UUID(int=100 + n)])
+    for n in range(3)
+]
+
+app = FastAPI()
+
+
+@app.get('/films/model', response_model=list[Film])
+async def films_model():
+    return films
+
+
+@app.get('/films/raw', response_model=list[Film])
+async def films_raw():
+    return RawJSONResponse(RedisCacheToolkit.serialize_instances(films, Film))
+
+
+@app.get('/persons/model', response_model=list[Person])
+async def persons_model():
+    return persons
+
+
+@app.get('/persons/raw', response_model=list[Person])
+async def persons_raw():
+    return RawJSONResponse(RedisCacheToolkit.serialize_instances(persons, Person))
+
+
+@pytest.mark.parametrize('entity', ['films', 'persons'])
+def test_raw_body_matches_response_model_serialization(entity):
+    client = TestClient(app)
+
+    expected = client.get(f'/{entity}/model')
+    response = client.get(f'/{entity}/raw')
+
+    assert response.status_code == expected.status_code
+    assert response.headers['content-type'] == expected.headers['content-type']
+    assert response.json() == expected.json()
+
+
+@pytest.mark.asyncio
+async def test_cached_body_is_served_as_is(redis_client):
+    toolkit = FilmsToolkit(elastic=None, redis=redis_client)
+    params = {'page': 1, 'page_size': 3, 'entity_name': 'movies'}
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return films
+
+    body = await toolkit.get_serialized_instances(params=params, response_model=Film, loader=loader)
+    toolkit.local_cache.clear()
+    cached = await toolkit.get_serialized_instances(params=params, response_model=Film, loader=loader)
+
+    assert RawJSONResponse(cached).body == RawJSONResponse(body).body
+    assert loads == [1]
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.single_flight import SingleFlight
+from services.genres_toolkit import GenresToolkit
+
+
+class Loader:
+    """Загрузчик, который считает вызовы и завершается, только когда его отпустят"""
+
+    def __init__(self, result=None, error: Exception = None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    single_flight = SingleFlight()
+    loader = Loader(result=['film'])
+
+    calls = [asyncio.create_task(single_flight.do('key', loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert 'key' in single_flight
+    loader.release.set()
+
+    assert await asyncio.gather(*calls) == [['film']] * 5
+    assert loader.calls == 1
+    assert 'key' not in single_flight
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_loaded_separately():
+    single_flight = SingleFlight()
+    loader = Loader(result=1)
+    loader.release.set()
+
+    await asyncio.gather(single_flight.do('a', loader), single_flight.do('b', loader))
+
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_is_raised_to_all_callers_and_key_is_released():
+    single_flight = SingleFlight()
+    loader = Loader(error=ValueError('es is down'))
+
+    calls = [asyncio.create_task(single_flight.do('key', loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert 'key' not in single_flight
+    loader.error = None
+    assert await single_flight.do('key', loader) is None
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_load():
+    single_flight = SingleFlight()
+    loader = Loader(result='data')
+
+    cancelled = asyncio.create_task(single_flight.do('key', loader))
+    waiting = asyncio.create_task(single_flight.do('key', loader))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    loader.release.set()
+
+    assert await waiting == 'data'
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_load_once_releases_redis_lock(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, 'CACHE_LOCK_ENABLED', True)
+    toolkit = GenresToolkit(elastic=None, redis=redis_client)
+    loader = Loader(result='data')
+    loader.release.set()
+    locked = []
+
+    async def reader():
+        locked.append(await redis_client.exists('lock:genres:key'))
+        return None
+
+    assert await toolkit.load_once('genres:key', loader=loader, reader=reader) == 'data'
+    assert locked == [1]
+    assert loader.calls == 1
+    assert not await redis_client.exists('lock:genres:key')
+
+
+@pytest.mark.asyncio
+async def test_load_once_releases_redis_lock_on_error(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, 'CACHE_LOCK_ENABLED', True)
+    toolkit = GenresToolkit(elastic=None, redis=redis_client)
+    loader = Loader(error=ValueError('es is down'))
+    loader.release.set()
+
+    async def reader():
+        return None
+
+    with pytest.raises(ValueError):
+        await toolkit.load_once('genres:key', loader=loader, reader=reader)
+    assert not await redis_client.exists('lock:genres:key')
+
+
+@pytest.mark.asyncio
+async def test_load_once_rereads_cache_filled_by_other_worker(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, 'CACHE_LOCK_ENABLED', True)
+    toolkit = GenresToolkit(elastic=None, redis=redis_client)
+    loader = Loader(result='loaded')
+
+    async def reader():
+        return 'cached'
+
+    assert await toolkit.load_once('genres:key', loader=loader, reader=reader) == 'cached'
+    assert loader.calls == 0
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app import toolkits
+from app.core.config import settings
+from app.toolkits import FRESH, REFRESHING, get_fresh_key
+from services.films_toolkit import FilmsToolkit
+from testdata.documents import film_ids
+
+
+async def wait_for_refreshes() -> None:
+    await asyncio.gather(*list(toolkits._refresh_tasks))
+
+
+async def make_stale(toolkit: FilmsToolkit, pk: str) -> str:
+    """Кэширует фильм и снимает с записи метку свежести, как будто истёк REDIS_CACHE_TTL"""
+    await toolkit.get(pk)
+    key = toolkit.instance_key(pk)
+    await toolkit.redis.delete(get_fresh_key(key))
+    toolkit.local_cache.clear()
+    return key
+
+
+@pytest.mark.asyncio
+async def test_entry_outlives_fresh_marker(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    await toolkit.get(film_ids[0])
+    key = toolkit.instance_key(film_ids[0])
+
+    assert await redis_client.get(get_fresh_key(key)) == FRESH
+    assert await redis_client.ttl(get_fresh_key(key)) <= settings.REDIS_CACHE_TTL
+    assert await redis_client.ttl(key) > settings.REDIS_CACHE_TTL
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_and_refreshed_in_background(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    key = await make_stale(toolkit, film_ids[0])
+    elastic.documents['movies'][film_ids[0]]['title'] = 'New title'
+
+    film = await toolkit.get(film_ids[0])
+    assert film.title == 'Film 0'
+    await wait_for_refreshes()
+    toolkit.local_cache.clear()
+
+    assert (await toolkit.get(film_ids[0])).title == 'New title'
+    assert await redis_client.get(get_fresh_key(key)) == FRESH
+    assert len(elastic.calls_to('get')) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_refreshed_once(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    await make_stale(toolkit, film_ids[0])
+
+    await asyncio.gather(*(FilmsToolkit(elastic=elastic, redis=redis_client).get(film_ids[0]) for _ in range(5)))
+    await wait_for_refreshes()
+
+    assert len(elastic.calls_to('get')) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_list_body_is_served_and_refreshed(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    pagination = toolkit.pagination_from_params({'page_size': 2})
+    await toolkit.list_serialized(response_model=toolkit.list_model, pagination_data=pagination)
+    body_key = toolkit.response_key(toolkit._list_params(pagination_data=pagination), toolkit.list_model)
+    await redis_client.delete(get_fresh_key(body_key))
+    toolkit.local_cache.clear()
+    elastic.documents['movies'][film_ids[0]]['title'] = 'New title'
+
+    stale = await toolkit.list_serialized(response_model=toolkit.list_model, pagination_data=pagination)
+    await wait_for_refreshes()
+    toolkit.local_cache.clear()
+    fresh = await toolkit.list_serialized(response_model=toolkit.list_model, pagination_data=pagination)
+
+    assert 'Film 0' in stale
+    assert 'New title' in fresh
+    assert len(elastic.calls_to('search')) == 2
+
+
+@pytest.mark.asyncio
+async def test_without_stale_ttl_entry_expires_with_redis_ttl(redis_client, elastic, monkeypatch):
+    monkeypatch.setattr(settings, 'CACHE_STALE_TTL', {})
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    await toolkit.get(film_ids[0])
+    key = toolkit.instance_key(film_ids[0])
+
+    assert not await redis_client.exists(get_fresh_key(key))
+    assert await redis_client.ttl(key) <= settings.REDIS_CACHE_TTL
+
+
+@pytest.mark.asyncio
+async def test_refresh_in_progress_is_not_repeated(redis_client, elastic):
+    toolkit = FilmsToolkit(elastic=elastic, redis=redis_client)
+    key = await make_stale(toolkit, film_ids[0])
+    await redis_client.set(get_fresh_key(key), REFRESHING)
+
+    film = await toolkit.get(film_ids[0])
+    await wait_for_refreshes()
+
+    assert film.title == 'Film 0'
+    assert len(elastic.calls_to('get')) == 1
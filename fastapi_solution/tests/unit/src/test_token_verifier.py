@@ -0,0 +1,141 @@
+import asyncio
+import time
+import uuid
+from http import HTTPStatus
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+
+from app import token_verifier
+from app.core.config import settings
+from app.dependencies import get_role_by_token
+from app.enums import UserRoles
+from app.token_verifier import TokenVerifier, UnverifiableTokenError
+from services.auth_service import AuthService
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+public_key = private_key.public_key().public_bytes(
+    serialization.Encoding.PEM,
+    serialization.PublicFormat.SubjectPublicKeyInfo,
+).decode()
+
+
+def make_token(**claims) -> str:
+    now = int(time.time())
+    payload = {'sub': 'user@mail.ru', 'jti': str(uuid.uuid4()), 'iat': now, 'exp': now + 60, 'type': 'access'}
+    payload.update(claims)
+    return jwt.encode({name: value for name, value in payload.items() if value is not None}, private_key, 'RS256')
+
+
+@pytest.fixture
+def verifier(monkeypatch) -> TokenVerifier:
+    verifier = TokenVerifier(public_key=public_key, algorithm='RS256')
+    monkeypatch.setattr(token_verifier, 'token_verifier', verifier)
+    return verifier
+
+
+@pytest.mark.parametrize('roles, role', [
+    (['superuser'], UserRoles.ADMIN.value),
+    (['subscriber'], UserRoles.SUBSCRIBER.value),
+    ([], UserRoles.GUEST.value),
+])
+def test_role_is_taken_from_token(verifier, roles, role):
+    assert verifier.get_role(make_token(roles=roles)) == role
+
+
+def test_revoked_token_is_rejected(verifier):
+    jti = str(uuid.uuid4())
+    verifier.revoked = {jti}
+
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.get_role(make_token(jti=jti, roles=['subscriber']))
+
+
+@pytest.mark.parametrize('claims', [
+    {'type': 'refresh', 'roles': []},
+    {'exp': int(time.time()) - 60, 'roles': []},
+    {'jti': None, 'roles': []},
+])
+def test_invalid_token_is_rejected(verifier, claims):
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.get_role(make_token(**claims))
+
+
+def test_token_without_roles_cannot_be_verified_locally(verifier):
+    with pytest.raises(UnverifiableTokenError):
+        verifier.get_role(make_token())
+
+
+def test_roles_of_old_token_cannot_be_verified_locally(verifier):
+    issued = int(time.time()) - settings.AUTH_LOCAL_ROLE_MAX_AGE - 1
+
+    with pytest.raises(UnverifiableTokenError):
+        verifier.get_role(make_token(iat=issued, exp=issued + 60 * 60, roles=['subscriber']))
+    with pytest.raises(UnverifiableTokenError):
+        verifier.get_role(make_token(iat=None, roles=['subscriber']))
+
+
+@pytest.mark.asyncio
+async def test_token_without_roles_is_checked_by_auth_service(verifier, monkeypatch):
+    checked = []
+
+    async def authenticate(self, token: str) -> str:
+        checked.append(token)
+        return UserRoles.SUBSCRIBER.value
+
+    monkeypatch.setattr(AuthService, 'authenticate', authenticate)
+    token = make_token()
+
+    assert await get_role_by_token(token=token, redis=None) == UserRoles.SUBSCRIBER.value
+    assert checked == [token]
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_checked_by_auth_service(verifier, monkeypatch):
+    async def authenticate(self, token: str) -> str:
+        raise AssertionError('Auth service must not be called')
+
+    monkeypatch.setattr(AuthService, 'authenticate', authenticate)
+
+    with pytest.raises(HTTPException) as error:
+        await get_role_by_token(token=make_token(type='refresh', roles=[]), redis=None)
+    assert error.value.status_code == HTTPStatus.UNAUTHORIZED
+
+
+class FlakyAuthService:
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    async def get_public_key(self):
+        if self.failures:
+            self.failures -= 1
+            raise asyncio.TimeoutError
+        return {'public_key': public_key, 'algorithm': 'RS256'}
+
+    async def get_revoked_tokens(self):
+        return ['revoked-jti']
+
+
+@pytest.mark.asyncio
+async def test_verification_key_is_retried_until_loaded(monkeypatch):
+    monkeypatch.setattr(token_verifier, 'token_verifier', None)
+    monkeypatch.setattr(token_verifier, 'refresh_task', None)
+    monkeypatch.setattr(settings, 'AUTH_KEY_RETRY_DELAY', 0.01)
+    auth_service = FlakyAuthService(failures=3)
+
+    await token_verifier.init_token_verifier(auth_service)
+    assert token_verifier.token_verifier is None
+
+    for _ in range(100):
+        if token_verifier.token_verifier is not None:
+            break
+        await asyncio.sleep(0.01)
+    refreshing = not token_verifier.refresh_task.done()
+    token_verifier.refresh_task.cancel()
+
+    assert auth_service.failures == 0
+    assert token_verifier.token_verifier.revoked == {'revoked-jti'}
+    assert refreshing
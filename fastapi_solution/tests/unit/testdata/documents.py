@@ -0,0 +1,27 @@
+import uuid
+
+genre_ids = [str(uuid.UUID(int=100 + n)) for n in range(3)]
+film_ids = [str(uuid.UUID(int=n)) for n in range(1, 6)]
+person_ids = [str(uuid.UUID(int=200 + n)) for n in range(3)]
+
+genres = {pk: {'id': pk, 'name': f'Genre {n}'} for n, pk in enumerate(genre_ids)}
+films = {
+    pk: {
+        'id': pk,
+        'title': f'Film {n}',
+        'imdb_rating': 5.0 + n,
+        'description': f'Description {n}',
+        'genre_ids': [genre_ids[n % len(genre_ids)]],
+        'genres': [{'id': genre_ids[n % len(genre_ids)], 'name': f'Genre {n % len(genre_ids)}'}],
+        'actors': [{'id': person_ids[0], 'name': 'Person 0'}],
+        'writers': [],
+        'directors': [],
+    }
+    for n, pk in enumerate(film_ids)
+}
+persons = {
+    pk: {'id': pk, 'name': f'Person {n}', 'roles': ['actor'], 'film_ids': film_ids[:2], 'films': []}
+    for n, pk in enumerate(person_ids)
+}
+
+documents = {'movies': films, 'genres': genres, 'persons': persons}
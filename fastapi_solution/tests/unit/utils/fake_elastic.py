@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional
+
+from elasticsearch import NotFoundError
+
+
+class FakeElasticsearch:
+    """
+    Elasticsearch в памяти процесса с документами {индекс: {id: документ}}.
+    Поддерживает только вызовы, которые делают тулкиты, и запоминает их, чтобы тесты могли проверить,
+    дошёл ли запрос до ES
+    """
+
+    def __init__(self, documents: Dict[str, Dict[str, dict]]):
+        self.documents = documents
+        self.calls: List[tuple] = []
+
+    def calls_to(self, operation: str) -> List[tuple]:
+        return [call for call in self.calls if call[0] == operation]
+
+    async def get(self, index: str, id: str, **kwargs) -> dict:
+        self.calls.append(('get', index, str(id)))
+        source = self.documents.get(index, {}).get(str(id))
+        if source is None:
+            raise NotFoundError(404, 'not_found', {'_id': str(id), 'found': False})
+        return {'_id': str(id), '_source': source, 'found': True}
+
+    async def mget(self, body: dict, index: str, **kwargs) -> dict:
+        self.calls.append(('mget', index, list(body['ids'])))
+        docs = []
+        for pk in body['ids']:
+            source = self.documents.get(index, {}).get(str(pk))
+            if source is None:
+                docs.append({'_id': pk, 'found': False})
+            else:
+                docs.append({'_id': pk, '_source': source, 'found': True})
+        return {'docs': docs}
+
+    async def search(self, index: Optional[str] = None, body: Optional[dict] = None, **kwargs) -> dict:
+        self.calls.append(('search', index, body))
+        return self._search(index, body or {})
+
+    async def msearch(self, body: List[dict], **kwargs) -> dict:
+        self.calls.append(('msearch', body))
+        return {'responses': [self._search(header['index'], search) for header, search in zip(body[::2], body[1::2])]}
+
+    def _search(self, index: str, body: dict) -> dict:
+        documents = list(self.documents.get(index, {}).items())
+        start = body.get('from', 0)
+        hits = [
+            {'_id': pk, '_source': source, 'sort': [pk]}
+            for pk, source in documents[start:start + body.get('size', 10)]
+        ]
+        return {'hits': {'total': {'value': len(documents)}, 'hits': hits}}
+
+    async def close(self) -> None:
+        pass